@@ -0,0 +1,297 @@
+"""
+ข้อมูลหน้า Dashboard - จำนวน NG ใน memory (reconcile กับ Database เป็นระยะ)
+การ query Database ทำผ่าน function ที่ส่งเข้ามา (main.py ใช้ load_dashboard_counts)
+snapshot + ETag สร้างจากตัวเลขใน memory - request ที่ได้ 304 ไม่แตะ Database
+"""
+import time
+import threading
+from datetime import timedelta
+
+def build_ppe_status(ng_count):
+    """สร้าง data ของ PPE status (OK / NG) จากจำนวน NG วันนี้"""
+    # สมมติว่า OK คือจำนวนที่ไม่ใช่ NG (อาจต้องปรับตาม logic จริง)
+    # ถ้ามี table สำหรับ OK ให้ query จาก table นั้น
+    # ตัวอย่างนี้จะคำนวณแบบสมมติ: ถ้ามี NG 15 ก็ให้ OK เป็น 85 (รวม 100%)
+    total_detections = max(ng_count * 6, 100)  # สมมติว่ามี detection ทั้งหมด
+    ok_count = total_detections - ng_count
+    
+    return [
+        {"name": "OK", "value": ok_count, "color": "#10B981"},
+        {"name": "NG", "value": ng_count, "color": "#DC2626"}
+    ]
+
+def build_rule_violations(counts):
+    """
+    สร้าง data ของ rule violations
+    
+    Args:
+        counts: {RuleID: count} ของวันนี้
+    """
+    # Mapping RuleID กับชื่อที่จะแสดง
+    rule_names = {
+        2: "Glove",           # non-safety-glove
+        3: "Shoe",            # non-safety-shoe
+        4: "Glasses",         # non-safety-glasses
+        5: "Shirt"            # non-safety-shirt
+    }
+    
+    # สร้าง response data
+    custom_order = [2, 4, 5, 3]  # Glove, Glasses, Shirt, Shoe
+    return [
+        {"rule": rule_names[rule_id], "count": counts.get(rule_id, 0)}
+        for rule_id in custom_order
+    ]
+
+def build_monthly_summary(results):
+    """
+    สร้าง data ของ monthly summary (12 เดือน)
+    
+    Args:
+        results: {(month, RuleName): count} ของปีปัจจุบัน
+    """
+    months = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", 
+              "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+    
+    # เตรียมข้อมูลเริ่มต้น
+    monthly_data = {}
+    for i in range(12):
+        monthly_data[i+1] = {
+            "gloves": 0,
+            "glasses": 0,
+            "shirt": 0
+        }
+    
+    # แปลง RuleName เป็น key ตามชื่อจริงใน database
+    for (month_num, rule_name), count in results.items():
+        if rule_name == "Safety Glove Required":
+            monthly_data[month_num]["gloves"] = count
+        elif rule_name == "Safety Glasses Required":
+            monthly_data[month_num]["glasses"] = count
+        elif rule_name == "Safety Shirt Required":
+            monthly_data[month_num]["shirt"] = count
+    
+    return [
+        {
+            "month": months[i],
+            "gloves": monthly_data[i+1]["gloves"],
+            "glasses": monthly_data[i+1]["glasses"],
+            "shirt": monthly_data[i+1]["shirt"]
+        }
+        for i in range(12)
+    ]
+
+def etag_matches(if_none_match, etag):
+    """ตรวจ If-None-Match header (รองรับหลายค่า, weak validator และ *)"""
+    if not if_none_match:
+        return False
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+class DashboardAggregates:
+    """
+    จำนวน NG tickets ใน memory แยกตาม (วัน, RuleID, Location) สำหรับ dashboard endpoints
+    - record() บวกเพิ่มทันทีเมื่อ service นี้ insert ticket สำเร็จ
+    - reconcile() โหลดใหม่จาก Database เป็นระยะ (GROUP BY + range บน CreatedDate)
+      เพื่อรวม tickets ที่มาจากที่อื่น และแก้ค่าที่คลาดระหว่าง reconcile
+    เก็บตั้งแต่ 1 ม.ค. ของปีนี้ (หรือเมื่อวาน ถ้าเป็นวันที่ 1 ม.ค.) - วันที่ตามเวลาไทย
+    """
+    
+    def __init__(self, load, today, interval=300, retry_after=30):
+        """
+        Args:
+            load: function(since) -> (counts {(date, rule_id, location): count}, total, rule_names {RuleID: RuleName})
+            today: function() -> วันที่ปัจจุบัน (date)
+            interval: วินาที ระหว่าง reconcile
+            retry_after: วินาที ที่ ensure_ready() ตอบ False ทันทีหลัง reconcile ล้มเหลว (ไม่ query ซ้ำทุก request)
+        """
+        self.load = load
+        self.today = today
+        self.interval = interval
+        self.retry_after = retry_after
+        self._lock = threading.Lock()
+        self._reconcile_lock = threading.Lock()  # reconcile ทีละครั้ง
+        self._stop = threading.Event()
+        self._thread = None
+        
+        self.counts = {}  # (date, rule_id, location) -> count
+        self.total = 0  # NG ทั้งหมด (ทุกปี)
+        self.rule_names = {}  # RuleID -> RuleName
+        self.since = None
+        self.reconciled_at = None
+        self.failed_at = None  # time.monotonic() ของ reconcile ที่ล้มเหลวล่าสุด
+        
+        # เพิ่มทุกครั้งที่ตัวเลขเปลี่ยน - ใช้ทำ ETag ของ snapshot (instance กันค่าซ้ำหลัง restart)
+        self.version = 0
+        self.instance = f"{int(time.time()):x}"
+        
+        # tickets ที่ record() ระหว่าง reconcile กำลัง query - นำมาบวกซ้ำหลังสลับเป็นค่าจาก Database
+        self._delta = None
+        
+        # Statistics
+        self.reconciles = 0
+        self.reconcile_errors = 0
+        self.recorded = 0
+    
+    def _window_start(self, today):
+        yesterday = today - timedelta(days=1)
+        return min(today.replace(month=1, day=1), yesterday)
+    
+    def _apply(self, tickets):
+        for t in tickets:
+            day = t['detected_time'].date()
+            if day >= self.since:
+                key = (day, t['rule_id'], t['location'])
+                self.counts[key] = self.counts.get(key, 0) + 1
+            self.total += 1
+    
+    def record(self, tickets):
+        """บวก tickets ที่เพิ่ง commit (dict ที่มี location, rule_id, detected_time)"""
+        with self._lock:
+            if self._delta is not None:
+                self._delta.extend(tickets)
+            if self.reconciled_at is not None and tickets:
+                self._apply(tickets)
+                self.version += 1
+            self.recorded += len(tickets)
+    
+    def reconcile(self):
+        """
+        โหลดจำนวนจริงจาก Database แทนค่าใน memory
+        
+        tickets ที่ record() ระหว่าง query ถูกเก็บไว้แล้วบวกเข้าไปหลังสลับ ไม่หายไปกับค่าเก่า
+        (ticket ที่ commit ระหว่าง query อาจถูกนับซ้ำได้ - reconcile รอบถัดไปแก้ให้)
+        
+        Returns:
+            bool: True ถ้าสำเร็จ
+        """
+        with self._reconcile_lock:
+            return self._reconcile()
+    
+    def _reconcile(self):
+        since = self._window_start(self.today())
+        
+        with self._lock:
+            self._delta = []
+        
+        try:
+            counts, total, rule_names = self.load(since)
+        except Exception as e:
+            print(f"❌ [Dashboard] Reconcile error: {e}")
+            with self._lock:
+                self._delta = None
+                self.reconcile_errors += 1
+                self.failed_at = time.monotonic()
+            return False
+        
+        with self._lock:
+            delta, self._delta = self._delta, None
+            previous = (self.counts, self.total, self.rule_names, self.since)
+            self.counts = counts
+            self.total = total
+            self.rule_names = rule_names
+            self.since = since
+            self._apply(delta)
+            if (self.counts, self.total, self.rule_names, self.since) != previous:
+                self.version += 1
+            self.reconciled_at = time.time()
+            self.failed_at = None
+            self.reconciles += 1
+        return True
+    
+    def _backing_off(self):
+        failed_at = self.failed_at
+        return failed_at is not None and time.monotonic() - failed_at < self.retry_after
+    
+    def ensure_ready(self):
+        """
+        Reconcile ครั้งแรกถ้ายังไม่เคยโหลด (blocking - เรียกจาก thread pool) - Returns: bool
+        
+        ถ้า reconcile ล้มเหลวภายใน retry_after วินาที ตอบ False ทันที
+        (Database ล่ม request ไม่ต้องรอ timeout ทีละครั้ง)
+        """
+        if self.reconciled_at is not None:
+            return True
+        if self._backing_off():
+            return False
+        with self._reconcile_lock:
+            if self.reconciled_at is not None:
+                return True
+            # request ที่รอ lock อยู่ระหว่าง reconcile ที่เพิ่งล้มเหลว ไม่ query ซ้ำ
+            if self._backing_off():
+                return False
+            return self._reconcile()
+    
+    def _reconcile_loop(self):
+        while not self._stop.is_set():
+            self.reconcile()
+            self._stop.wait(self.interval)
+    
+    def start(self):
+        """เริ่ม thread reconcile (ครั้งแรกทันที)"""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._reconcile_loop, daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+    
+    def count(self, day, rule_ids=None):
+        """จำนวน NG ของวัน (เฉพาะ rule_ids ถ้าระบุ)"""
+        with self._lock:
+            return sum(c for (d, rule_id, _), c in self.counts.items()
+                       if d == day and (rule_ids is None or rule_id in rule_ids))
+    
+    def count_by_rule(self, day):
+        """Returns: {RuleID: count} ของวัน"""
+        result = {}
+        with self._lock:
+            for (d, rule_id, _), c in self.counts.items():
+                if d == day:
+                    result[rule_id] = result.get(rule_id, 0) + c
+        return result
+    
+    def monthly_by_rule_name(self, year):
+        """Returns: {(month, RuleName): count} ของปี"""
+        result = {}
+        with self._lock:
+            for (d, rule_id, _), c in self.counts.items():
+                if d.year == year:
+                    key = (d.month, self.rule_names.get(rule_id))
+                    result[key] = result.get(key, 0) + c
+        return result
+    
+    def etag(self, today):
+        """ETag ของ snapshot - เปลี่ยนเมื่อตัวเลขเปลี่ยนหรือขึ้นวันใหม่ (ไม่ต้องสร้าง snapshot ก่อน)"""
+        with self._lock:
+            return f'"{self.instance}-{self.version}-{today.isoformat()}"'
+    
+    def snapshot(self, today):
+        """ข้อมูลทั้งหน้า Dashboard (stats, ppeStatus, ruleViolations, monthlySummary) จากตัวเลขใน memory"""
+        today_count = self.count(today)
+        return {
+            "stats": {
+                "todayDetections": today_count,
+                "yesterdayDetections": self.count(today - timedelta(days=1)),
+                "totalNG": self.get_total()
+            },
+            "ppeStatus": build_ppe_status(today_count),
+            "ruleViolations": build_rule_violations(self.count_by_rule(today)),
+            "monthlySummary": build_monthly_summary(self.monthly_by_rule_name(today.year))
+        }
+    
+    def get_total(self):
+        with self._lock:
+            return self.total
+    
+    def get_statistics(self):
+        with self._lock:
+            return {
+                "keys": len(self.counts),
+                "since": self.since.isoformat() if self.since else None,
+                "reconciled_at": self.reconciled_at,
+                "reconciles": self.reconciles,
+                "reconcile_errors": self.reconcile_errors,
+                "failed_at": self.failed_at,
+                "version": self.version,
+                "recorded": self.recorded
+            }
@@ -0,0 +1,201 @@
+"""
+Connection pool ของ Database (pyodbc) - ไม่ต้อง TLS + login ใหม่ทุก query
+connection จริงเปิดผ่าน function ที่ส่งเข้ามา (main.py ใช้ pyodbc.connect)
+"""
+import threading
+import time
+from collections import deque
+
+class PooledConnection:
+    """
+    ตัวแทน pyodbc connection ที่ยืมมาจาก pool - ใช้เหมือน connection ปกติ
+    close() คืน connection ให้ pool แทนการปิดจริง
+    """
+    
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+        self._broken = False
+    
+    def cursor(self):
+        return self._conn.cursor()
+    
+    def commit(self):
+        try:
+            self._conn.commit()
+        except Exception:
+            self._broken = True
+            raise
+    
+    def rollback(self):
+        try:
+            self._conn.rollback()
+        except Exception:
+            # rollback ไม่ได้ = connection เสีย ไม่คืนเข้า pool
+            self._broken = True
+            raise
+    
+    def close(self):
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            self._pool.release(conn, discard=self._broken)
+    
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    
+    def __del__(self):
+        # helper ที่ return/raise ก่อน close() - คืน slot ให้ pool
+        try:
+            self.close()
+        except Exception:
+            pass
+
+class ConnectionPool:
+    """
+    Thread-safe pool ของ pyodbc connections
+    - จำกัดจำนวนด้วย semaphore (max_size)
+    - health check (SELECT 1) ก่อนใช้ connection ที่ว่างนาน
+    - ปิด connection ที่ว่างนานเกิน idle_timeout
+    - connection ที่เสีย (commit/rollback/health check ไม่ผ่าน) ถูกทิ้ง ครั้งหน้าเปิดใหม่
+    """
+    
+    def __init__(self, connect, max_size=5, acquire_timeout=10, idle_timeout=300, health_check_after=30):
+        """
+        Args:
+            connect: function ที่เปิด connection ใหม่ (เช่น pyodbc.connect พร้อม connection string)
+        """
+        self.connect = connect
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self.idle_timeout = idle_timeout
+        self.health_check_after = health_check_after
+        
+        self._idle = deque()  # (connection, เวลาที่คืน) - ใหม่สุดอยู่ขวา
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+        
+        # Statistics
+        self.in_use = 0
+        self.created = 0
+        self.reused = 0
+        self.discarded = 0
+        self.failed = 0
+    
+    def _close_quietly(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+    
+    def _evict_idle(self):
+        """ปิด connection ที่ว่างนานเกิน idle_timeout (เก่าสุดอยู่ซ้าย)"""
+        now = time.time()
+        expired = []
+        with self._lock:
+            while self._idle and now - self._idle[0][1] > self.idle_timeout:
+                expired.append(self._idle.popleft()[0])
+                self.discarded += 1
+        for conn in expired:
+            self._close_quietly(conn)
+    
+    def _is_healthy(self, conn):
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+            cursor.close()
+            return True
+        except Exception:
+            return False
+    
+    def acquire(self):
+        """
+        ยืม connection (รอได้ไม่เกิน acquire_timeout)
+        
+        Returns:
+            PooledConnection
+        Raises:
+            TimeoutError ถ้า pool เต็ม, error ของ connect() ถ้าเชื่อมต่อไม่ได้
+        """
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            raise TimeoutError(f"No database connection available within {self.acquire_timeout}s")
+        
+        try:
+            self._evict_idle()
+            
+            # ใช้ connection ที่เพิ่งคืนล่าสุดก่อน - ตัวเก่าจะหมดอายุไปเอง
+            while True:
+                with self._lock:
+                    if not self._idle:
+                        break
+                    conn, returned_at = self._idle.pop()
+                
+                if time.time() - returned_at > self.health_check_after and not self._is_healthy(conn):
+                    with self._lock:
+                        self.discarded += 1
+                    self._close_quietly(conn)
+                    continue
+                
+                with self._lock:
+                    self.reused += 1
+                    self.in_use += 1
+                return PooledConnection(self, conn)
+            
+            conn = self.connect()
+            with self._lock:
+                self.created += 1
+                self.in_use += 1
+            return PooledConnection(self, conn)
+        
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            self._slots.release()
+            raise
+    
+    def release(self, conn, discard=False):
+        """คืน connection - rollback transaction ที่ค้าง ถ้า rollback ไม่ได้ถือว่าเสีย"""
+        if not discard:
+            try:
+                conn.rollback()
+            except Exception:
+                discard = True
+        
+        with self._lock:
+            self.in_use -= 1
+            if discard:
+                self.discarded += 1
+            else:
+                self._idle.append((conn, time.time()))
+        
+        if discard:
+            self._close_quietly(conn)
+        
+        self._slots.release()
+        self._evict_idle()
+    
+    def close_all(self):
+        """ปิด connection ที่ว่างทั้งหมด (ตอน shutdown)"""
+        with self._lock:
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+        for conn in idle:
+            self._close_quietly(conn)
+    
+    def get_statistics(self):
+        with self._lock:
+            return {
+                "max_size": self.max_size,
+                "in_use": self.in_use,
+                "idle": len(self._idle),
+                "created": self.created,
+                "reused": self.reused,
+                "discarded": self.discarded,
+                "failed": self.failed
+            }
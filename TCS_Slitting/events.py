@@ -0,0 +1,143 @@
+"""
+Push events ให้ dashboard (WebSocket /api/ws/events) แทนการ poll
+เก็บสถานะล่าสุดของแต่ละกล้อง ส่งเฉพาะ field ที่เปลี่ยนให้ทุก client (asyncio.Queue ต่อ client)
+client ที่ต่อเข้ามาใหม่หรือตามไม่ทันได้ snapshot ทั้งหมด
+"""
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+
+def _offer_event(q, message):
+    """ใส่ message ลง queue ของ client - ถ้าค้างเต็ม ทิ้งทั้งหมดแล้วให้ส่ง snapshot ใหม่แทน"""
+    if q.full():
+        while not q.empty():
+            q.get_nowait()
+        q.put_nowait({"type": "resync"})
+        return
+    q.put_nowait(message)
+
+class EventHub:
+    """
+    สถานะล่าสุดของแต่ละกล้อง + fan-out การเปลี่ยนแปลงให้ async clients
+    - update_camera() / update_detections() เรียกจาก thread ไหนก็ได้ ส่งเฉพาะเมื่อค่าเปลี่ยน
+    - schedule_refresh() ตั้ง timer เรียก callback ทีหลัง (เช่นตอน alert หมดเวลา)
+    """
+
+    def __init__(self, cameras=(), queue_size=100):
+        """
+        Args:
+            cameras: camera ids ที่เริ่มต้นเป็น status "inactive"
+            queue_size: ข้อความค้างต่อ client สูงสุด เกินนี้ส่ง snapshot ใหม่แทน
+        """
+        self.queue_size = queue_size
+        self.camera_state = {i: {"status": "inactive"} for i in cameras}  # camera -> field ล่าสุดที่ส่งไปแล้ว
+        self.detections = {}  # camera -> detections ล่าสุดที่ส่งไปแล้ว
+        self.version = 0
+        self.lock = threading.Lock()
+        self.subscribers = set()  # (event loop, asyncio.Queue) ของ client
+
+        self._timers = {}  # camera -> threading.Timer ที่ยังไม่ทำงาน
+        self._timer_lock = threading.Lock()
+        self._stopped = False
+
+    def update_detections(self, camera_id, detections):
+        """เก็บ detections ของกล้อง แล้วส่งให้ client ถ้าต่างจากครั้งก่อน - Returns: bool"""
+        with self.lock:
+            if self.detections.get(camera_id) == detections:
+                return False
+            self.detections[camera_id] = detections
+            self.version += 1
+            message = {
+                "type": "detections",
+                "camera_id": camera_id,
+                "version": self.version,
+                "count": len(detections),
+                "detections": detections
+            }
+
+        self._broadcast(message)
+        return True
+
+    def update_camera(self, camera_id, **fields):
+        """รวม fields เข้าสถานะของกล้อง แล้วส่งเฉพาะที่เปลี่ยน - Returns: dict ของ field ที่เปลี่ยน"""
+        with self.lock:
+            state = self.camera_state.setdefault(camera_id, {})
+            changes = {k: v for k, v in fields.items() if state.get(k) != v}
+            if not changes:
+                return {}
+            state.update(changes)
+            self.version += 1
+            message = {"type": "camera", "camera_id": camera_id, "version": self.version, "changes": changes}
+
+        self._broadcast(message)
+        return changes
+
+    def snapshot(self):
+        """สถานะทั้งหมด - ส่งตอน client ต่อเข้ามาใหม่ หรือตามไม่ทัน"""
+        with self.lock:
+            return {
+                "type": "snapshot",
+                "version": self.version,
+                "cameras": {i: dict(state) for i, state in self.camera_state.items()},
+                "detections": {i: list(d) for i, d in self.detections.items()}
+            }
+
+    @asynccontextmanager
+    async def subscription(self):
+        """ลงทะเบียน asyncio.Queue ของ client ตลอดอายุ connection"""
+        loop = asyncio.get_running_loop()
+        q = asyncio.Queue(maxsize=self.queue_size)
+        subscriber = (loop, q)
+
+        with self.lock:
+            self.subscribers.add(subscriber)
+        try:
+            yield q
+        finally:
+            with self.lock:
+                self.subscribers.discard(subscriber)
+
+    def _broadcast(self, message):
+        """ส่ง message ให้ทุก client (เรียกจาก thread ไหนก็ได้)"""
+        with self.lock:
+            subscribers = list(self.subscribers)
+
+        for loop, q in subscribers:
+            try:
+                loop.call_soon_threadsafe(_offer_event, q, message)
+            except RuntimeError:
+                # event loop ปิดไปแล้ว
+                with self.lock:
+                    self.subscribers.discard((loop, q))
+
+    def schedule_refresh(self, camera_id, delay, callback):
+        """
+        เรียก callback(camera_id) หลัง delay วินาที - ตั้งได้ครั้งละหนึ่ง timer ต่อกล้อง
+        (ถ้าตั้งไว้แล้ว callback ที่ทำงานจะตั้งใหม่เองถ้ายังต้องการ)
+        """
+        with self._timer_lock:
+            if self._stopped or camera_id in self._timers:
+                return False
+
+            timer = threading.Timer(max(0, delay) + 0.05, self._fire, args=(camera_id, callback))
+            timer.daemon = True
+            self._timers[camera_id] = timer
+            timer.start()
+            return True
+
+    def _fire(self, camera_id, callback):
+        with self._timer_lock:
+            self._timers.pop(camera_id, None)
+        callback(camera_id)
+
+    def stop(self):
+        """ยกเลิก timer ที่ค้างอยู่ และไม่รับ timer ใหม่ (ตอน shutdown)"""
+        with self._timer_lock:
+            self._stopped = True
+            for timer in self._timers.values():
+                timer.cancel()
+            self._timers.clear()
+
+    def get_subscriber_count(self):
+        with self.lock:
+            return len(self.subscribers)
@@ -0,0 +1,89 @@
+"""
+JPEG encoder ที่ใช้ร่วมกันทั้ง stream, snapshot และการเซฟรูป NG
+ใช้ libjpeg-turbo ผ่าน simplejpeg หรือ PyTurboJPEG ถ้าติดตั้งไว้ (ตั้ง chroma subsampling / fast DCT ได้)
+ไม่มีก็ใช้ OpenCV
+"""
+import numpy as np
+import cv2
+
+JPEG_ENCODERS = ('simplejpeg', 'turbojpeg', 'opencv')
+
+class JpegEncoder:
+    """Encode BGR image เป็น JPEG bytes ด้วย backend ที่เลือกไว้"""
+
+    def __init__(self, backend='auto', fast_dct=True, subsampling='420'):
+        """
+        Args:
+            backend: 'auto' (เร็วที่สุดที่ติดตั้งไว้) หรือหนึ่งใน JPEG_ENCODERS
+            fast_dct: ใช้ integer DCT แบบเร็ว (แม่นยำน้อยลงเล็กน้อย)
+            subsampling: chroma subsampling '444', '422' หรือ '420'
+        """
+        self.fast_dct = fast_dct
+        self.subsampling = subsampling
+        self._impl = None
+        self.backend = self._select_backend(backend)
+
+    def _select_backend(self, backend):
+        """เลือก encoder ที่ระบุ หรือตัวที่เร็วที่สุดที่ติดตั้งไว้ถ้าเป็น 'auto'"""
+        candidates = JPEG_ENCODERS if backend == 'auto' else (backend,)
+        for name in candidates:
+            try:
+                if name == 'simplejpeg':
+                    import simplejpeg
+                    self._impl = simplejpeg
+                elif name == 'turbojpeg':
+                    from turbojpeg import TurboJPEG
+                    self._impl = TurboJPEG()
+                elif name != 'opencv':
+                    raise ValueError(f"Unknown JPEG encoder '{name}'")
+                return name
+            except Exception as e:
+                if backend != 'auto':
+                    print(f"⚠️ JPEG encoder '{name}' unavailable ({e}), using OpenCV")
+        return 'opencv'
+
+    def encode(self, image, quality=85):
+        """
+        Encode BGR image
+
+        Returns:
+            bytes: JPEG data
+
+        Raises:
+            RuntimeError: ถ้า OpenCV encode ไม่สำเร็จ
+        """
+        if self.backend == 'simplejpeg':
+            return self._impl.encode_jpeg(np.ascontiguousarray(image), quality=quality, colorspace='BGR',
+                                          colorsubsampling=self.subsampling, fastdct=self.fast_dct)
+
+        if self.backend == 'turbojpeg':
+            from turbojpeg import TJSAMP_444, TJSAMP_422, TJSAMP_420, TJFLAG_FASTDCT
+            samp = {'444': TJSAMP_444, '422': TJSAMP_422, '420': TJSAMP_420}[self.subsampling]
+            return self._impl.encode(np.ascontiguousarray(image), quality=quality, jpeg_subsample=samp,
+                                     flags=TJFLAG_FASTDCT if self.fast_dct else 0)
+
+        params = [cv2.IMWRITE_JPEG_QUALITY, quality]
+        sampling = getattr(cv2, f"IMWRITE_JPEG_SAMPLING_FACTOR_{self.subsampling}", None)
+        if sampling is not None:
+            params += [cv2.IMWRITE_JPEG_SAMPLING_FACTOR, sampling]
+
+        ok, buffer = cv2.imencode('.jpg', image, params)
+        if not ok:
+            raise RuntimeError("cv2.imencode failed")
+        return buffer.tobytes()
+
+    def write(self, path, image, quality=95):
+        """
+        Encode แล้วเขียนไฟล์ JPEG
+
+        Returns:
+            bool: True ถ้าสำเร็จ
+        """
+        try:
+            data = self.encode(image, quality)
+            with open(path, 'wb') as f:
+                f.write(data)
+            return True
+        except Exception as e:
+            print(f"❌ Error writing JPEG {path}: {e}")
+            return False
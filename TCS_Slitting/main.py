@@ -1,5 +1,6 @@
-from fastapi import FastAPI
-from fastapi.responses import StreamingResponse, FileResponse
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse, FileResponse, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 import cv2
@@ -8,8 +9,7 @@ import time
 from typing import Dict, List
 from pathlib import Path
 from ultralytics import YOLO
-import numpy as np
-from datetime import datetime, timezone
+from datetime import datetime, timezone, timedelta
 import pytz
 import os
 import pygame
@@ -26,6 +26,16 @@ from logging.handlers import RotatingFileHandler
 import sys
 from concurrent.futures import ThreadPoolExecutor
 import queue
+import asyncio
+from db_pool import ConnectionPool
+from outbox import NGOutbox
+from jpeg_encoder import JpegEncoder
+from stream_hub import StreamHub
+from events import EventHub
+from static_overlay import StaticOverlayCache
+from dashboard import (
+    DashboardAggregates, build_ppe_status, build_rule_violations, build_monthly_summary, etag_matches
+)
 
 # Load environment variables
 load_dotenv()
@@ -50,6 +60,28 @@ ODBC_DRIVER = os.getenv('ODBC_DRIVER', 'ODBC Driver 18 for SQL Server')
 DB_TRUST_CERT = os.getenv('DB_TRUST_CERTIFICATE', 'yes')
 DB_ENCRYPT = os.getenv('DB_ENCRYPT', 'yes')
 
+# Connection pool - ไม่ต้อง TLS + login ใหม่ทุก query
+DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', 5))  # connection สูงสุด (ใช้งาน + ว่าง)
+DB_POOL_ACQUIRE_TIMEOUT = 10  # วินาที - รอ connection ว่างได้นานสุด
+DB_POOL_IDLE_TIMEOUT = 300  # วินาที - ปิด connection ที่ว่างนานเกินนี้
+DB_POOL_HEALTH_CHECK_AFTER = 30  # วินาที - ว่างนานเกินนี้ต้อง SELECT 1 ก่อนใช้
+DB_CONNECT_TIMEOUT = 10  # วินาที - login timeout
+
+# NG ticket writer - รวม tickets + evidence เป็น 1 round trip / 1 transaction
+NG_DB_COALESCE_WINDOW = 0.2  # วินาที - รอ NG event จากกล้องอื่นมารวม batch เดียวกัน
+NG_DB_BATCH_MAX_TICKETS = 100  # tickets สูงสุดต่อ batch (SQL Server รับ parameter ได้ไม่เกิน 2100)
+
+# NG outbox - tickets ลง SQLite (WAL) ในเครื่องก่อน แล้วค่อยทยอยส่งเข้า SQL Server
+NG_OUTBOX_PATH = os.getenv('NG_OUTBOX_PATH', str(Path(__file__).resolve().parent / 'ng_outbox.db'))  # ค่าเริ่มต้นอยู่ข้าง main.py ไม่ขึ้นกับ working directory
+NG_OUTBOX_POLL_INTERVAL = 5  # วินาที - ตรวจ outbox แม้ไม่มี event ใหม่
+NG_OUTBOX_RETRY_MIN = 1  # วินาที - รอก่อน retry ครั้งแรกเมื่อ DB ล่ม/ช้า
+NG_OUTBOX_RETRY_MAX = 60  # วินาที - backoff สูงสุด
+NG_OUTBOX_SHUTDOWN_TIMEOUT = 10  # วินาที - รอ flush รอบสุดท้ายตอนปิด (ที่เหลือส่งต่อตอนเปิดใหม่)
+
+# Dashboard aggregates - นับ NG ใน memory, reconcile กับ Database เป็นระยะ
+DASHBOARD_RECONCILE_INTERVAL = 300  # วินาที
+DASHBOARD_RETRY_AFTER = 30  # วินาที - หลังโหลดไม่สำเร็จ ตอบ error ทันทีโดยไม่ query ซ้ำ
+
 # ---- CONFIG ----
 CAM_URLS = [
     "rtsp://admin:@CCTV111@10.89.246.38:554/Streaming/Channels/101",
@@ -143,8 +175,23 @@ NOT_DETECTED_ROI_ZONES = {
 DRAW_ROI = True
 DRAW_EXCLUSION_ZONE = True
 
+# False = ไม่วาด annotation ใน hot path: stream ส่งภาพดิบ + metadata (/api/camera/{id}/overlay) ให้ dashboard วาดเอง
+# (รูป NG ที่บันทึกยังวาด annotation เหมือนเดิม)
+SERVER_SIDE_ANNOTATION = True
+
 DUAL_W, DUAL_H = 760, 720
 SINGLE_W, SINGLE_H = 1024, 768
+STREAM_KEEPALIVE = 5  # วินาที - ส่งเฟรมเดิมซ้ำถ้าไม่มีเฟรมใหม่นานเกินนี้ (0 = ปิด)
+
+# JPEG encoder: 'auto' (simplejpeg > turbojpeg > opencv), 'simplejpeg', 'turbojpeg' หรือ 'opencv'
+JPEG_ENCODER = 'auto'
+JPEG_FAST_DCT = True
+JPEG_SUBSAMPLING = '420'  # '444', '422' หรือ '420'
+
+# Push events (WebSocket /api/ws/events) - ส่งเฉพาะเมื่อข้อมูลเปลี่ยน
+EVENT_QUEUE_SIZE = 100  # ข้อความค้างต่อ client สูงสุด เกินนี้ส่ง snapshot ใหม่แทน
+EVENT_KEEPALIVE = 15  # วินาที - ส่ง ping ตอนไม่มีอะไรเปลี่ยน กัน proxy ตัดและตรวจ client ที่หลุด
+ALERT_ACTIVE_SECONDS = 3  # วินาที - has_alert เป็น True หลัง NG ล่าสุด แล้วส่ง update เมื่อหมดเวลา
 
 MODEL_PATH = r"new_models\object_train7.pt"
 CONFIDENCE_THRESHOLD = 0.7
@@ -230,6 +277,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
 # ---- GLOBAL STATE ----
@@ -237,6 +285,9 @@ latest_frames: Dict[int, any] = {i: None for i in range(len(CAM_URLS))}
 detected_frames: Dict[int, any] = {i: None for i in range(len(CAM_URLS))}
 detection_results: Dict[int, List] = {i: [] for i in range(len(CAM_URLS))}
 frame_locks: Dict[int, threading.Lock] = {i: threading.Lock() for i in range(len(CAM_URLS))}
+frame_seq: Dict[int, int] = {i: 0 for i in range(len(CAM_URLS))}  # นับเฟรมที่ capture ได้ (latest frame wins)
+frame_conditions: Dict[int, threading.Condition] = {i: threading.Condition(frame_locks[i]) for i in range(len(CAM_URLS))}
+detected_seq: Dict[int, int] = {i: 0 for i in range(len(CAM_URLS))}  # seq ของเฟรมที่ detected_frames มาจาก
 last_ng_save_time: Dict[int, float] = {i: 0 for i in range(len(CAM_URLS))}
 ng_save_lock = threading.Lock()
 stop_event = threading.Event()
@@ -343,20 +394,29 @@ def setup_logging():
 logger = setup_logging()
 
 # Database Function
+def _build_conn_str():
+    return (
+        f'DRIVER={{{ODBC_DRIVER}}};'
+        f'SERVER={DB_SERVER};'
+        f'DATABASE={DB_DATABASE};'
+        f'UID={DB_USERNAME};'
+        f'PWD={DB_PASSWORD};'
+        f'TrustServerCertificate={DB_TRUST_CERT};'
+        f'Encrypt={DB_ENCRYPT}'
+    )
+
+db_pool = ConnectionPool(
+    lambda: pyodbc.connect(_build_conn_str(), timeout=DB_CONNECT_TIMEOUT),
+    max_size=DB_POOL_MAX_SIZE,
+    acquire_timeout=DB_POOL_ACQUIRE_TIMEOUT,
+    idle_timeout=DB_POOL_IDLE_TIMEOUT,
+    health_check_after=DB_POOL_HEALTH_CHECK_AFTER
+)
+
 def get_db_connection():
-    """สร้าง connection ไปยัง SQL Server Database"""
+    """ยืม connection ไปยัง SQL Server Database จาก pool (conn.close() = คืนเข้า pool)"""
     try:
-        conn_str = (
-            f'DRIVER={{{ODBC_DRIVER}}};'
-            f'SERVER={DB_SERVER};'
-            f'DATABASE={DB_DATABASE};'
-            f'UID={DB_USERNAME};'
-            f'PWD={DB_PASSWORD};'
-            f'TrustServerCertificate={DB_TRUST_CERT};'
-            f'Encrypt={DB_ENCRYPT}'
-        )
-        conn = pyodbc.connect(conn_str)
-        return conn
+        return db_pool.acquire()
     except Exception as e:
         print(f"❌ Database connection error: {e}")
         return None
@@ -392,6 +452,8 @@ def insert_ng_ticket(camera_id: int, location: str, rule_id: int, severity: str
         conn.commit()
         cursor.close()
         conn.close()
+        
+        dashboard_aggregates.record([{"location": location, "rule_id": rule_id, "detected_time": current_time}])
 
         logging.info(f"✅ NG Ticket created: ID={ticket_id}, Camera={camera_id}, Location={location}, RuleID={rule_id}, Time={current_time.strftime('%Y-%m-%d %H:%M:%S')}")
         return ticket_id
@@ -451,6 +513,155 @@ def insert_ng_evidence(ticket_id: int, file_path: str, file_type: str = "Image")
             pass
         return False
 
+def insert_ng_tickets_batch(tickets):
+    """
+    เขียน NG tickets + evidence ทั้งหมดใน round trip เดียว / transaction เดียว
+    
+    MERGE ... OUTPUT จับคู่ TicketID ที่ได้กับ TicketKey ของแต่ละ ticket ใน @t
+    แล้ว INSERT evidence โดย join กับ @t - ไม่ต้องรอ TicketID กลับมาก่อน
+    
+    Args:
+        tickets: list of dict {camera_id, location, rule_id, severity, detected_time, evidence: [(file_path, file_type)]}
+        
+    Returns:
+        list: TicketID ตามลำดับ tickets หรือ None ถ้าไม่สำเร็จ (rollback ทั้ง batch)
+    """
+    if not tickets:
+        return []
+    
+    conn = get_db_connection()
+    if not conn:
+        logging.error("insert_ng_tickets_batch: Cannot connect to database")
+        return None
+    
+    try:
+        cursor = conn.cursor()
+        
+        ticket_rows = []
+        ticket_params = []
+        evidence_rows = []
+        evidence_params = []
+        
+        for key, t in enumerate(tickets):
+            ticket_rows.append("(?, ?, ?, ?, ?)")
+            ticket_params += [key, t['detected_time'], t['location'], t['rule_id'], t['severity']]
+            
+            for file_path, file_type in t['evidence']:
+                evidence_rows.append("(?, ?, ?, ?)")
+                evidence_params += [key, file_path, file_type, t['detected_time']]
+        
+        query = f"""
+        SET NOCOUNT ON;
+        DECLARE @t TABLE (TicketKey INT PRIMARY KEY, TicketID INT);
+        
+        MERGE ppe_NGTicket AS tgt
+        USING (VALUES {', '.join(ticket_rows)}) AS src (TicketKey, DetectedTime, Location, RuleID, Severity)
+        ON 1 = 0
+        WHEN NOT MATCHED THEN
+            INSERT (DetectedTime, Location, RuleID, Severity, Status, CreatedBy, CreatedDate)
+            VALUES (src.DetectedTime, src.Location, src.RuleID, src.Severity, 'New', 'AI System', src.DetectedTime)
+        OUTPUT src.TicketKey, INSERTED.TicketID INTO @t (TicketKey, TicketID);
+        """
+        
+        if evidence_rows:
+            query += f"""
+        INSERT INTO ppe_NGEvidence (TicketID, FilePath, FileType, CreatedDate)
+        SELECT t.TicketID, e.FilePath, e.FileType, e.CreatedDate
+        FROM (VALUES {', '.join(evidence_rows)}) AS e (TicketKey, FilePath, FileType, CreatedDate)
+        JOIN @t AS t ON t.TicketKey = e.TicketKey;
+        """
+        
+        query += """
+        SELECT TicketKey, TicketID FROM @t ORDER BY TicketKey;
+        """
+        
+        cursor.execute(query, ticket_params + evidence_params)
+        rows = cursor.fetchall()
+        
+        if len(rows) != len(tickets):
+            conn.rollback()
+            logging.error(f"insert_ng_tickets_batch: expected {len(tickets)} TicketIDs, got {len(rows)}")
+            return None
+        
+        conn.commit()
+        cursor.close()
+        
+        dashboard_aggregates.record(tickets)
+        
+        ticket_ids = [int(row[1]) for row in rows]
+        logging.info(f"✅ NG batch saved: {len(tickets)} tickets, {len(evidence_rows)} evidence, IDs={ticket_ids}")
+        return ticket_ids
+    
+    except Exception as e:
+        logging.error(f"Error inserting NG ticket batch: {e}", exc_info=True)
+        try:
+            conn.rollback()
+        except:
+            pass
+        return None
+    
+    finally:
+        conn.close()
+
+ng_outbox = NGOutbox(
+    insert_ng_tickets_batch,
+    path=NG_OUTBOX_PATH,
+    batch_size=NG_DB_BATCH_MAX_TICKETS,
+    coalesce_window=NG_DB_COALESCE_WINDOW,
+    poll_interval=NG_OUTBOX_POLL_INTERVAL,
+    retry_min=NG_OUTBOX_RETRY_MIN,
+    retry_max=NG_OUTBOX_RETRY_MAX,
+    shutdown_timeout=NG_OUTBOX_SHUTDOWN_TIMEOUT
+)
+
+def load_dashboard_counts(since):
+    """
+    จำนวน NG จาก Database สำหรับ dashboard_aggregates.reconcile() - round trip เดียว (1 batch, หลาย result sets)
+    range บน CreatedDate ใช้ index ได้ (ไม่ CAST ฝั่งคอลัมน์ใน WHERE)
+    
+    Returns:
+        tuple: (counts {(date, RuleID, Location): count}, total, rule_names {RuleID: RuleName})
+    """
+    conn = get_db_connection()
+    if not conn:
+        raise ConnectionError("Cannot connect to database")
+    
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SET NOCOUNT ON;
+            DECLARE @since DATETIME2 = ?;
+            
+            SELECT CAST(CreatedDate AS DATE) AS Day, RuleID, Location, COUNT(*)
+            FROM ppe_NGTicket
+            WHERE CreatedDate >= @since
+            GROUP BY CAST(CreatedDate AS DATE), RuleID, Location;
+            
+            SELECT COUNT(*) FROM ppe_NGTicket;
+            
+            SELECT RuleID, RuleName FROM ppe_RuleMaster;
+        """, (datetime.combine(since, datetime.min.time()),))
+        counts = {(row[0], row[1], row[2]): row[3] for row in cursor.fetchall()}
+        
+        cursor.nextset()
+        total = cursor.fetchone()[0]
+        
+        cursor.nextset()
+        rule_names = {row[0]: row[1] for row in cursor.fetchall()}
+        
+        cursor.close()
+    finally:
+        conn.close()
+    
+    return counts, total, rule_names
+
+dashboard_aggregates = DashboardAggregates(
+    load_dashboard_counts,
+    lambda: get_thailand_time().date(),
+    interval=DASHBOARD_RECONCILE_INTERVAL,
+    retry_after=DASHBOARD_RETRY_AFTER
+)
+
 def get_active_rules():
     """ดึงข้อมูล Rule ที่ active จาก Database"""
     try:
@@ -697,7 +908,8 @@ def send_email_alert(camera_id, ng_count, image_paths, ng_detections):
 def save_ng_image_async(original_frame, annotated_frame, camera_id, detections):
     """Async wrapper สำหรับบันทึกรูป - ไม่ block main thread"""
     try:
-        ng_save_queue.put((original_frame.copy(), annotated_frame.copy(), camera_id, detections), block=False)
+        annotated_copy = annotated_frame.copy() if annotated_frame is not None else None
+        ng_save_queue.put((original_frame.copy(), annotated_copy, camera_id, detections), block=False)
         return True
     except queue.Full:
         print(f"⚠️ [Camera {camera_id+1}] NG save queue full, skipping...")
@@ -709,6 +921,7 @@ def save_ng_image_worker():
         try:
             item = ng_save_queue.get(timeout=1)
             if item is None:
+                ng_save_queue.task_done()
                 break
             
             original_frame, annotated_frame, camera_id, detections = item
@@ -722,6 +935,10 @@ def save_ng_image_worker():
                     continue
                 last_ng_save_time[camera_id] = current_time
             
+            # client-side annotation: วาดเฉพาะรูปที่บันทึกเป็นหลักฐาน
+            if annotated_frame is None:
+                annotated_frame = draw_detections(original_frame, detections, camera_id)
+            
             timestamp = get_thailand_time().strftime("%Y%m%d_%H%M%S_%f")[:-3]
             
             ng_detections = [d for d in detections 
@@ -734,7 +951,7 @@ def save_ng_image_worker():
             original_path = None
             if SAVE_ORIGINAL:
                 original_path = os.path.join(NG_SAVE_DIR, "original", f"{base_filename}_orig.jpg")
-                cv2.imwrite(original_path, original_frame)
+                jpeg_encoder.write(original_path, original_frame)
             
             annotated_path = None
             if SAVE_ANNOTATED:
@@ -748,13 +965,13 @@ def save_ng_image_worker():
                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
                 cv2.putText(info_frame, f"NG Count: {ng_count}", (20, 100),
                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
-                cv2.imwrite(annotated_path, info_frame)
+                jpeg_encoder.write(annotated_path, info_frame)
             
             ng_saved_count[camera_id] += 1
             print(f"📸 [Camera {camera_id+1}] NG image saved: {base_filename}")
+            publish_camera_state(camera_id)
             
             # Database และ Email - ทำแบบ async
-            ticket_ids = []
             try:
                 location = f"Slitting Process - Camera {camera_id+1}"
                 severity = "High"
@@ -778,16 +995,25 @@ def save_ng_image_worker():
                              'glasses': 'Non-Safety Glasses', 'shirt': 'Non-Safety Shirt', 
                              'general': 'PPE Detection'}
                 
-                for ng_type, detections_list in ng_by_type.items():
-                    rule_id = rule_mapping[ng_type]
-                    ticket_id = insert_ng_ticket(camera_id, location, rule_id, severity)
-                    
-                    if ticket_id:
-                        ticket_ids.append(ticket_id)
-                        if annotated_path and os.path.exists(annotated_path):
-                            insert_ng_evidence(ticket_id, annotated_path, "Annotated Image")
-                        if original_path and os.path.exists(original_path):
-                            insert_ng_evidence(ticket_id, original_path, "Original Image")
+                evidence = []
+                if annotated_path and os.path.exists(annotated_path):
+                    evidence.append((annotated_path, "Annotated Image"))
+                if original_path and os.path.exists(original_path):
+                    evidence.append((original_path, "Original Image"))
+                
+                # 1 ticket ต่อประเภท NG - ลง outbox ทันที แล้ว flusher ส่งเข้า SQL Server เป็น batch
+                detected_time = get_thailand_time()
+                ng_outbox.append([
+                    {
+                        "camera_id": camera_id,
+                        "location": location,
+                        "rule_id": rule_mapping[ng_type],
+                        "severity": severity,
+                        "detected_time": detected_time,
+                        "evidence": evidence
+                    }
+                    for ng_type in ng_by_type
+                ])
                             
             except Exception as db_error:
                 print(f"❌ [Database] Error: {db_error}")
@@ -812,37 +1038,64 @@ def save_ng_image_worker():
 
 def classify_object(frame, bbox, detected_class):
     """Classify cropped object using classification model"""
+    return classify_objects(frame, [(bbox, detected_class)])[0]
+
+def classify_objects(frame, items):
+    """
+    Classify all PPE crops of a frame in one forward pass
+    items: list of (bbox, detected_class) - returns (class, conf, is_classified) per item in order
+    """
+    outputs = [(detected_class, 0.0, False) for _, detected_class in items]  # เพิ่ม flag ว่า classify สำเร็จหรือไม่
+    
     if classification_model is None or not ENABLE_CLASSIFICATION:
-        return detected_class, 0.0, False  # เพิ่ม flag ว่า classify สำเร็จหรือไม่
+        return outputs
     
-    # ตรวจสอบว่า class นี้ต้องการ classification หรือไม่
-    base_class = detected_class.lower()
-    if base_class not in CLASS_MAPPING:
-        return detected_class, 0.0, False
+    crops = []
+    crop_indices = []
     
-    try:
-        x1, y1, x2, y2 = bbox
-        
-        # ขยาย bbox เล็กน้อย
-        padding = 10
-        x1 = max(0, x1 - padding)
-        y1 = max(0, y1 - padding)
-        x2 = min(frame.shape[1], x2 + padding)
-        y2 = min(frame.shape[0], y2 + padding)
+    for i, (bbox, detected_class) in enumerate(items):
+        # ตรวจสอบว่า class นี้ต้องการ classification หรือไม่
+        if detected_class.lower() not in CLASS_MAPPING:
+            continue
         
-        # Crop object
-        cropped = frame[y1:y2, x1:x2]
+        try:
+            x1, y1, x2, y2 = bbox
+            
+            # ขยาย bbox เล็กน้อย
+            padding = 10
+            x1 = max(0, x1 - padding)
+            y1 = max(0, y1 - padding)
+            x2 = min(frame.shape[1], x2 + padding)
+            y2 = min(frame.shape[0], y2 + padding)
+            
+            # Crop object
+            cropped = frame[y1:y2, x1:x2]
+        except Exception as e:
+            print(f"❌ Crop error for {detected_class}: {e}")
+            continue
         
         if cropped.size == 0:
             print(f"⚠️ Empty crop for {detected_class}")
-            return detected_class, 0.0, False
+            continue
         
-        # Run classification
-        results = classification_model(cropped, device=DEVICE, verbose=False)
+        crops.append(cropped)
+        crop_indices.append(i)
+    
+    if not crops:
+        return outputs
+    
+    try:
+        # Run classification - ทุก crop resize เป็น input size แล้ว stack เป็น tensor เดียว
+        results = classification_model(crops, device=DEVICE, verbose=False)
         
-        if len(results) > 0 and len(results[0].probs) > 0:
-            probs = results[0].probs
-            relevant_classes = CLASS_MAPPING.get(base_class, [])
+        for i, result in zip(crop_indices, results):
+            detected_class = items[i][1]
+            
+            if result.probs is None or len(result.probs) == 0:
+                continue
+            
+            probs = result.probs
+            relevant_classes = CLASS_MAPPING.get(detected_class.lower(), [])
             
             # หา best match จาก relevant classes
             best_conf = 0
@@ -859,15 +1112,15 @@ def classify_object(frame, bbox, detected_class):
             if best_class is not None:
                 # 🔍 Debug log
                 print(f"✅ Classified {detected_class} → {best_class} (conf: {best_conf:.2f})")
-                return best_class, best_conf, True
+                outputs[i] = (best_class, best_conf, True)
             else:
                 print(f"⚠️ No relevant class found for {detected_class}")
         
-        return detected_class, 0.0, False
+        return outputs
         
     except Exception as e:
-        print(f"❌ Classification error for {detected_class}: {e}")
-        return detected_class, 0.0, False
+        print(f"❌ Classification error: {e}")
+        return outputs
 
 def detect_ppe_in_person(frame, person_bbox):
     """
@@ -939,27 +1192,14 @@ def detect_ppe_in_person(frame, person_bbox):
 def draw_detections_3stage(frame, person_results, camera_id=0):
     """
     3-Stage Detection: Person → PPE Detection → Classification
+    วาด annotation ด้วย draw_detections() เฉพาะเมื่อ SERVER_SIDE_ANNOTATION (ไม่งั้น annotated_frame = None)
     """
-    annotated_frame = frame.copy()
     detections = []
     has_ng = False
     alert_timestamp = None
     
-    # วาด ROI zones (เหมือนเดิม)
-    if DRAW_ROI and camera_id in ROI_ZONES:
-        roi = ROI_ZONES[camera_id]
-        pts = np.array(roi, np.int32).reshape((-1, 1, 2))
-        cv2.polylines(annotated_frame, [pts], True, (0, 0, 255), 3)
-        cv2.putText(annotated_frame, "DETECTION ZONE", (roi[0][0], roi[0][1] - 10),
-                    cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
-    
-    if DRAW_EXCLUSION_ZONE and camera_id in NOT_DETECTED_ROI_ZONES:
-        exclusion_roi = NOT_DETECTED_ROI_ZONES[camera_id]
-        pts = np.array(exclusion_roi, np.int32).reshape((-1, 1, 2))
-        cv2.polylines(annotated_frame, [pts], True, (0, 255, 255), 3)
-        cv2.putText(annotated_frame, "NON-DETECTION ZONE",
-                    (exclusion_roi[0][0], exclusion_roi[0][1] - 10),
-                    cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 255), 2)
+    # PPE ของทุกคนในเฟรม - classify รวมกันครั้งเดียว
+    ppe_items = []
     
     # ⭐ STAGE 1: Process each detected person
     for person_result in person_results:
@@ -992,69 +1232,153 @@ def draw_detections_3stage(frame, person_results, camera_id=0):
             #            cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 0), 2)
             
             # ⭐ STAGE 2: Detect PPE within person bbox
-            ppe_detections = detect_ppe_in_person(frame, person_bbox)
-            
-            # ⭐ STAGE 3: Classify each PPE detection
-            for ppe in ppe_detections:
-                bbox = ppe['bbox']
-                x1, y1, x2, y2 = bbox
-                class_name = ppe['class']
-                det_conf = ppe['conf']
-                
-                # Classify
-                classified_name, class_conf, is_classified = classify_object(
-                    frame, bbox, class_name
-                )
-                
-                # Skip if classification failed
-                if not is_classified or class_conf < CLASSIFICATION_THRESHOLD:
-                    continue
-                
-                display_name = classified_name.split('_', 1)[1] if '_' in classified_name else classified_name
-                
-                # Check if NG or non-safety
-                is_ng = classified_name.strip().upper() == "NG"
-                is_non_safety = 'non-safety' in classified_name.lower()
-                
-                if is_ng or is_non_safety:
-                    has_ng = True
-                    ng_count_total[camera_id] += 1
-                    alert_timestamp = time.time()
-                    color = (0, 0, 255)  # Red
-                elif 'safety' in classified_name.lower():
-                    color = (0, 255, 0)  # Green
-                else:
-                    color = (255, 165, 0)  # Orange
-                
-                detections.append({
-                    "class": class_name,
-                    "classified_as": classified_name,
-                    "detection_conf": round(det_conf, 2),
-                    "classification_conf": round(class_conf, 2),
-                    "bbox": bbox,
-                    "person_bbox": [px1, py1, px2, py2]
-                })
-                
-                # Draw PPE bbox
-                thickness = 4 if (is_ng or is_non_safety) else 2
-                cv2.rectangle(annotated_frame, (x1, y1), (x2, y2), color, thickness)
-                
-                # Draw label
-                (label_w, label_h), _ = cv2.getTextSize(display_name, 
-                                                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)
-                cv2.rectangle(annotated_frame,
-                            (x1, y1 - label_h - 10),
-                            (x1 + label_w + 10, y1),
-                            color, -1)
-                cv2.putText(annotated_frame, display_name, (x1 + 5, y1 - 5),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-                
-                cv2.circle(annotated_frame, ((x1+x2)//2, (y1+y2)//2), 5, color, -1)
+            for ppe in detect_ppe_in_person(frame, person_bbox):
+                ppe_items.append(([px1, py1, px2, py2], ppe))
+    
+    # ⭐ STAGE 3: Classify every PPE detection of the frame in one batch
+    classifications = classify_objects(
+        frame, [(ppe['bbox'], ppe['class']) for _, ppe in ppe_items]
+    )
+    
+    for (person_box_xyxy, ppe), (classified_name, class_conf, is_classified) in zip(ppe_items, classifications):
+        px1, py1, px2, py2 = person_box_xyxy
+        bbox = ppe['bbox']
+        class_name = ppe['class']
+        det_conf = ppe['conf']
+        
+        # Skip if classification failed
+        if not is_classified or class_conf < CLASSIFICATION_THRESHOLD:
+            continue
+        
+        # Check if NG or non-safety
+        is_ng = classified_name.strip().upper() == "NG"
+        is_non_safety = 'non-safety' in classified_name.lower()
+        
+        if is_ng or is_non_safety:
+            has_ng = True
+            ng_count_total[camera_id] += 1
+            alert_timestamp = time.time()
+        
+        detections.append({
+            "class": class_name,
+            "classified_as": classified_name,
+            "detection_conf": round(det_conf, 2),
+            "classification_conf": round(class_conf, 2),
+            "bbox": bbox,
+            "person_bbox": [px1, py1, px2, py2]
+        })
+    
+    annotated_frame = draw_detections(frame, detections, camera_id) if SERVER_SIDE_ANNOTATION else None
     
     return annotated_frame, detections, has_ng, alert_timestamp
 
-# ---- CAMERA READER WITH DETECTION ----
-def camera_reader_with_detection(index: int, url: str):
+# ---- STATIC OVERLAY ----
+def roi_overlay_layers(camera_id: int):
+    """ROI_ZONES / NOT_DETECTED_ROI_ZONES ที่ต้องวาด (zone หลังทับ zone แรก)"""
+    layers = []
+    if DRAW_ROI and camera_id in ROI_ZONES:
+        layers.append((ROI_ZONES[camera_id], "DETECTION ZONE", (0, 0, 255)))
+    if DRAW_EXCLUSION_ZONE and camera_id in NOT_DETECTED_ROI_ZONES:
+        layers.append((NOT_DETECTED_ROI_ZONES[camera_id], "NON-DETECTION ZONE", (0, 255, 255)))
+    return layers
+
+static_overlay = StaticOverlayCache(roi_overlay_layers)
+
+def draw_detections(frame, detections, camera_id=0):
+    """
+    วาด ROI zones + PPE ที่ classify แล้วลงบนสำเนาของเฟรม
+    ใช้กับ detected stream (SERVER_SIDE_ANNOTATION) และรูป NG ที่บันทึก;
+    โหมด client-side ให้ dashboard วาดเองจาก /api/camera/{id}/overlay
+    """
+    annotated_frame = frame.copy()
+    
+    # ROI + exclusion zone: render ไว้ครั้งเดียวต่อกล้อง แล้วแปะด้วย masked copy
+    static_overlay.apply(annotated_frame, camera_id)
+    
+    for det in detections:
+        x1, y1, x2, y2 = det['bbox']
+        classified_name = det['classified_as']
+        display_name = classified_name.split('_', 1)[1] if '_' in classified_name else classified_name
+        
+        is_ng = classified_name.strip().upper() == "NG"
+        is_non_safety = 'non-safety' in classified_name.lower()
+        
+        if is_ng or is_non_safety:
+            color = (0, 0, 255)  # Red
+        elif 'safety' in classified_name.lower():
+            color = (0, 255, 0)  # Green
+        else:
+            color = (255, 165, 0)  # Orange
+        
+        # Draw PPE bbox
+        thickness = 4 if (is_ng or is_non_safety) else 2
+        cv2.rectangle(annotated_frame, (x1, y1), (x2, y2), color, thickness)
+        
+        # Draw label
+        (label_w, label_h), _ = cv2.getTextSize(display_name, 
+                                                cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)
+        cv2.rectangle(annotated_frame,
+                    (x1, y1 - label_h - 10),
+                    (x1 + label_w + 10, y1),
+                    color, -1)
+        cv2.putText(annotated_frame, display_name, (x1 + 5, y1 - 5),
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+        
+        cv2.circle(annotated_frame, ((x1+x2)//2, (y1+y2)//2), 5, color, -1)
+    
+    return annotated_frame
+
+# ---- JPEG ENCODER ----
+jpeg_encoder = JpegEncoder(JPEG_ENCODER, fast_dct=JPEG_FAST_DCT, subsampling=JPEG_SUBSAMPLING)
+print(f"🖼️  JPEG encoder: {jpeg_encoder.backend}")
+
+# ---- STREAM FAN-OUT ----
+def read_stream_frame(camera_id: int, detected: bool):
+    """(seq, เฟรม) ที่ stream นี้จะส่ง - detected stream เปลี่ยนเฉพาะตอน detection เสร็จ"""
+    with frame_locks[camera_id]:
+        if detected:
+            return detected_seq[camera_id], detected_frames[camera_id]
+        return frame_seq[camera_id], latest_frames[camera_id]
+
+def render_stream_jpeg(frame, single: bool):
+    """Resize ตามขนาด stream แล้ว encode เป็น JPEG"""
+    target_w = SINGLE_W if single else DUAL_W
+    target_h = SINGLE_H if single else DUAL_H
+    return jpeg_encoder.encode(cv2.resize(frame, (target_w, target_h)), 85)
+
+stream_hub = StreamHub(read_stream_frame, render_stream_jpeg, keepalive=STREAM_KEEPALIVE)
+
+# ---- PUSH EVENTS ----
+event_hub = EventHub(cameras=range(len(CAM_URLS)), queue_size=EVENT_QUEUE_SIZE)
+
+def publish_camera_state(index: int):
+    """ส่ง detections/สถานะของกล้องให้ client - ส่งเฉพาะ field ที่เปลี่ยน"""
+    with frame_locks[index]:
+        status = "active" if latest_frames[index] is not None else "inactive"
+        detections = detection_results[index].copy()
+    
+    last_alert = alert_timestamps.get(index, 0)
+    has_alert = (time.time() - last_alert) < ALERT_ACTIVE_SECONDS
+    
+    event_hub.update_detections(index, detections)
+    event_hub.update_camera(
+        index,
+        status=status,
+        detections=len(detections),
+        ng_count=sum(1 for d in detections if d['class'].strip().upper() == 'NG'),
+        ng_detected=ng_count_total[index],
+        ng_saved=ng_saved_count[index],
+        has_alert=has_alert,
+        last_alert_time=last_alert if last_alert > 0 else None
+    )
+    
+    if has_alert:
+        # ถ้าไม่มี detection ต่อ client จะค้าง has_alert=True - ส่ง state ใหม่ตอน alert หมดเวลา
+        event_hub.schedule_refresh(index, last_alert + ALERT_ACTIVE_SECONDS - time.time(), publish_camera_state)
+
+# ---- CAMERA CAPTURE (แยก thread จาก detection) ----
+def camera_capture_thread(index: int, url: str):
+    """อ่าน stream ตลอดเวลา เก็บเฉพาะเฟรมล่าสุด - ไม่รอ detection"""
     cap = cv2.VideoCapture(url)
     
     cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
@@ -1066,7 +1390,6 @@ def camera_reader_with_detection(index: int, url: str):
     
     print(f"[Camera {index}] Started streaming from {url}")
     frame_count = 0
-    detection_offset = index * CAMERA_OFFSET
     consecutive_errors = 0
     max_consecutive_errors = 10
     
@@ -1101,57 +1424,24 @@ def camera_reader_with_detection(index: int, url: str):
                 last_log_time = current_time
                 frames_processed = 0
             
-            with frame_locks[index]:
+            # เก็บเฟรมล่าสุด แล้วปลุก detection worker
+            with frame_conditions[index]:
                 latest_frames[index] = frame.copy()
+                frame_seq[index] += 1
+                
+                first_frame = detected_frames[index] is None
+                if first_frame:
+                    detected_frames[index] = frame.copy()
+                    detected_seq[index] = frame_seq[index]
+                
+                frame_conditions[index].notify_all()
             
-            if (frame_count + detection_offset) % DETECTION_INTERVAL == 0:
-                if person_model is not None and model is not None:
-                    try:
-                        detection_start = time.time()
-                        
-                        person_results = person_model(
-                            frame,
-                            device=DEVICE,
-                            verbose=False,
-                            half=USE_HALF_PRECISION,
-                            imgsz=640
-                        )
-                        
-                        detection_time = time.time() - detection_start
-                        if detection_time > 1.0:
-                            print(f"⚠️ [Camera {index}] Slow detection: {detection_time:.2f}s")
-                        
-                        annotated_frame, detections, has_ng, alert_timestamp = draw_detections_3stage(
-                            frame, person_results, camera_id=index
-                        )
-                        
-                        with frame_locks[index]:
-                            detected_frames[index] = annotated_frame
-                            detection_results[index] = detections
-                            if alert_timestamp:
-                                alert_timestamps[index] = alert_timestamp
-                        
-                        with ng_frame_lock:
-                            if has_ng:
-                                consecutive_ng_frames[index] += 1
-                                
-                                if consecutive_ng_frames[index] >= CONSECUTIVE_NG_THRESHOLD:
-                                    save_ng_image_async(frame.copy(), annotated_frame.copy(), index, detections)
-                                    play_alert_sound(index)
-                            else:
-                                consecutive_ng_frames[index] = 0
-                            
-                    except Exception as e:
-                        print(f"[Camera {index}] Detection error: {e}")
-                        with frame_locks[index]:
-                            detected_frames[index] = frame.copy()
-            else:
-                with frame_locks[index]:
-                    if detected_frames[index] is None:
-                        detected_frames[index] = frame.copy()
+            stream_hub.notify(index)
+            if first_frame:
+                stream_hub.notify(index, detected=True)
+                publish_camera_state(index)
             
             frame_count += 1
-            time.sleep(0.01)
             
         except Exception as e:
             print(f"❌ [Camera {index}] Unexpected error: {e}")
@@ -1159,7 +1449,78 @@ def camera_reader_with_detection(index: int, url: str):
             time.sleep(0.1)
     
     cap.release()
-    print(f"[Camera {index}] Stopped (processed {frame_count} frames)")
+    print(f"[Camera {index}] Stopped (captured {frame_count} frames)")
+
+# ---- DETECTION WORKER ----
+def camera_detection_worker(index: int):
+    """เมื่อว่างจะหยิบเฟรมล่าสุดมา detect (ไม่เกิน 1 ครั้งต่อ DETECTION_INTERVAL เฟรม)"""
+    detection_offset = index * CAMERA_OFFSET
+    last_seq = detection_offset - DETECTION_INTERVAL
+    
+    while not stop_event.is_set():
+        with frame_conditions[index]:
+            ready = frame_conditions[index].wait_for(
+                lambda: stop_event.is_set() or frame_seq[index] - last_seq >= DETECTION_INTERVAL,
+                timeout=1.0
+            )
+            if not ready or stop_event.is_set():
+                continue
+            
+            # capture thread แทนที่ array ใหม่ทุกครั้ง ไม่เขียนทับ - ใช้ได้เลยไม่ต้อง copy
+            frame = latest_frames[index]
+            last_seq = frame_seq[index]
+        
+        if frame is None or person_model is None or model is None:
+            continue
+        
+        try:
+            detection_start = time.time()
+            
+            person_results = person_model(
+                frame,
+                device=DEVICE,
+                verbose=False,
+                half=USE_HALF_PRECISION,
+                imgsz=640
+            )
+            
+            detection_time = time.time() - detection_start
+            if detection_time > 1.0:
+                print(f"⚠️ [Camera {index}] Slow detection: {detection_time:.2f}s")
+            
+            annotated_frame, detections, has_ng, alert_timestamp = draw_detections_3stage(
+                frame, person_results, camera_id=index
+            )
+            
+            with frame_locks[index]:
+                # client-side annotation: detected stream ส่งภาพดิบ (array เดิมของ capture ไม่ต้อง copy)
+                detected_frames[index] = annotated_frame if annotated_frame is not None else frame
+                detected_seq[index] = last_seq
+                detection_results[index] = detections
+                if alert_timestamp:
+                    alert_timestamps[index] = alert_timestamp
+            
+            stream_hub.notify(index, detected=True)
+            publish_camera_state(index)
+            
+            with ng_frame_lock:
+                if has_ng:
+                    consecutive_ng_frames[index] += 1
+                    
+                    if consecutive_ng_frames[index] >= CONSECUTIVE_NG_THRESHOLD:
+                        save_ng_image_async(frame, annotated_frame, index, detections)
+                        play_alert_sound(index)
+                else:
+                    consecutive_ng_frames[index] = 0
+                
+        except Exception as e:
+            print(f"[Camera {index}] Detection error: {e}")
+            with frame_locks[index]:
+                detected_frames[index] = frame.copy()
+                detected_seq[index] = last_seq
+            stream_hub.notify(index, detected=True)
+    
+    print(f"[Camera {index}] Detection worker stopped")
     
 # ---- Initialize pygame mixer ----
 if ENABLE_SOUND_ALERT:
@@ -1212,25 +1573,47 @@ async def startup_event():
     print(f"Save Annotated: {SAVE_ANNOTATED}")
     print(f"{'='*60}\n")
     
+    # เปิด outbox ก่อน worker - tickets จาก NG event แรกต้องลงไฟล์ได้
+    ng_outbox.open()
+    print(f"NG Outbox: {os.path.abspath(NG_OUTBOX_PATH)}")
+    
     ng_worker = threading.Thread(target=save_ng_image_worker, daemon=True)
     ng_worker.start()
     print("Started NG save worker thread")
     
+    ng_outbox.start()
+    print(f"Started NG outbox flusher ({ng_outbox.pending_count()} tickets pending)")
+    
+    dashboard_aggregates.start()
+    
     for i, url in enumerate(CAM_URLS):
-        t = threading.Thread(target=camera_reader_with_detection, args=(i, url), daemon=True)
+        t = threading.Thread(target=camera_capture_thread, args=(i, url), daemon=True)
         t.start()
-    print(f"Started {len(CAM_URLS)} camera threads with object detection\n")
+        w = threading.Thread(target=camera_detection_worker, args=(i,), daemon=True)
+        w.start()
+    print(f"Started {len(CAM_URLS)} capture threads + {len(CAM_URLS)} detection workers\n")
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Stop all camera threads"""
     stop_event.set()
     
+    for i in range(len(CAM_URLS)):
+        with frame_conditions[i]:
+            frame_conditions[i].notify_all()
+    
+    event_hub.stop()
+    
     ng_save_queue.put(None)
     
     ng_save_queue.join()
     
+    # flush outbox รอบสุดท้ายก่อนปิด pool
+    ng_outbox.stop()
+    dashboard_aggregates.stop()
+    
     executor.shutdown(wait=True, cancel_futures=True)
+    db_pool.close_all()
     
     print(f"\n{'='*60}")
     print("📊 NG Detection Statistics")
@@ -1279,9 +1662,11 @@ async def root():
             "GET /api/camera/{camera_id}/stream - Video stream (original)",
             "GET /api/camera/{camera_id}/stream/detected - Video stream with detections",
             "GET /api/camera/{camera_id}/detections - Current detections",
+            "GET /api/camera/{camera_id}/overlay - Detections + ROI for client-side annotation",
             "GET /api/camera/{camera_id}/snapshot - Get single frame",
             "GET /api/statistics - Get NG detection statistics",
-            "GET /api/ng-images - List saved NG images"
+            "GET /api/ng-images - List saved NG images",
+            "WS /api/ws/events - Push detections and alerts on change"
         ]
     }
 
@@ -1344,6 +1729,35 @@ async def get_detections(camera_id: int):
         "detections": detections
     }
 
+@app.get("/api/camera/{camera_id}/overlay")
+async def get_overlay(camera_id: int):
+    """Detection boxes + ROI polygons + ขนาดเฟรม สำหรับให้ dashboard วาด annotation เอง"""
+    if camera_id < 0 or camera_id >= len(CAM_URLS):
+        return {"error": "Invalid camera ID"}
+    
+    with frame_locks[camera_id]:
+        frame = latest_frames[camera_id]
+        height, width = frame.shape[:2] if frame is not None else (0, 0)
+        seq = detected_seq[camera_id]
+        detections = detection_results[camera_id].copy()
+    
+    roi_zones = []
+    if DRAW_ROI and camera_id in ROI_ZONES:
+        roi_zones.append({"name": "DETECTION ZONE", "kind": "detection",
+                          "points": [list(p) for p in ROI_ZONES[camera_id]]})
+    if DRAW_EXCLUSION_ZONE and camera_id in NOT_DETECTED_ROI_ZONES:
+        roi_zones.append({"name": "NON-DETECTION ZONE", "kind": "exclusion",
+                          "points": [list(p) for p in NOT_DETECTED_ROI_ZONES[camera_id]]})
+    
+    return {
+        "camera_id": camera_id,
+        "seq": seq,
+        "server_side_annotation": SERVER_SIDE_ANNOTATION,
+        "frame_size": [width, height],
+        "roi_zones": roi_zones,
+        "detections": detections
+    }
+
 @app.get("/api/statistics")
 async def get_statistics():
     """Get NG detection statistics"""
@@ -1410,30 +1824,8 @@ async def video_stream(camera_id: int, single: bool = False):
     if camera_id < 0 or camera_id >= len(CAM_URLS):
         return {"error": "Invalid camera ID"}
     
-    target_w = SINGLE_W if single else DUAL_W
-    target_h = SINGLE_H if single else DUAL_H
-    
-    def generate():
-        while True:
-            with frame_locks[camera_id]:
-                frame = latest_frames[camera_id]
-            
-            if frame is None:
-                time.sleep(0.1)
-                continue
-            
-            resized = cv2.resize(frame, (target_w, target_h))
-            
-            _, buffer = cv2.imencode('.jpg', resized, [cv2.IMWRITE_JPEG_QUALITY, 85])
-            frame_bytes = buffer.tobytes()
-            
-            yield (b'--frame\r\n'
-                   b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
-            
-            time.sleep(0.033)
-    
     return StreamingResponse(
-        generate(), 
+        stream_hub.mjpeg(camera_id, detected=False, single=single),
         media_type="multipart/x-mixed-replace; boundary=frame"
     )
 
@@ -1443,30 +1835,8 @@ async def video_stream_detected(camera_id: int, single: bool = False):
     if camera_id < 0 or camera_id >= len(CAM_URLS):
         return {"error": "Invalid camera ID"}
     
-    target_w = SINGLE_W if single else DUAL_W
-    target_h = SINGLE_H if single else DUAL_H
-    
-    def generate():
-        while True:
-            with frame_locks[camera_id]:
-                frame = detected_frames[camera_id]
-            
-            if frame is None:
-                time.sleep(0.1)
-                continue
-            
-            resized = cv2.resize(frame, (target_w, target_h))
-            
-            _, buffer = cv2.imencode('.jpg', resized, [cv2.IMWRITE_JPEG_QUALITY, 85])
-            frame_bytes = buffer.tobytes()
-            
-            yield (b'--frame\r\n'
-                   b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
-            
-            time.sleep(0.033)
-    
     return StreamingResponse(
-        generate(), 
+        stream_hub.mjpeg(camera_id, detected=True, single=single),
         media_type="multipart/x-mixed-replace; boundary=frame"
     )
 
@@ -1486,10 +1856,14 @@ async def get_snapshot(camera_id: int, detected: bool = False, single: bool = Fa
     target_h = SINGLE_H if single else DUAL_H
     
     resized = cv2.resize(frame, (target_w, target_h))
-    _, buffer = cv2.imencode('.jpg', resized, [cv2.IMWRITE_JPEG_QUALITY, 90])
+    
+    try:
+        jpeg = jpeg_encoder.encode(resized, 90)
+    except Exception as e:
+        return {"error": f"JPEG encode failed: {e}"}
     
     return StreamingResponse(
-        iter([buffer.tobytes()]), 
+        iter([jpeg]), 
         media_type="image/jpeg"
     )
 
@@ -1502,8 +1876,8 @@ async def check_alert(camera_id: int):
     current_time = time.time()
     last_alert = alert_timestamps.get(camera_id, 0)
     
-    # ถือว่า alert ยังใหม่ถ้าผ่านมาไม่เกิน 3 วินาที
-    is_active = (current_time - last_alert) < 3
+    # ถือว่า alert ยังใหม่ถ้าผ่านมาไม่เกิน ALERT_ACTIVE_SECONDS วินาที
+    is_active = (current_time - last_alert) < ALERT_ACTIVE_SECONDS
     
     return {
         "camera_id": camera_id,
@@ -1511,6 +1885,59 @@ async def check_alert(camera_id: int):
         "last_alert_time": last_alert if last_alert > 0 else None
     }
 
+@app.websocket("/api/ws/events")
+async def events_websocket(websocket: WebSocket):
+    """
+    Push channel แทนการ poll /api/cameras, /api/camera/{id}/detections และ /alert
+    ส่ง "snapshot" ตอนต่อเข้ามา จากนั้นส่ง "camera" (เฉพาะ field ที่เปลี่ยน) และ "detections" เมื่อมีการเปลี่ยนแปลง
+    """
+    await websocket.accept()
+    
+    async with event_hub.subscription() as q:
+        # client ไม่ได้ส่งอะไรมา แต่ต้องอ่าน socket ถึงจะรู้ว่า client ปิดไปแล้ว
+        receiver = asyncio.create_task(receive_until_disconnect(websocket))
+        
+        try:
+            await websocket.send_json(jsonable_encoder(event_hub.snapshot()))
+            
+            while True:
+                getter = asyncio.ensure_future(q.get())
+                done, _ = await asyncio.wait(
+                    {getter, receiver}, timeout=EVENT_KEEPALIVE or None,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                
+                if receiver in done:
+                    getter.cancel()
+                    break
+                
+                if getter not in done:
+                    # ไม่มีอะไรเปลี่ยน: ส่ง ping - connection ที่ตายไปโดยไม่ได้ปิดจะ error ตรงนี้
+                    getter.cancel()
+                    await websocket.send_json({"type": "ping"})
+                    continue
+                
+                message = getter.result()
+                if message["type"] == "resync":
+                    message = event_hub.snapshot()
+                await websocket.send_json(jsonable_encoder(message))
+        except WebSocketDisconnect:
+            pass
+        except Exception as e:
+            print(f"⚠️ Event socket closed: {e}")
+        finally:
+            receiver.cancel()
+
+async def receive_until_disconnect(websocket: WebSocket):
+    """อ่านแล้วทิ้งข้อความจาก client - return เมื่อ client disconnect"""
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+    except Exception:
+        return
+
 # ---- EMAIL TEST ENDPOINTS ----
 @app.get("/api/test/email")
 async def test_email_simple():
@@ -1612,17 +2039,27 @@ async def test_database_connection():
                 "message": "Database connection successful",
                 "server": DB_SERVER,
                 "database": DB_DATABASE,
-                "version": version[:100]  # First 100 chars
+                "version": version[:100],  # First 100 chars
+                "pool": db_pool.get_statistics(),
+                "outbox": ng_outbox.get_statistics(),
+                "dashboard": dashboard_aggregates.get_statistics()
             }
         except Exception as e:
+            conn.close()
             return {
                 "success": False,
-                "error": str(e)
+                "error": str(e),
+                "pool": db_pool.get_statistics(),
+                "outbox": ng_outbox.get_statistics(),
+                "dashboard": dashboard_aggregates.get_statistics()
             }
     else:
         return {
             "success": False,
-            "error": "Cannot connect to database"
+            "error": "Cannot connect to database",
+            "pool": db_pool.get_statistics(),
+            "outbox": ng_outbox.get_statistics(),
+            "dashboard": dashboard_aggregates.get_statistics()
         }
 
 @app.get("/api/rules")
@@ -1837,44 +2274,26 @@ async def initialize_all():
     
     return results
 
+# ---- DASHBOARD ----
+async def dashboard_ready():
+    """โหลด dashboard_aggregates ครั้งแรก (query Database) ใน thread pool - ไม่ block event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, dashboard_aggregates.ensure_ready)
+
 @app.get("/api/dashboard/stats")
 async def get_dashboard_stats():
-    """ดึงสถิติหลักของ Dashboard: วันนี้, เมื่อวาน, และ Total NG"""
+    """ดึงสถิติหลักของ Dashboard: วันนี้, เมื่อวาน, และ Total NG (จาก dashboard_aggregates)"""
     try:
-        conn = get_db_connection()
-        if not conn:
+        if not await dashboard_ready():
             return {"success": False, "error": "Cannot connect to database"}
         
-        cursor = conn.cursor()
-        
-        # Today's detections
-        cursor.execute("""
-            SELECT COUNT(*) 
-            FROM ppe_NGTicket 
-            WHERE CAST(CreatedDate AS DATE) = CAST(GETDATE() AS DATE)
-        """)
-        today_count = cursor.fetchone()[0]
-        
-        # Yesterday's detections
-        cursor.execute("""
-            SELECT COUNT(*) 
-            FROM ppe_NGTicket 
-            WHERE CAST(CreatedDate AS DATE) = CAST(DATEADD(day, -1, GETDATE()) AS DATE)
-        """)
-        yesterday_count = cursor.fetchone()[0]
-        
-        # Total NG
-        cursor.execute("SELECT COUNT(*) FROM ppe_NGTicket")
-        total_ng = cursor.fetchone()[0]
-        
-        cursor.close()
-        conn.close()
+        today = get_thailand_time().date()
         
         return {
             "success": True,
-            "todayDetections": today_count,
-            "yesterdayDetections": yesterday_count,
-            "totalNG": total_ng
+            "todayDetections": dashboard_aggregates.count(today),
+            "yesterdayDetections": dashboard_aggregates.count(today - timedelta(days=1)),
+            "totalNG": dashboard_aggregates.get_total()
         }
         
     except Exception as e:
@@ -1887,35 +2306,15 @@ async def get_dashboard_stats():
 async def get_ppe_status():
     """ดึงสถิติ PPE วันนี้ แยกเป็น OK และ NG"""
     try:
-        conn = get_db_connection()
-        if not conn:
+        if not await dashboard_ready():
             return {"success": False, "error": "Cannot connect to database"}
         
-        cursor = conn.cursor()
-        
         # NG count วันนี้
-        cursor.execute("""
-            SELECT COUNT(*) 
-            FROM ppe_NGTicket 
-            WHERE CAST(CreatedDate AS DATE) = CAST(GETDATE() AS DATE)
-        """)
-        ng_count = cursor.fetchone()[0]
-        
-        # สมมติว่า OK คือจำนวนที่ไม่ใช่ NG (อาจต้องปรับตาม logic จริง)
-        # ถ้ามี table สำหรับ OK ให้ query จาก table นั้น
-        # ตัวอย่างนี้จะคำนวณแบบสมมติ: ถ้ามี NG 15 ก็ให้ OK เป็น 85 (รวม 100%)
-        total_detections = max(ng_count * 6, 100)  # สมมติว่ามี detection ทั้งหมด
-        ok_count = total_detections - ng_count
-        
-        cursor.close()
-        conn.close()
+        ng_count = dashboard_aggregates.count(get_thailand_time().date())
         
         return {
             "success": True,
-            "data": [
-                {"name": "OK", "value": ok_count, "color": "#10B981"},
-                {"name": "NG", "value": ng_count, "color": "#DC2626"}
-            ]
+            "data": build_ppe_status(ng_count)
         }
         
     except Exception as e:
@@ -1928,56 +2327,15 @@ async def get_ppe_status():
 async def get_rule_violations():
     """ดึงจำนวนการละเมิดแยกตามประเภท PPE ที่ detect เจอ"""
     try:
-        conn = get_db_connection()
-        if not conn:
+        if not await dashboard_ready():
             return {"success": False, "error": "Cannot connect to database"}
         
-        cursor = conn.cursor()
-        
-        # Query นับจำนวนการ detect แต่ละประเภทจาก RuleID
-        cursor.execute("""
-            SELECT 
-                RuleID,
-                COUNT(*) as DetectionCount
-            FROM ppe_NGTicket
-            WHERE CAST(CreatedDate AS DATE) = CAST(GETDATE() AS DATE)
-                AND RuleID IN (2, 3, 4, 5)
-            GROUP BY RuleID
-            ORDER BY RuleID
-        """)
-        
-        results = cursor.fetchall()
-        
-        # Mapping RuleID กับชื่อที่จะแสดง
-        rule_names = {
-            2: "Glove",           # non-safety-glove
-            3: "Shoe",            # non-safety-shoe
-            4: "Glasses",         # non-safety-glasses
-            5: "Shirt"            # non-safety-shirt
-        }
-        
-        # สร้าง dict เก็บผลลัพธ์ (default = 0)
-        violations_dict = {rule_id: 0 for rule_id in [2, 3, 4, 5]}
-        
-        # อัพเดทค่าที่ query ได้
-        for row in results:
-            rule_id = row[0]
-            count = row[1]
-            violations_dict[rule_id] = count
-        
-        # สร้าง response data
-        custom_order = [2, 4, 5, 3]  # Glove, Glasses, Shirt, Shoe
-        violations = [
-            {"rule": rule_names[rule_id], "count": violations_dict[rule_id]}
-            for rule_id in custom_order
-        ]
-        
-        cursor.close()
-        conn.close()
+        # นับจำนวนการ detect แต่ละประเภทจาก RuleID (วันนี้)
+        counts = dashboard_aggregates.count_by_rule(get_thailand_time().date())
         
         return {
             "success": True,
-            "data": violations
+            "data": build_rule_violations(counts)
         }
         
     except Exception as e:
@@ -1990,71 +2348,15 @@ async def get_rule_violations():
 async def get_monthly_summary():
     """ดึงสรุป NG รายเดือนแยกตามประเภท PPE ของปีปัจจุบัน"""
     try:
-        conn = get_db_connection()
-        if not conn:
+        if not await dashboard_ready():
             return {"success": False, "error": "Cannot connect to database"}
         
-        cursor = conn.cursor()
-        
-        # Query NG count แต่ละเดือนแยกตามประเภท
-        cursor.execute("""
-            SELECT 
-                MONTH(t.CreatedDate) as Month,
-                r.RuleName,
-                COUNT(*) as NGCount
-            FROM ppe_NGTicket t
-            JOIN ppe_RuleMaster r ON t.RuleID = r.RuleID
-            WHERE YEAR(t.CreatedDate) = YEAR(GETDATE())
-            GROUP BY MONTH(t.CreatedDate), r.RuleName
-            ORDER BY MONTH(t.CreatedDate)
-        """)
-        
-        results = cursor.fetchall()
-        
-        # สร้าง dictionary สำหรับแต่ละเดือน
-        months = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", 
-                  "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
-        
-        # เตรียมข้อมูลเริ่มต้น
-        monthly_data = {}
-        for i in range(12):
-            monthly_data[i+1] = {
-                "gloves": 0,
-                "glasses": 0,
-                "shirt": 0
-            }
-        
-        # นำข้อมูลจาก database มาใส่
-        for row in results:
-            month_num = row[0]
-            rule_name = row[1]
-            count = row[2]
-            
-            # แปลง RuleName เป็น key ตามชื่อจริงใน database
-            if rule_name == "Safety Glove Required":
-                monthly_data[month_num]["gloves"] = count
-            elif rule_name == "Safety Glasses Required":
-                monthly_data[month_num]["glasses"] = count
-            elif rule_name == "Safety Shirt Required":
-                monthly_data[month_num]["shirt"] = count
-        
-        # สร้าง array สำหรับส่งกลับ
-        summary = [
-            {
-                "month": months[i],
-                "gloves": monthly_data[i+1]["gloves"],
-                "glasses": monthly_data[i+1]["glasses"],
-                "shirt": monthly_data[i+1]["shirt"]
-            }
-            for i in range(12)
-        ]
-        
-        cursor.close()
-        conn.close()
+        # NG count แต่ละเดือนแยกตามประเภท
+        results = dashboard_aggregates.monthly_by_rule_name(get_thailand_time().year)
         
         return {
             "success": True,
-            "data": summary
+            "data": build_monthly_summary(results)
         }
         
     except Exception as e:
@@ -2062,6 +2364,32 @@ async def get_monthly_summary():
             "success": False,
             "error": str(e)
         }
+
+@app.get("/api/dashboard/snapshot")
+async def get_dashboard_snapshot(request: Request):
+    """
+    ข้อมูลทั้งหน้า Dashboard (stats, ppe status, rule violations, monthly summary) ใน request เดียว
+    สร้างจาก dashboard_aggregates (ไม่ query Database) - ส่ง ETag ถ้า If-None-Match ตรงตอบ 304 ไม่มี body
+    """
+    try:
+        if not await dashboard_ready():
+            return {"success": False, "error": "Cannot connect to database"}
+        
+        today = get_thailand_time().date()
+        # อ่าน ETag ก่อนข้อมูล - body ใหม่กว่าหรือเท่ากับ ETag เสมอ
+        etag = dashboard_aggregates.etag(today)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        
+        return JSONResponse({"success": True, **dashboard_aggregates.snapshot(today)}, headers=headers)
+        
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e)
+        }
         
 # ---- STATIC FILES ----
 static_path = Path("./out")
@@ -0,0 +1,212 @@
+"""
+Outbox ของ NG tickets บน SQLite (WAL) ในเครื่อง - tickets ไม่หายเมื่อ SQL Server ล่มหรือ service restart
+การเขียนเข้า SQL Server ทำผ่าน writer ที่ส่งเข้ามา (main.py ใช้ insert_ng_tickets_batch)
+"""
+import os
+import json
+import time
+import sqlite3
+import threading
+from datetime import datetime
+
+class NGOutbox:
+    """
+    Outbox ของ NG tickets บน SQLite (WAL) ในเครื่อง
+    - append() เขียนลงไฟล์ทันที ไม่รอ SQL Server - ticket ไม่หายแม้ DB ล่มหรือ service restart
+    - flusher thread ทยอยส่งเข้า SQL Server ด้วย writer แล้วลบแถวที่ส่งสำเร็จ
+    - ส่งไม่สำเร็จ = รอแบบ exponential backoff แล้วลองใหม่ (แถวยังอยู่ในไฟล์)
+    
+    ถ้า commit ที่ SQL Server สำเร็จแต่ process ตายก่อนลบแถว ticket นั้นจะถูกส่งซ้ำ (at-least-once)
+    """
+    
+    def __init__(self, writer, path='ng_outbox.db', batch_size=100, coalesce_window=0.2,
+                 poll_interval=5, retry_min=1, retry_max=60, shutdown_timeout=10):
+        """
+        Args:
+            writer: function(tickets) -> list ของ TicketID หรือ None ถ้าไม่สำเร็จ (main.py ใช้ insert_ng_tickets_batch)
+        """
+        self.writer = writer
+        self.path = path
+        self.batch_size = batch_size
+        self.coalesce_window = coalesce_window
+        self.poll_interval = poll_interval
+        self.retry_min = retry_min
+        self.retry_max = retry_max
+        self.shutdown_timeout = shutdown_timeout
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        
+        self.conn = None  # เปิดใน open() - สร้างไฟล์ตอน startup ไม่ใช่ตอน import
+        
+        # Statistics
+        self.appended = 0
+        self.flushed = 0
+        self.failed_batches = 0
+        self.last_error_time = None
+    
+    def _db(self):
+        """Connection ของ outbox (เปิดถ้ายังไม่เปิด) - ต้องถือ self._lock"""
+        if self.conn is None:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS ng_outbox (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    created REAL NOT NULL,
+                    payload TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            self.conn = conn
+        return self.conn
+    
+    def open(self):
+        """เปิดไฟล์ outbox (สร้างถ้ายังไม่มี) - เรียกตอน startup ก่อน start()"""
+        with self._lock:
+            self._db()
+    
+    def append(self, tickets):
+        """
+        บันทึก tickets ลง outbox (1 transaction) แล้วปลุก flusher
+        
+        Args:
+            tickets: list of dict {camera_id, location, rule_id, severity, detected_time, evidence}
+        """
+        if not tickets:
+            return
+        
+        now = time.time()
+        rows = []
+        for t in tickets:
+            payload = dict(t, detected_time=t['detected_time'].isoformat())
+            rows.append((now, json.dumps(payload)))
+        
+        with self._lock:
+            conn = self._db()
+            conn.execute("BEGIN")
+            try:
+                conn.executemany("INSERT INTO ng_outbox (created, payload) VALUES (?, ?)", rows)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            self.appended += len(rows)
+        
+        self._wakeup.set()
+    
+    def _fetch(self, limit):
+        """แถวที่ค้างเก่าสุดก่อน - Returns: (ids, tickets)"""
+        with self._lock:
+            rows = self._db().execute(
+                "SELECT id, payload FROM ng_outbox ORDER BY id LIMIT ?", (limit,)
+            ).fetchall()
+        
+        ids = []
+        tickets = []
+        for row_id, payload in rows:
+            t = json.loads(payload)
+            t['detected_time'] = datetime.fromisoformat(t['detected_time'])
+            t['evidence'] = [tuple(e) for e in t['evidence']]
+            ids.append(row_id)
+            tickets.append(t)
+        return ids, tickets
+    
+    def _ack(self, ids):
+        with self._lock:
+            self._db().executemany("DELETE FROM ng_outbox WHERE id = ?", [(i,) for i in ids])
+            self.flushed += len(ids)
+    
+    def _mark_failed(self, ids):
+        with self._lock:
+            self._db().executemany("UPDATE ng_outbox SET attempts = attempts + 1 WHERE id = ?", [(i,) for i in ids])
+            self.failed_batches += 1
+            self.last_error_time = time.time()
+    
+    def flush(self):
+        """
+        ส่งทุกแถวที่ค้างเข้า SQL Server เป็น batch ละ batch_size
+        
+        Returns:
+            bool: True ถ้า outbox ว่างแล้ว, False ถ้า batch ใดส่งไม่สำเร็จ
+        """
+        while True:
+            ids, tickets = self._fetch(self.batch_size)
+            if not ids:
+                return True
+            
+            if self.writer(tickets) is None:
+                self._mark_failed(ids)
+                print(f"⚠️ [Outbox] Cannot write {len(ids)} NG tickets to database, will retry "
+                      f"({self.pending_count()} pending)")
+                return False
+            
+            self._ack(ids)
+    
+    def _flush_loop(self):
+        """Flusher thread: รวม event ที่มาใกล้กันภายใน coalesce_window แล้ว flush"""
+        backoff = self.retry_min
+        
+        while not self._stop.is_set():
+            self._wakeup.wait(timeout=self.poll_interval)
+            if self._stop.is_set():
+                break
+            
+            # รอ NG event จากกล้องอื่นมารวม batch เดียวกัน
+            self._stop.wait(self.coalesce_window)
+            self._wakeup.clear()
+            
+            try:
+                ok = self.flush()
+            except Exception as e:
+                print(f"❌ [Outbox] Flush error: {e}")
+                ok = False
+            
+            if ok:
+                backoff = self.retry_min
+            else:
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, self.retry_max)
+                self._wakeup.set()
+        
+        # flush รอบสุดท้าย - ถ้ายังส่งไม่ได้ แถวจะถูกส่งตอน service เปิดครั้งหน้า
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"❌ [Outbox] Final flush error: {e}")
+    
+    def start(self):
+        """เริ่ม flusher thread (ส่งแถวที่ค้างจากรอบก่อนด้วย)"""
+        self.open()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._flush_loop, daemon=True)
+        self._thread.start()
+        self._wakeup.set()
+    
+    def stop(self):
+        """หยุด flusher หลัง flush รอบสุดท้าย (รอได้ไม่เกิน shutdown_timeout)"""
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.shutdown_timeout)
+    
+    def pending_count(self):
+        with self._lock:
+            return self._db().execute("SELECT COUNT(*) FROM ng_outbox").fetchone()[0]
+    
+    def get_statistics(self):
+        pending = self.pending_count()
+        with self._lock:
+            return {
+                "path": os.path.abspath(self.path),
+                "pending": pending,
+                "appended": self.appended,
+                "flushed": self.flushed,
+                "failed_batches": self.failed_batches,
+                "last_error_time": self.last_error_time
+            }
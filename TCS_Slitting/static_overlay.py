@@ -0,0 +1,67 @@
+"""
+ROI overlay ที่ render ไว้แล้ว - เส้น zone + label ไม่เปลี่ยนระหว่างเฟรม
+วาดลง canvas เปล่าครั้งเดียวต่อกล้อง (และขนาดเฟรม) เก็บเฉพาะกรอบที่มีเส้น แล้วแปะด้วย masked copy ครั้งเดียว
+render ใหม่อัตโนมัติเมื่อ zone หรือขนาดเฟรมเปลี่ยน
+"""
+import threading
+import cv2
+import numpy as np
+
+class StaticOverlayCache:
+    """ROI overlay + mask ที่ render ไว้แล้วต่อกล้อง"""
+
+    def __init__(self, layers):
+        """
+        Args:
+            layers: function(camera_id) -> list ของ (zone points, label, BGR color) ตามลำดับที่วาด
+        """
+        self.layers = layers
+        self.cache = {}  # camera -> (key, layer)
+        self.lock = threading.Lock()
+
+    def _render(self, layers, shape):
+        """
+        วาด layers ลง canvas เปล่า เก็บเฉพาะกรอบที่มีเส้น
+
+        Returns:
+            tuple: ((y0, y1, x0, x1), overlay, mask) หรือ None ถ้าไม่มีอะไรต้องวาด
+        """
+        canvas = np.zeros((shape[0], shape[1], 3), np.uint8)
+        mask = np.zeros(shape[:2], np.uint8)
+
+        for zone, label, color in layers:
+            pts = np.array(zone, np.int32).reshape((-1, 1, 2))
+            text_org = (zone[0][0], zone[0][1] - 10)
+
+            # วาดลำดับเดียวกับของเดิม (zone หลังทับ zone แรก) - mask วาดสีขาวด้วยเส้นเดียวกัน
+            cv2.polylines(canvas, [pts], True, color, 3)
+            cv2.putText(canvas, label, text_org, cv2.FONT_HERSHEY_SIMPLEX, 1, color, 2)
+            cv2.polylines(mask, [pts], True, 255, 3)
+            cv2.putText(mask, label, text_org, cv2.FONT_HERSHEY_SIMPLEX, 1, 255, 2)
+
+        ys, xs = np.nonzero(mask)
+        if len(ys) == 0:
+            return None
+
+        y0, y1, x0, x1 = ys.min(), ys.max() + 1, xs.min(), xs.max() + 1
+        return (y0, y1, x0, x1), canvas[y0:y1, x0:x1].copy(), mask[y0:y1, x0:x1, None].astype(bool)
+
+    def get(self, camera_id, shape):
+        """overlay ของกล้อง - render ใหม่ถ้า zone หรือขนาดเฟรมเปลี่ยน"""
+        layers = [(tuple(map(tuple, zone)), label, tuple(color)) for zone, label, color in self.layers(camera_id)]
+        key = (tuple(shape[:2]), tuple(layers))
+
+        with self.lock:
+            cached = self.cache.get(camera_id)
+            if cached is None or cached[0] != key:
+                cached = (key, self._render(layers, shape))
+                self.cache[camera_id] = cached
+            return cached[1]
+
+    def apply(self, image, camera_id):
+        """แปะ ROI overlay ลงภาพ (in place) - Returns: ภาพเดิม"""
+        layer = self.get(camera_id, image.shape)
+        if layer is not None:
+            (y0, y1, x0, x1), overlay, mask = layer
+            np.copyto(image[y0:y1, x0:x1], overlay, where=mask)
+        return image
@@ -0,0 +1,134 @@
+"""
+MJPEG stream fan-out - encode ครั้งเดียวต่อเฟรม แล้วส่งให้ทุก client ที่ดูกล้องเดียวกัน
+การอ่านเฟรมและการ resize + encode ทำผ่าน function ที่ส่งเข้ามา (main.py ใช้ read_stream_frame / render_stream_jpeg)
+"""
+import asyncio
+import threading
+
+def _offer_latest(q, item):
+    """ใส่ item ลง queue ขนาด 1 - ถ้า client ยังไม่หยิบเฟรมเก่า ให้ทิ้งเฟรมเก่า (latest frame wins)"""
+    if q.full():
+        try:
+            q.get_nowait()
+        except asyncio.QueueEmpty:
+            pass
+    q.put_nowait(item)
+
+class StreamHub:
+    """
+    Async MJPEG clients แยกตาม (camera, detected)
+    - notify() ปลุก client เมื่อมีเฟรมใหม่ (เรียกจาก capture thread / detection worker)
+    - get_jpeg() cache JPEG ต่อ (camera, detected, single) ตาม seq - client แรกที่เจอเฟรมใหม่เท่านั้นที่ encode จริง
+    """
+
+    def __init__(self, read_frame, render, keepalive=5):
+        """
+        Args:
+            read_frame: function(camera_id, detected) -> (seq, frame หรือ None)
+            render: function(frame, single) -> JPEG bytes
+            keepalive: วินาที - ส่งเฟรมเดิมซ้ำถ้าไม่มีเฟรมใหม่นานเกินนี้ (0 = ปิด)
+        """
+        self.read_frame = read_frame
+        self.render = render
+        self.keepalive = keepalive
+
+        self.subscribers = {}  # (camera, detected) -> {(event loop, asyncio.Queue)}
+        self.lock = threading.Lock()
+        self.jpeg_cache = {}  # (camera, detected, single) -> (seq, jpeg bytes)
+        self.jpeg_lock = threading.Lock()
+
+    def notify(self, camera_id, detected=False):
+        """ปลุก async stream clients ของกล้องนี้ (raw: capture thread, detected: detection worker)"""
+        key = (camera_id, detected)
+        with self.lock:
+            subscribers = list(self.subscribers.get(key, ()))
+
+        for loop, q in subscribers:
+            try:
+                loop.call_soon_threadsafe(_offer_latest, q, True)
+            except RuntimeError:
+                # event loop ปิดไปแล้ว
+                with self.lock:
+                    self.subscribers.get(key, set()).discard((loop, q))
+
+    def get_seq(self, camera_id, detected):
+        """seq ของเฟรมที่ stream นี้จะส่ง (detected stream เปลี่ยนเฉพาะตอน detection เสร็จ)"""
+        return self.read_frame(camera_id, detected)[0]
+
+    def get_jpeg(self, camera_id, detected, single):
+        """
+        JPEG ของเฟรมปัจจุบัน - encode ครั้งเดียวต่อเฟรม แล้วใช้ร่วมกันทุก client
+
+        Returns:
+            tuple: (seq, jpeg bytes) หรือ (seq, None) ถ้าไม่มีเฟรมหรือ encode ไม่สำเร็จ
+        """
+        seq, frame = self.read_frame(camera_id, detected)
+        if frame is None:
+            return seq, None
+
+        key = (camera_id, detected, single)
+        with self.jpeg_lock:
+            cached = self.jpeg_cache.get(key)
+            if cached is not None and cached[0] == seq:
+                return cached
+
+            try:
+                jpeg = self.render(frame, single)
+            except Exception as e:
+                print(f"⚠️ [Camera {camera_id+1}] Stream encode error: {e}")
+                return seq, None
+
+            self.jpeg_cache[key] = (seq, jpeg)
+            return seq, jpeg
+
+    async def mjpeg(self, camera_id, detected, single):
+        """
+        Async MJPEG generator - รอ notification เฟรมใหม่ ไม่กิน threadpool ตลอด connection
+        ส่งเฉพาะเมื่อ seq เปลี่ยน (+ keepalive ส่งเฟรมเดิมซ้ำทุก keepalive วินาที)
+        """
+        loop = asyncio.get_running_loop()
+        q = asyncio.Queue(maxsize=1)
+        subscriber = (loop, q)
+        key = (camera_id, detected)
+
+        with self.lock:
+            self.subscribers.setdefault(key, set()).add(subscriber)
+
+        # ส่งเฟรมปัจจุบันทันทีที่ต่อเข้ามา
+        _offer_latest(q, True)
+
+        last_seq = None
+        last_jpeg = None
+
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(q.get(), timeout=self.keepalive or None)
+                except asyncio.TimeoutError:
+                    # keepalive: ส่งเฟรมเดิมซ้ำกัน proxy/browser ตัด connection
+                    if last_jpeg is not None:
+                        yield (b'--frame\r\n'
+                               b'Content-Type: image/jpeg\r\n\r\n' + last_jpeg + b'\r\n')
+                    continue
+
+                # เฟรมเดิม - ไม่ต้อง encode/ส่งซ้ำ
+                if self.get_seq(camera_id, detected) == last_seq:
+                    continue
+
+                # encode ใน threadpool
+                seq, jpeg = await loop.run_in_executor(None, self.get_jpeg, camera_id, detected, single)
+                if jpeg is None or seq == last_seq:
+                    continue
+
+                last_seq = seq
+                last_jpeg = jpeg
+
+                yield (b'--frame\r\n'
+                       b'Content-Type: image/jpeg\r\n\r\n' + jpeg + b'\r\n')
+        finally:
+            with self.lock:
+                self.subscribers[key].discard(subscriber)
+
+    def get_subscriber_count(self):
+        with self.lock:
+            return sum(len(s) for s in self.subscribers.values())
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# main.py imports its helpers as top-level modules (run from TCS_Slitting/)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
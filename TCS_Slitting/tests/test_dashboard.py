@@ -0,0 +1,205 @@
+from datetime import date, datetime
+
+import pytest
+
+from dashboard import DashboardAggregates, etag_matches
+
+TODAY = date(2026, 10, 17)
+
+
+def ticket(day=TODAY, rule_id=2, location="Slitting 1"):
+    return {"rule_id": rule_id, "location": location, "detected_time": datetime.combine(day, datetime.min.time())}
+
+
+class Loader:
+    def __init__(self, counts=None, total=0, rule_names=None):
+        self.counts = counts or {}
+        self.total = total
+        self.rule_names = rule_names or {}
+        self.calls = []
+        self.during = None
+        self.fail = False
+
+    def __call__(self, since):
+        self.calls.append(since)
+        if self.fail:
+            raise ConnectionError("Cannot connect to database")
+        if self.during is not None:
+            self.during()
+        return dict(self.counts), self.total, dict(self.rule_names)
+
+
+@pytest.fixture
+def loader():
+    return Loader(
+        counts={(TODAY, 2, "Slitting 1"): 3, (date(2026, 10, 16), 4, "Slitting 1"): 2, (date(2026, 3, 1), 5, "Slitting 2"): 1},
+        total=10,
+        rule_names={2: "Safety Glove Required", 4: "Safety Glasses Required", 5: "Safety Shirt Required"}
+    )
+
+
+@pytest.fixture
+def aggregates(loader):
+    return DashboardAggregates(loader, lambda: TODAY)
+
+
+def test_reconcile_loads_counts_since_start_of_year(aggregates, loader):
+    assert aggregates.reconcile()
+
+    assert loader.calls == [date(2026, 1, 1)]
+    assert aggregates.count(TODAY) == 3
+    assert aggregates.count(date(2026, 10, 16)) == 2
+    assert aggregates.count(TODAY, rule_ids={4}) == 0
+    assert aggregates.get_total() == 10
+
+
+def test_window_keeps_yesterday_on_new_year():
+    aggregates = DashboardAggregates(Loader(), lambda: date(2027, 1, 1))
+    aggregates.reconcile()
+
+    assert aggregates.since == date(2026, 12, 31)
+
+
+def test_record_is_ignored_until_first_reconcile(aggregates):
+    aggregates.record([ticket()])
+    aggregates.reconcile()
+
+    assert aggregates.count(TODAY) == 3
+
+
+def test_record_adds_to_counts(aggregates):
+    aggregates.reconcile()
+    aggregates.record([ticket(), ticket(rule_id=3)])
+
+    assert aggregates.count_by_rule(TODAY) == {2: 4, 3: 1}
+    assert aggregates.get_total() == 12
+
+
+def test_record_during_reconcile_is_not_lost(aggregates, loader):
+    aggregates.reconcile()
+    # Committed after the reconcile query read the table
+    loader.during = lambda: aggregates.record([ticket(rule_id=3)])
+
+    aggregates.reconcile()
+
+    assert aggregates.count_by_rule(TODAY) == {2: 3, 3: 1}
+    assert aggregates.get_total() == 11
+
+
+def test_record_during_first_reconcile_is_not_lost(aggregates, loader):
+    loader.during = lambda: aggregates.record([ticket()])
+
+    aggregates.reconcile()
+
+    assert aggregates.count(TODAY) == 4
+
+
+def test_failed_reconcile_keeps_previous_counts(aggregates, loader):
+    aggregates.reconcile()
+    loader.fail = True
+
+    assert not aggregates.reconcile()
+    assert aggregates.count(TODAY) == 3
+    assert aggregates.get_statistics()["reconcile_errors"] == 1
+
+    # A record after the failed reconcile is still counted once
+    aggregates.record([ticket()])
+    assert aggregates.count(TODAY) == 4
+
+
+def test_ensure_ready_loads_once(aggregates, loader):
+    assert aggregates.ensure_ready()
+    assert aggregates.ensure_ready()
+
+    assert len(loader.calls) == 1
+
+
+def test_ensure_ready_reports_failure(aggregates, loader):
+    loader.fail = True
+
+    assert not aggregates.ensure_ready()
+
+
+def test_ensure_ready_backs_off_after_failure(aggregates, loader):
+    loader.fail = True
+    assert not aggregates.ensure_ready()
+
+    # Within retry_after requests fail fast without querying the database
+    loader.fail = False
+    assert not aggregates.ensure_ready()
+    assert len(loader.calls) == 1
+
+
+def test_ensure_ready_retries_after_backoff(loader):
+    aggregates = DashboardAggregates(loader, lambda: TODAY, retry_after=0)
+    loader.fail = True
+    assert not aggregates.ensure_ready()
+
+    loader.fail = False
+    assert aggregates.ensure_ready()
+    assert len(loader.calls) == 2
+    assert aggregates.get_statistics()["failed_at"] is None
+
+
+def test_monthly_by_rule_name(aggregates):
+    aggregates.reconcile()
+
+    assert aggregates.monthly_by_rule_name(2026) == {
+        (10, "Safety Glove Required"): 3,
+        (10, "Safety Glasses Required"): 2,
+        (3, "Safety Shirt Required"): 1
+    }
+
+
+def test_etag_changes_only_with_data_or_day(aggregates):
+    aggregates.reconcile()
+    etag = aggregates.etag(TODAY)
+
+    aggregates.reconcile()
+    assert aggregates.etag(TODAY) == etag
+
+    aggregates.record([ticket()])
+    changed = aggregates.etag(TODAY)
+    assert changed != etag
+    assert aggregates.etag(date(2026, 10, 18)) != changed
+
+
+def test_reconcile_with_new_data_changes_etag(aggregates, loader):
+    aggregates.reconcile()
+    etag = aggregates.etag(TODAY)
+
+    loader.total += 1
+    aggregates.reconcile()
+
+    assert aggregates.etag(TODAY) != etag
+
+
+def test_snapshot_is_built_from_aggregates(aggregates, loader):
+    aggregates.reconcile()
+    snapshot = aggregates.snapshot(TODAY)
+
+    assert snapshot["stats"] == {"todayDetections": 3, "yesterdayDetections": 2, "totalNG": 10}
+    assert {"name": "NG", "value": 3, "color": "#DC2626"} in snapshot["ppeStatus"]
+    assert snapshot["ruleViolations"] == [
+        {"rule": "Glove", "count": 3},
+        {"rule": "Glasses", "count": 0},
+        {"rule": "Shirt", "count": 0},
+        {"rule": "Shoe", "count": 0}
+    ]
+    months = {m["month"]: m for m in snapshot["monthlySummary"]}
+    assert months["Oct"] == {"month": "Oct", "gloves": 3, "glasses": 2, "shirt": 0}
+    assert months["Mar"]["shirt"] == 1
+    assert len(loader.calls) == 1
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, False),
+    ("", False),
+    ('"abc"', True),
+    ('W/"abc"', True),
+    ('"old", "abc"', True),
+    ("*", True),
+    ('"other"', False),
+])
+def test_etag_matches(header, expected):
+    assert etag_matches(header, '"abc"') is expected
@@ -0,0 +1,154 @@
+import pytest
+
+from db_pool import ConnectionPool
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, query):
+        if not self.conn.healthy:
+            raise RuntimeError("connection lost")
+
+    def fetchone(self):
+        return (1,)
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self):
+        self.healthy = True
+        self.closed = False
+        self.rollbacks = 0
+        self.fail_commit = False
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        if self.fail_commit:
+            raise RuntimeError("commit failed")
+
+    def rollback(self):
+        if not self.healthy:
+            raise RuntimeError("rollback failed")
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def opened():
+    return []
+
+
+@pytest.fixture
+def make_pool(opened):
+    def connect():
+        conn = FakeConnection()
+        opened.append(conn)
+        return conn
+
+    def factory(**kwargs):
+        kwargs.setdefault("max_size", 2)
+        kwargs.setdefault("acquire_timeout", 0.1)
+        return ConnectionPool(connect, **kwargs)
+    return factory
+
+
+def test_reuses_released_connection(make_pool, opened):
+    pool = make_pool()
+
+    pool.acquire().close()
+    conn = pool.acquire()
+    conn.close()
+
+    assert len(opened) == 1
+    assert opened[0].rollbacks == 2
+    stats = pool.get_statistics()
+    assert (stats["created"], stats["reused"], stats["in_use"], stats["idle"]) == (1, 1, 0, 1)
+
+
+def test_acquire_times_out_when_pool_is_full(make_pool):
+    pool = make_pool(max_size=1)
+    held = pool.acquire()
+
+    with pytest.raises(TimeoutError):
+        pool.acquire()
+
+    held.close()
+    pool.acquire().close()
+
+
+def test_context_manager_returns_connection(make_pool):
+    pool = make_pool()
+
+    with pool.acquire() as conn:
+        assert pool.get_statistics()["in_use"] == 1
+        conn.cursor()
+
+    assert pool.get_statistics()["in_use"] == 0
+
+
+def test_failed_commit_discards_connection(make_pool, opened):
+    pool = make_pool()
+    conn = pool.acquire()
+    opened[0].fail_commit = True
+
+    with pytest.raises(RuntimeError):
+        conn.commit()
+    conn.close()
+
+    assert opened[0].closed
+    assert pool.get_statistics()["idle"] == 0
+    pool.acquire().close()
+    assert len(opened) == 2
+
+
+def test_unhealthy_idle_connection_is_replaced(make_pool, opened):
+    pool = make_pool(health_check_after=0)
+    pool.acquire().close()
+    opened[0].healthy = False
+
+    pool.acquire().close()
+
+    assert opened[0].closed
+    assert len(opened) == 2
+    assert pool.get_statistics()["discarded"] == 1
+
+
+def test_idle_connections_expire(make_pool, opened):
+    pool = make_pool(idle_timeout=-1)
+
+    pool.acquire().close()
+
+    assert opened[0].closed
+    assert pool.get_statistics()["idle"] == 0
+
+
+def test_connect_failure_frees_the_slot(make_pool):
+    def connect():
+        raise RuntimeError("server down")
+
+    pool = ConnectionPool(connect, max_size=1, acquire_timeout=0.1)
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            pool.acquire()
+    assert pool.get_statistics()["failed"] == 2
+
+
+def test_close_all_closes_idle_connections(make_pool, opened):
+    pool = make_pool()
+    first, second = pool.acquire(), pool.acquire()
+    first.close()
+    second.close()
+
+    pool.close_all()
+
+    assert all(conn.closed for conn in opened)
+    assert pool.get_statistics()["idle"] == 0
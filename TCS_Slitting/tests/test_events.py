@@ -0,0 +1,59 @@
+import asyncio
+import threading
+
+from events import EventHub
+
+
+def test_camera_changes_are_diffed():
+    hub = EventHub(cameras=[0, 1])
+
+    assert hub.update_camera(0, status="active", detections=2) == {"status": "active", "detections": 2}
+    assert hub.update_camera(0, status="active", detections=2) == {}
+    assert hub.update_camera(0, status="active", detections=3) == {"detections": 3}
+
+    snapshot = hub.snapshot()
+    assert snapshot["version"] == 2
+    assert snapshot["cameras"] == {0: {"status": "active", "detections": 3}, 1: {"status": "inactive"}}
+
+
+def test_detections_are_sent_only_when_changed():
+    hub = EventHub()
+
+    assert hub.update_detections(0, [{"class": "NG"}])
+    assert not hub.update_detections(0, [{"class": "NG"}])
+    assert hub.snapshot()["detections"] == {0: [{"class": "NG"}]}
+
+
+def test_subscribers_receive_messages_and_resync_when_behind():
+    hub = EventHub(queue_size=2)
+
+    async def run():
+        async with hub.subscription() as q:
+            hub.update_camera(0, status="active")
+            await asyncio.sleep(0)
+            first = q.get_nowait()
+
+            for n in range(3):
+                hub.update_camera(0, detections=n)
+            await asyncio.sleep(0)
+            behind = [q.get_nowait() for _ in range(q.qsize())]
+
+            assert hub.get_subscriber_count() == 1
+        return first, behind
+
+    first, behind = asyncio.run(run())
+
+    assert first["type"] == "camera" and first["changes"] == {"status": "active"}
+    assert behind == [{"type": "resync"}]
+    assert hub.get_subscriber_count() == 0
+
+
+def test_refresh_runs_once_and_stop_cancels():
+    hub = EventHub()
+    fired = threading.Event()
+
+    assert hub.schedule_refresh(0, 0, lambda camera_id: fired.set())
+    assert fired.wait(1)
+
+    hub.stop()
+    assert not hub.schedule_refresh(0, 0, lambda camera_id: None)
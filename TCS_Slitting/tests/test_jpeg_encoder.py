@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+
+from jpeg_encoder import JpegEncoder
+
+
+def test_opencv_encode_round_trips():
+    encoder = JpegEncoder('opencv')
+    image = np.full((48, 64, 3), 128, np.uint8)
+
+    data = encoder.encode(image)
+
+    decoded = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    assert decoded.shape == image.shape
+
+
+def test_opencv_encode_failure_raises(monkeypatch):
+    monkeypatch.setattr(cv2, "imencode", lambda *args: (False, None))
+
+    with pytest.raises(RuntimeError):
+        JpegEncoder('opencv').encode(np.zeros((8, 8, 3), np.uint8))
+
+
+def test_write_reports_failure(tmp_path, monkeypatch):
+    monkeypatch.setattr(cv2, "imencode", lambda *args: (False, None))
+    path = tmp_path / "ng.jpg"
+
+    assert not JpegEncoder('opencv').write(str(path), np.zeros((8, 8, 3), np.uint8))
+    assert not path.exists()
+
+
+def test_unknown_backend_falls_back_to_opencv():
+    assert JpegEncoder('nope').backend == 'opencv'
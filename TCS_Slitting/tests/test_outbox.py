@@ -0,0 +1,122 @@
+import time
+from datetime import datetime
+
+import pytest
+
+from outbox import NGOutbox
+
+
+def make_ticket(rule_id=2, minute=0):
+    return {
+        "camera_id": 0,
+        "location": "Slitting 1",
+        "rule_id": rule_id,
+        "severity": "High",
+        "detected_time": datetime(2026, 10, 17, 8, minute),
+        "evidence": [("ng_images/a.jpg", "Image")]
+    }
+
+
+class Writer:
+    def __init__(self):
+        self.batches = []
+        self.fail = False
+
+    def __call__(self, tickets):
+        if self.fail:
+            return None
+        self.batches.append(tickets)
+        return list(range(len(tickets)))
+
+
+@pytest.fixture
+def writer():
+    return Writer()
+
+
+@pytest.fixture
+def outbox(tmp_path, writer):
+    box = NGOutbox(writer, path=str(tmp_path / "outbox.db"), batch_size=2,
+                   coalesce_window=0, poll_interval=0.05, retry_min=0.01, retry_max=0.02, shutdown_timeout=2)
+    yield box
+    box.stop()
+
+
+def test_flush_sends_tickets_in_order_and_batches(outbox, writer):
+    outbox.append([make_ticket(minute=i) for i in range(3)])
+
+    assert outbox.flush()
+
+    assert [len(b) for b in writer.batches] == [2, 1]
+    assert [t["detected_time"].minute for b in writer.batches for t in b] == [0, 1, 2]
+    assert outbox.pending_count() == 0
+
+
+def test_payload_round_trips(outbox, writer):
+    ticket = make_ticket()
+    outbox.append([ticket])
+    outbox.flush()
+
+    assert writer.batches[0][0] == ticket
+
+
+def test_failed_write_keeps_rows(outbox, writer):
+    writer.fail = True
+    outbox.append([make_ticket()])
+
+    assert not outbox.flush()
+    assert outbox.pending_count() == 1
+    assert outbox.get_statistics()["failed_batches"] == 1
+
+    writer.fail = False
+    assert outbox.flush()
+    assert outbox.pending_count() == 0
+
+
+def test_rows_survive_reopen(tmp_path, writer):
+    path = str(tmp_path / "outbox.db")
+    writer.fail = True
+    NGOutbox(writer, path=path).append([make_ticket()])
+
+    writer.fail = False
+    reopened = NGOutbox(writer, path=path)
+    assert reopened.pending_count() == 1
+    assert reopened.flush()
+    assert len(writer.batches) == 1
+
+
+def test_file_is_created_on_open_not_construction(tmp_path, writer):
+    path = tmp_path / "data" / "outbox.db"
+    box = NGOutbox(writer, path=str(path))
+    assert not path.exists()
+
+    box.open()
+    assert path.exists()
+    assert box.pending_count() == 0
+
+
+def test_flusher_retries_until_written(outbox, writer):
+    writer.fail = True
+    outbox.start()
+    outbox.append([make_ticket()])
+    time.sleep(0.1)
+    assert outbox.pending_count() == 1
+
+    writer.fail = False
+    deadline = time.time() + 2
+    while outbox.pending_count() and time.time() < deadline:
+        time.sleep(0.01)
+
+    assert outbox.pending_count() == 0
+    assert len(writer.batches) == 1
+
+
+def test_stop_flushes_remaining_rows(outbox, writer):
+    outbox.start()
+    outbox.stop()
+    outbox.append([make_ticket()])
+
+    outbox.start()
+    outbox.stop()
+
+    assert outbox.pending_count() == 0
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("cv2")
+
+from static_overlay import StaticOverlayCache
+
+ZONE = [(20, 40), (100, 40), (100, 100), (20, 100)]
+
+
+def test_overlay_is_drawn_inside_zone_bounds():
+    overlay = StaticOverlayCache(lambda camera_id: [(ZONE, "ZONE", (0, 0, 255))])
+    image = np.zeros((120, 160, 3), np.uint8)
+
+    overlay.apply(image, 0)
+
+    ys, xs = np.nonzero(image[:, :, 2])
+    assert len(ys) > 0
+    assert image[:, :, :2].max() == 0
+    assert ys.max() <= 102 and xs.max() <= 102
+
+
+def test_overlay_is_cached_until_zones_change():
+    zones = {0: [(ZONE, "ZONE", (0, 0, 255))]}
+    overlay = StaticOverlayCache(lambda camera_id: zones.get(camera_id, []))
+
+    first = overlay.get(0, (120, 160, 3))
+    assert overlay.get(0, (120, 160, 3)) is first
+
+    zones[0] = [([(10, 30), (50, 30), (50, 60)], "ZONE", (0, 0, 255))]
+    assert overlay.get(0, (120, 160, 3)) is not first
+
+
+def test_no_layers_leaves_image_untouched():
+    overlay = StaticOverlayCache(lambda camera_id: [])
+    image = np.zeros((20, 20, 3), np.uint8)
+
+    assert overlay.apply(image, 0) is image
+    assert image.max() == 0
@@ -0,0 +1,66 @@
+import asyncio
+
+from stream_hub import StreamHub
+
+
+class Frames:
+    def __init__(self):
+        self.seq = 0
+        self.frame = None
+        self.renders = 0
+
+    def read(self, camera_id, detected):
+        return self.seq, self.frame
+
+    def render(self, frame, single):
+        self.renders += 1
+        return f"{frame}-{single}".encode()
+
+
+def test_jpeg_is_encoded_once_per_frame():
+    frames = Frames()
+    hub = StreamHub(frames.read, frames.render)
+    assert hub.get_jpeg(0, False, False) == (0, None)
+
+    frames.seq, frames.frame = 1, "a"
+    assert hub.get_jpeg(0, False, False) == (1, b"a-False")
+    assert hub.get_jpeg(0, False, False) == (1, b"a-False")
+    assert frames.renders == 1
+
+    frames.seq, frames.frame = 2, "b"
+    assert hub.get_jpeg(0, False, False) == (2, b"b-False")
+    assert frames.renders == 2
+
+
+def test_encode_error_skips_frame():
+    frames = Frames()
+    frames.seq, frames.frame = 1, "a"
+
+    def render(frame, single):
+        raise RuntimeError("cv2.imencode failed")
+
+    assert StreamHub(frames.read, render).get_jpeg(0, False, False) == (1, None)
+
+
+def test_mjpeg_sends_new_frames_and_unsubscribes():
+    frames = Frames()
+    frames.seq, frames.frame = 1, "a"
+    hub = StreamHub(frames.read, frames.render, keepalive=0)
+
+    async def run():
+        stream = hub.mjpeg(0, False, True)
+        first = await stream.__anext__()
+        assert hub.get_subscriber_count() == 1
+
+        frames.seq, frames.frame = 2, "b"
+        hub.notify(0)
+        second = await asyncio.wait_for(stream.__anext__(), 1)
+
+        await stream.aclose()
+        return first, second
+
+    first, second = asyncio.run(run())
+
+    assert b"a-True" in first
+    assert b"b-True" in second
+    assert hub.get_subscriber_count() == 0
@@ -19,6 +19,7 @@ from config import (
     TH,
     OBSTACLE_ALERT_THRESHOLD, SAVE_OBSTACLE_IMAGES
 )
+from jpeg_encoder import write_jpeg
 
 
 # SOUND ALERT
@@ -390,7 +391,7 @@ def save_ng_image(original_frame, annotated_frame, camera_id, detections):
         # Save original
         if SAVE_ORIGINAL:
             original_path = NG_SAVE_DIR / "original" / f"{base_filename}_orig.jpg"
-            cv2.imwrite(str(original_path), original_frame)
+            write_jpeg(str(original_path), original_frame)
             image_paths['original'] = str(original_path)
         
         # Save annotated
@@ -408,7 +409,7 @@ def save_ng_image(original_frame, annotated_frame, camera_id, detections):
             cv2.putText(info_frame, f"NG Count: {ng_count}", (20, 100),
                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
             
-            cv2.imwrite(str(annotated_path), info_frame)
+            write_jpeg(str(annotated_path), info_frame)
             image_paths['annotated'] = str(annotated_path)
         
         print(f"📸 [Camera {camera_id+1}] NG image saved: {base_filename}")
@@ -452,7 +453,7 @@ def save_obstacle_image(original_frame, annotated_frame, camera_id, detections,
         # Save original
         if SAVE_ORIGINAL:
             original_path = NG_SAVE_DIR / "original" / f"{base_filename}_orig.jpg"
-            cv2.imwrite(str(original_path), original_frame)
+            write_jpeg(str(original_path), original_frame)
             image_paths['original'] = str(original_path)
         
         # Save annotated with info overlay
@@ -473,7 +474,7 @@ def save_obstacle_image(original_frame, annotated_frame, camera_id, detections,
             cv2.putText(info_frame, f"Duration: {duration:.1f}s (Threshold: {OBSTACLE_ALERT_THRESHOLD}s)", (20, 130),
                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 165, 255), 2)
             
-            cv2.imwrite(str(annotated_path), info_frame)
+            write_jpeg(str(annotated_path), info_frame)
             image_paths['annotated'] = str(annotated_path)
         
         print(f"📸 [Camera {camera_id+1}] Obstacle image saved: {base_filename}")
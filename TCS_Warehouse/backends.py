@@ -0,0 +1,211 @@
+"""
+Inference backends for the YOLO models:
+'torch'    - load the .pt weights directly (default)
+'onnx'     - export once to ONNX, serve through ONNX Runtime
+'openvino' - export once to OpenVINO IR, serve through OpenVINO
+Exported artifacts are cached next to the .pt weights and re-exported
+only when the weights are newer.
+"""
+from pathlib import Path
+import numpy as np
+from ultralytics import YOLO
+from config import (
+    DEVICE, USE_HALF_PRECISION,
+    ONNX_INTRA_OP_THREADS, ONNX_INTER_OP_THREADS
+)
+
+SUPPORTED_BACKENDS = ('torch', 'onnx', 'openvino')
+
+
+def get_export_path(model_path, backend):
+    """
+    Path of the cached artifact for a backend
+
+    Args:
+        model_path: Path to .pt weights
+        backend: One of SUPPORTED_BACKENDS
+
+    Returns:
+        Path: .pt for torch, .onnx file or *_openvino_model directory otherwise
+    """
+    model_path = Path(model_path)
+
+    if backend == 'onnx':
+        return model_path.with_suffix('.onnx')
+    if backend == 'openvino':
+        return model_path.parent / f"{model_path.stem}_openvino_model"
+    return model_path
+
+
+def is_artifact_fresh(artifact_path, model_path):
+    """True if the artifact exists and is not older than the weights"""
+    artifact_path = Path(artifact_path)
+    model_path = Path(model_path)
+
+    if not artifact_path.exists():
+        return False
+    if not model_path.exists():
+        return True
+    return artifact_path.stat().st_mtime >= model_path.stat().st_mtime
+
+
+def export_model(model_path, backend):
+    """
+    Export .pt weights for a backend, reusing the cached artifact when possible
+
+    Exports use dynamic axes so batched calls (several cameras / crops) work.
+
+    Args:
+        model_path: Path to .pt weights
+        backend: 'onnx' or 'openvino'
+
+    Returns:
+        Path: Exported artifact
+    """
+    model_path = Path(model_path)
+    export_path = get_export_path(model_path, backend)
+
+    if backend == 'torch':
+        return model_path
+
+    if is_artifact_fresh(export_path, model_path):
+        return export_path
+
+    print(f"📦 Exporting {model_path.name} to {backend}...")
+    exported = YOLO(str(model_path)).export(
+        format=backend,
+        dynamic=True,
+        half=False,
+        device='cpu',
+        verbose=False
+    )
+    print(f"✅ Exported {model_path.name} → {exported}")
+    return Path(exported)
+
+
+def load_backend_model(model_path, task, backend='torch', precision='fp32'):
+    """
+    Load a YOLO model for the given backend
+
+    Args:
+        model_path: Path to .pt weights
+        task: 'detect' or 'classify' (exported files do not always carry it)
+        backend: One of SUPPORTED_BACKENDS
+        precision: 'fp32' or 'int8' (int8 always runs the quantized ONNX model)
+
+    Returns:
+        YOLO model
+    """
+    if backend not in SUPPORTED_BACKENDS:
+        raise ValueError(f"Unknown model backend '{backend}', expected one of {SUPPORTED_BACKENDS}")
+
+    if precision == 'int8':
+        from quantization import get_quantized_model
+
+        int8_path = get_quantized_model(model_path, task)
+        model = YOLO(str(int8_path), task=task)
+        tune_onnx_session(model, int8_path)
+        return model
+
+    if backend == 'torch':
+        model = YOLO(str(model_path), task=task)
+        model.to(DEVICE)
+
+        if DEVICE == 'cuda' and USE_HALF_PRECISION:
+            model.model.half()
+
+        return model
+
+    export_path = export_model(model_path, backend)
+    model = YOLO(str(export_path), task=task)
+
+    if backend == 'onnx':
+        tune_onnx_session(model, export_path)
+
+    return model
+
+
+def _session_owner(backend):
+    """
+    Object that actually holds the ONNX Runtime session
+
+    Older ultralytics keeps `session` on AutoBackend itself; newer releases
+    keep it on a per-format backend at `AutoBackend.backend` and only proxy
+    reads through __getattr__, so assigning on AutoBackend would be ignored.
+
+    Returns:
+        The owner, or None if neither layout matches
+    """
+    for candidate in (backend, vars(backend).get('backend')):
+        if candidate is not None and 'session' in vars(candidate):
+            return candidate
+    return None
+
+
+def tune_onnx_session(model, onnx_path):
+    """
+    Rebuild the ONNX Runtime session with the configured thread counts
+
+    Ultralytics creates its session with default options and has no public
+    way to pass SessionOptions, so run one warm-up prediction and swap the
+    session on the object that owns it. Any layout we do not recognise
+    keeps the default session and logs why.
+
+    Args:
+        model: YOLO model loaded from an .onnx file
+        onnx_path: Path to the .onnx file
+
+    Returns:
+        bool: True if the tuned session is in use
+    """
+    name = Path(onnx_path).name
+
+    try:
+        import onnxruntime
+
+        # Warm-up creates the predictor and its ONNX Runtime session
+        warmup = np.zeros((64, 64, 3), np.uint8)
+        model.predict(warmup, device=DEVICE, verbose=False)
+        owner = _session_owner(model.predictor.model)
+
+        if owner is None:
+            print(f"⚠️ ONNX Runtime session not found for {name}, keeping default session")
+            return False
+        if not getattr(owner, 'dynamic', False):
+            print(f"⚠️ {name} has static axes, keeping default ONNX Runtime session")
+            return False
+        if getattr(owner, 'use_io_binding', False):
+            # IO bindings are tied to the session that created them
+            print(f"⚠️ {name} uses IO binding, keeping default ONNX Runtime session")
+            return False
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = ONNX_INTRA_OP_THREADS
+        options.inter_op_num_threads = ONNX_INTER_OP_THREADS
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+        default_session = owner.session
+        tuned_session = onnxruntime.InferenceSession(
+            str(onnx_path),
+            sess_options=options,
+            providers=default_session.get_providers()
+        )
+        owner.session = tuned_session
+
+        try:
+            model.predict(warmup, device=DEVICE, verbose=False)
+        except Exception:
+            owner.session = default_session
+            raise
+
+        if model.predictor.model.session is not tuned_session:
+            owner.session = default_session
+            print(f"⚠️ Tuned ONNX Runtime session for {name} was not picked up, keeping default session")
+            return False
+
+        print(f"⚙️ ONNX Runtime threads for {name}: intra-op={ONNX_INTRA_OP_THREADS}, inter-op={ONNX_INTER_OP_THREADS}")
+        return True
+
+    except Exception as e:
+        print(f"⚠️ Could not tune ONNX Runtime session for {onnx_path}: {e}")
+        return False
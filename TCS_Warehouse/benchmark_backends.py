@@ -0,0 +1,151 @@
+"""
+Compare inference backends against the PyTorch path:
+latency per image and agreement of the outputs (box matches for the
+detection models, top-1 agreement for the classifier) on saved NG frames.
+
+Usage:
+    python benchmark_backends.py --backend onnx --images ng_images_warehouse/original --limit 100
+"""
+import argparse
+import time
+from pathlib import Path
+import cv2
+import numpy as np
+from config import (
+    PERSON_MODEL_PATH, PPE_MODEL_PATH, CLASSIFICATION_MODEL_PATH,
+    OBSTACLE_MODEL_PATH, NG_SAVE_DIR, DEVICE
+)
+from backends import load_backend_model, SUPPORTED_BACKENDS
+
+MODELS = [
+    ("person", PERSON_MODEL_PATH, 'detect'),
+    ("ppe", PPE_MODEL_PATH, 'detect'),
+    ("classification", CLASSIFICATION_MODEL_PATH, 'classify'),
+    ("obstacle", OBSTACLE_MODEL_PATH, 'detect'),
+]
+
+
+def load_images(image_dir, limit):
+    """Load up to `limit` images from a directory"""
+    paths = sorted(p for p in Path(image_dir).glob("*") if p.suffix.lower() in ('.jpg', '.jpeg', '.png'))
+    images = []
+    for path in paths[:limit]:
+        image = cv2.imread(str(path))
+        if image is not None:
+            images.append(image)
+    return images
+
+
+def box_iou(box, boxes):
+    """IoU of one xyxy box against an (N, 4) array"""
+    x1 = np.maximum(box[0], boxes[:, 0])
+    y1 = np.maximum(box[1], boxes[:, 1])
+    x2 = np.minimum(box[2], boxes[:, 2])
+    y2 = np.minimum(box[3], boxes[:, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area = (box[2] - box[0]) * (box[3] - box[1])
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    return inter / np.maximum(area + areas - inter, 1e-9)
+
+
+def match_detections(reference, candidate, iou_threshold=0.5):
+    """
+    Greedy same-class matching of two detection results
+
+    Returns:
+        tuple: (matched, reference_count, candidate_count)
+    """
+    ref_boxes = reference.boxes.xyxy.cpu().numpy()
+    ref_cls = reference.boxes.cls.cpu().numpy()
+    cand_boxes = candidate.boxes.xyxy.cpu().numpy()
+    cand_cls = candidate.boxes.cls.cpu().numpy()
+
+    used = np.zeros(len(cand_boxes), bool)
+    matched = 0
+    for box, cls in zip(ref_boxes, ref_cls):
+        if not len(cand_boxes):
+            break
+        ious = box_iou(box, cand_boxes)
+        ious[(cand_cls != cls) | used] = 0
+        best = int(np.argmax(ious))
+        if ious[best] >= iou_threshold:
+            used[best] = True
+            matched += 1
+
+    return matched, len(ref_boxes), len(cand_boxes)
+
+
+def compare_outputs(task, reference_results, candidate_results):
+    """
+    Agreement between reference and candidate outputs
+
+    Returns:
+        float: F1 of box matches (detect) or top-1 agreement (classify)
+    """
+    if task == 'classify':
+        same = sum(int(r.probs.top1 == c.probs.top1) for r, c in zip(reference_results, candidate_results))
+        return same / max(1, len(reference_results))
+
+    matched = ref_total = cand_total = 0
+    for r, c in zip(reference_results, candidate_results):
+        m, nr, nc = match_detections(r, c)
+        matched += m
+        ref_total += nr
+        cand_total += nc
+
+    if ref_total == 0 and cand_total == 0:
+        return 1.0
+    return 2 * matched / max(1, ref_total + cand_total)
+
+
+def time_model(model, images, warmup=3):
+    """
+    Run every image through the model one at a time
+
+    Returns:
+        tuple: (results, latencies_ms)
+    """
+    for image in images[:warmup]:
+        model(image, device=DEVICE, verbose=False)
+
+    results = []
+    latencies = []
+    for image in images:
+        start = time.perf_counter()
+        results.extend(model(image, device=DEVICE, verbose=False))
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    return results, np.array(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark inference backends against PyTorch")
+    parser.add_argument("--backend", default="onnx", choices=[b for b in SUPPORTED_BACKENDS if b != 'torch'])
+    parser.add_argument("--images", default=str(NG_SAVE_DIR / "original"))
+    parser.add_argument("--limit", type=int, default=100)
+    args = parser.parse_args()
+
+    images = load_images(args.images, args.limit)
+    if not images:
+        print(f"❌ No images found in {args.images}")
+        return
+
+    print(f"📷 {len(images)} images from {args.images}")
+    print(f"{'model':<16}{'torch ms':>10}{'p95':>8}{args.backend + ' ms':>14}{'p95':>8}{'speedup':>9}{'agreement':>11}")
+
+    for name, model_path, task in MODELS:
+        if not Path(model_path).exists():
+            print(f"{name:<16} skipped (missing {model_path})")
+            continue
+
+        reference, ref_ms = time_model(load_backend_model(model_path, task, 'torch'), images)
+        candidate, cand_ms = time_model(load_backend_model(model_path, task, args.backend), images)
+        agreement = compare_outputs(task, reference, candidate)
+
+        print(f"{name:<16}{ref_ms.mean():>10.1f}{np.percentile(ref_ms, 95):>8.1f}"
+              f"{cand_ms.mean():>14.1f}{np.percentile(cand_ms, 95):>8.1f}"
+              f"{ref_ms.mean() / max(cand_ms.mean(), 1e-9):>8.2f}x{agreement:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Compare JPEG encoders on representative frames:
+encode time, output size and PSNR for each available backend,
+subsampling and DCT setting, at the stream and NG-save resolutions.
+
+Usage:
+    python benchmark_jpeg.py --images ng_images_warehouse/original --limit 20
+"""
+import argparse
+import time
+from pathlib import Path
+import cv2
+import numpy as np
+from config import NG_SAVE_DIR, DUAL_W, DUAL_H, SINGLE_W, SINGLE_H, STREAM_JPEG_QUALITY
+from jpeg_encoder import JpegEncoder, JPEG_ENCODERS
+
+
+def load_frames(image_dir, limit):
+    """Load saved frames, or a synthetic 1080p frame if none exist"""
+    paths = sorted(p for p in Path(image_dir).glob("*") if p.suffix.lower() in ('.jpg', '.jpeg', '.png'))
+    frames = [f for f in (cv2.imread(str(p)) for p in paths[:limit]) if f is not None]
+
+    if not frames:
+        print(f"⚠️ No images in {image_dir}, using a synthetic 1920x1080 frame")
+        rng = np.random.default_rng(0)
+        frame = cv2.GaussianBlur(rng.integers(0, 255, (1080, 1920, 3), np.uint8), (15, 15), 0)
+        frames = [frame]
+
+    return frames
+
+
+def psnr(reference, data):
+    """PSNR of decoded JPEG against the source image"""
+    decoded = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    mse = np.mean((reference.astype(np.float32) - decoded.astype(np.float32)) ** 2)
+    return 99.0 if mse == 0 else 10 * np.log10(255.0 ** 2 / mse)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark JPEG encoders")
+    parser.add_argument("--images", default=str(NG_SAVE_DIR / "original"))
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    frames = load_frames(args.images, args.limit)
+    sizes = {
+        "dual": (DUAL_W, DUAL_H),
+        "single": (SINGLE_W, SINGLE_H),
+        "full": None,
+    }
+
+    print(f"📷 {len(frames)} frames, quality {STREAM_JPEG_QUALITY}, {args.repeat} repeats")
+    print(f"{'encoder':<12}{'sampling':>9}{'fastdct':>9}{'size':>8}{'ms':>9}{'KB':>9}{'PSNR':>8}")
+
+    for backend in JPEG_ENCODERS:
+        for subsampling in ('420', '444'):
+            for fast_dct in (True, False):
+                encoder = JpegEncoder(backend, fast_dct, subsampling)
+                if encoder.backend != backend:
+                    break
+
+                for size_name, size in sizes.items():
+                    images = [cv2.resize(f, size) if size else f for f in frames]
+
+                    start = time.perf_counter()
+                    for _ in range(args.repeat):
+                        outputs = [encoder.encode(image, STREAM_JPEG_QUALITY) for image in images]
+                    elapsed_ms = (time.perf_counter() - start) * 1000 / (args.repeat * len(images))
+
+                    kb = np.mean([len(o) for o in outputs]) / 1024
+                    quality = np.mean([psnr(i, o) for i, o in zip(images, outputs)])
+
+                    print(f"{backend:<12}{subsampling:>9}{str(fast_dct):>9}{size_name:>8}"
+                          f"{elapsed_ms:>9.2f}{kb:>9.1f}{quality:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
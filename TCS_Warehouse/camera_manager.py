@@ -1,14 +1,90 @@
 import cv2
 import time
+import numpy as np
 import threading
 from typing import Dict
 from config import (
     CAM_URLS, DETECTION_INTERVAL, CAMERA_OFFSET,
     NG_COOLDOWN, CONSECUTIVE_NG_THRESHOLD,
-    OBSTACLE_ALERT_THRESHOLD, OBSTACLE_COOLDOWN_AFTER_ALERT
+    OBSTACLE_ALERT_THRESHOLD, OBSTACLE_COOLDOWN_AFTER_ALERT, ALERT_ACTIVE_SECONDS,
+    ENABLE_BATCH_INFERENCE, INFERENCE_WORKERS,
+    ENABLE_ADAPTIVE_INTERVAL, TARGET_DETECTIONS_PER_SECOND,
+    MIN_DETECTION_INTERVAL, MAX_DETECTION_INTERVAL,
+    ACTIVITY_HOLD_SECONDS, ACTIVITY_RATE_BOOST,
+    ENABLE_MOTION_GATING, MOTION_USE_ROI,
+    MOTION_MAX_SKIP_SECONDS, MOTION_IDLE_OBSTACLE_INTERVAL,
+    ROI_ZONES, ENABLE_OBSTACLE_DETECTION, SERVER_SIDE_ANNOTATION, DRAW_ROI
 )
-from detection import detect_and_classify
+from detection import detect_and_classify, detect_obstacles_only, draw_detections
+from inference_scheduler import inference_scheduler
+from inference_pool import inference_pool
+from motion import MotionDetector
+from frame_buffer import FrameRingBuffer, FrameLease
+from frame_pyramid import FramePyramid
 from alerts import sound_alert, email_alert, save_ng_image
+from events import event_hub
+
+
+class AdaptiveIntervalController:
+    """Per-camera detection interval that follows a detections-per-second budget"""
+    
+    def __init__(self, camera_id: int):
+        self.camera_id = camera_id
+        self.interval = DETECTION_INTERVAL
+        self.latency_ema = 0.0
+        self.last_activity_time = 0.0
+        self.lock = threading.Lock()
+    
+    def update(self, camera_fps, latency, queue_depth, has_activity):
+        """
+        Recompute the interval after a detection
+        
+        Args:
+            camera_fps: Measured capture FPS of the camera (0 if unknown)
+            latency: Seconds the last detection took (including batching wait)
+            queue_depth: Pending inference requests relative to batch capacity
+            has_activity: Person/NG seen in the last detection
+            
+        Returns:
+            int: New interval in frames
+        """
+        with self.lock:
+            current_time = time.time()
+            
+            if self.latency_ema == 0:
+                self.latency_ema = latency
+            else:
+                self.latency_ema = 0.7 * self.latency_ema + 0.3 * latency
+            
+            if has_activity:
+                self.last_activity_time = current_time
+            
+            # Budget, raised while someone is in view
+            target_rate = TARGET_DETECTIONS_PER_SECOND
+            if current_time - self.last_activity_time < ACTIVITY_HOLD_SECONDS:
+                target_rate *= ACTIVITY_RATE_BOOST
+            
+            # The host cannot sustain more than 1/latency detections per second
+            if self.latency_ema > 0:
+                target_rate = min(target_rate, 1.0 / self.latency_ema)
+            
+            # Backlog in the inference queue: shed load
+            target_rate /= (1.0 + queue_depth)
+            
+            fps = camera_fps if camera_fps > 0 else 15
+            interval = fps / target_rate
+            self.interval = int(round(max(MIN_DETECTION_INTERVAL, min(MAX_DETECTION_INTERVAL, interval))))
+            return self.interval
+    
+    def get_interval(self):
+        """Current interval in frames"""
+        with self.lock:
+            return self.interval
+    
+    def get_latency(self):
+        """Smoothed detection latency in seconds"""
+        with self.lock:
+            return self.latency_ema
 
 
 class CameraManager:
@@ -17,9 +93,17 @@ class CameraManager:
     def __init__(self):
         self.num_cameras = len(CAM_URLS)
         
-        # Frame storage
-        self.latest_frames: Dict[int, any] = {i: None for i in range(self.num_cameras)}
+        # Frame storage (captured frames live in shared-memory ring buffers)
+        self.frame_buffers: Dict[int, FrameRingBuffer] = {
+            i: FrameRingBuffer() for i in range(self.num_cameras)
+        }
         self.detected_frames: Dict[int, any] = {i: None for i in range(self.num_cameras)}
+        self.detected_seq: Dict[int, int] = {i: 0 for i in range(self.num_cameras)}  # seq of the annotated frame
+        
+        # Display resolutions per (camera, detected), built once per frame
+        self.pyramids: Dict[tuple, FramePyramid] = {
+            (i, detected): FramePyramid() for i in range(self.num_cameras) for detected in (False, True)
+        }
         self.detection_results: Dict[int, list] = {i: [] for i in range(self.num_cameras)}
         
         # Locks
@@ -27,14 +111,39 @@ class CameraManager:
             i: threading.Lock() for i in range(self.num_cameras)
         }
         
+        # Latest-frame handoff between capture and detection threads
+        self.frame_seq: Dict[int, int] = {i: 0 for i in range(self.num_cameras)}
+        self.frame_conditions: Dict[int, threading.Condition] = {
+            i: threading.Condition(self.frame_locks[i]) for i in range(self.num_cameras)
+        }
+        
         # NG tracking
         self.consecutive_ng_frames: Dict[int, int] = {i: 0 for i in range(self.num_cameras)}
         self.last_ng_save_time: Dict[int, float] = {i: 0 for i in range(self.num_cameras)}
         self.ng_frame_lock = threading.Lock()
         self.ng_save_lock = threading.Lock()
         
+        # Adaptive detection interval
+        self.camera_fps: Dict[int, float] = {i: 0.0 for i in range(self.num_cameras)}
+        self.interval_controllers: Dict[int, AdaptiveIntervalController] = {
+            i: AdaptiveIntervalController(i) for i in range(self.num_cameras)
+        }
+        
+        # Motion gating
+        self.motion_detectors: Dict[int, MotionDetector] = {
+            i: MotionDetector(ROI_ZONES.get(i) if MOTION_USE_ROI else None)
+            for i in range(self.num_cameras)
+        }
+        self.scene_active: Dict[int, bool] = {i: True for i in range(self.num_cameras)}
+        self.last_full_detection_time: Dict[int, float] = {i: 0 for i in range(self.num_cameras)}
+        self.last_obstacle_check_time: Dict[int, float] = {i: 0 for i in range(self.num_cameras)}
+        self.motion_skipped: Dict[int, int] = {i: 0 for i in range(self.num_cameras)}
+        
         # Alert timestamps
         self.alert_timestamps: Dict[int, float] = {i: 0 for i in range(self.num_cameras)}
+        # Timers that push has_alert=False once the alert window ends
+        self.alert_expiry_timers: Dict[int, threading.Timer] = {}
+        self.alert_timer_lock = threading.Lock()
         
         # Statistics
         self.ng_count_total: Dict[int, int] = {i: 0 for i in range(self.num_cameras)}
@@ -51,6 +160,17 @@ class CameraManager:
         # Control
         self.stop_event = threading.Event()
         self.threads = []
+        
+        # Where frames go for inference: worker processes, the in-process batch scheduler, or inline
+        if INFERENCE_WORKERS > 0:
+            self.inference_backend = inference_pool
+        elif ENABLE_BATCH_INFERENCE:
+            self.inference_backend = inference_scheduler
+        else:
+            self.inference_backend = None
+        
+        for i in range(self.num_cameras):
+            event_hub.update_camera(i, status="inactive")
     
     def start(self):
         """Start all camera reader threads"""
@@ -58,16 +178,25 @@ class CameraManager:
         print(f"🚀 Starting Camera System")
         print(f"{'='*60}")
         
+        if self.inference_backend is not None:
+            self.inference_backend.start()
+        
         for i, url in enumerate(CAM_URLS):
-            thread = threading.Thread(
-                target=self._camera_reader_thread,
+            capture_thread = threading.Thread(
+                target=self._camera_capture_thread,
                 args=(i, url),
                 daemon=True
             )
-            thread.start()
-            self.threads.append(thread)
+            detection_thread = threading.Thread(
+                target=self._detection_thread,
+                args=(i,),
+                daemon=True
+            )
+            capture_thread.start()
+            detection_thread.start()
+            self.threads.extend([capture_thread, detection_thread])
         
-        print(f"Started {self.num_cameras} camera threads")
+        print(f"Started {self.num_cameras} capture + {self.num_cameras} detection threads")
         print(f"{'='*60}\n")
     
     def stop(self):
@@ -75,10 +204,26 @@ class CameraManager:
         print("\n🛑 Stopping cameras...")
         self.stop_event.set()
         
+        # Wake up detection threads waiting for a new frame
+        for i in range(self.num_cameras):
+            with self.frame_conditions[i]:
+                self.frame_conditions[i].notify_all()
+        
         # Wait for threads to finish
         for thread in self.threads:
             thread.join(timeout=2)
         
+        with self.alert_timer_lock:
+            for timer in self.alert_expiry_timers.values():
+                timer.cancel()
+            self.alert_expiry_timers.clear()
+        
+        for ring in self.frame_buffers.values():
+            ring.close()
+        
+        if self.inference_backend is not None:
+            self.inference_backend.stop()
+        
         print("✅ All cameras stopped")
         
         # Print statistics
@@ -91,9 +236,10 @@ class CameraManager:
             print(f"  Images saved: {self.ng_saved_count[i]}")
         print(f"{'='*60}\n")
     
-    def _camera_reader_thread(self, camera_id: int, url: str):
+    def _camera_capture_thread(self, camera_id: int, url: str):
         """
-        Camera reader thread with detection
+        Camera capture thread: decodes the stream as fast as it arrives
+        and keeps only the newest frame (latest frame wins)
         
         Args:
             camera_id: Camera index
@@ -110,7 +256,6 @@ class CameraManager:
         print(f"✅ [Camera {camera_id+1}] Started streaming from {url}")
         
         frame_count = 0
-        detection_offset = camera_id * CAMERA_OFFSET
         consecutive_errors = 0
         max_consecutive_errors = 10
         
@@ -118,9 +263,16 @@ class CameraManager:
         last_log_time = time.time()
         frames_processed = 0
         
+        ring = self.frame_buffers[camera_id]
+        
         while not self.stop_event.is_set():
             try:
-                ret, frame = cap.read()
+                # Decode straight into the next ring slot once its size is known
+                slot = ring.begin_write()
+                if slot is not None:
+                    ret, frame = cap.read(slot)
+                else:
+                    ret, frame = cap.read()
                 
                 if not ret or frame is None:
                     consecutive_errors += 1
@@ -142,109 +294,25 @@ class CameraManager:
                 current_time = time.time()
                 if current_time - last_log_time >= 5.0:
                     fps = frames_processed / (current_time - last_log_time)
+                    self.camera_fps[camera_id] = fps
                     print(f"📊 [Camera {camera_id+1}] FPS: {fps:.1f}")
                     last_log_time = current_time
                     frames_processed = 0
                 
-                # Store latest frame
-                with self.frame_locks[camera_id]:
-                    self.latest_frames[camera_id] = frame.copy()
+                # First frame or resolution change: the frame was decoded elsewhere
+                if slot is None or not np.shares_memory(frame, slot):
+                    slot = ring.begin_write(frame.shape)
+                    np.copyto(slot, frame)
                 
-                # Run detection at intervals
-                if (frame_count + detection_offset) % DETECTION_INTERVAL == 0:
-                    try:
-                        detection_start = time.time()
-                        
-                        # Run 3-stage detection
-                        annotated_frame, detections, has_ng, has_obstacle = detect_and_classify(
-                            frame, camera_id=camera_id
-                        )
-                        
-                        detection_time = time.time() - detection_start
-                        if detection_time > 1.0:
-                            print(f"⚠️ [Camera {camera_id+1}] Slow detection: {detection_time:.2f}s")
-                        
-                        # Store results
-                        with self.frame_locks[camera_id]:
-                            self.detected_frames[camera_id] = annotated_frame
-                            self.detection_results[camera_id] = detections
-                            if has_ng or has_obstacle:
-                                self.alert_timestamps[camera_id] = time.time()
-                                
-                        # Handle obstacle detection with timing
-                        current_time = time.time()
-                        
-                        if has_obstacle:
-                            if self.obstacle_first_detected[camera_id] == 0:
-                                self.obstacle_first_detected[camera_id] = current_time
-                                print(f"⏱️ [Camera {camera_id+1}] Obstacle detected - starting timer")
-                            
-                            duration = current_time - self.obstacle_first_detected[camera_id]
-                            self.obstacle_duration[camera_id] = duration
-                            
-                            if duration >= OBSTACLE_ALERT_THRESHOLD:
-                                time_since_last_alert = current_time - self.last_obstacle_alert_time[camera_id]
-                                
-                                if not self.obstacle_alert_triggered[camera_id] or \
-                                   time_since_last_alert >= OBSTACLE_COOLDOWN_AFTER_ALERT:
-                                    # Trigger alert!
-                                    self.obstacle_count_total[camera_id] += 1
-                                    self.last_obstacle_time[camera_id] = current_time
-                                    self.obstacle_alert_triggered[camera_id] = True
-                                    self.last_obstacle_alert_time[camera_id] = current_time
-                                    
-                                    print(f"🚨 [Camera {camera_id+1}] OBSTACLE ALERT! Duration: {duration:.1f}s")
-                                    
-                                    self._handle_obstacle_alert(
-                                        camera_id,
-                                        frame.copy(),
-                                        annotated_frame.copy(),
-                                        detections,
-                                        duration
-                                    )
-                            else:
-                                remaining = OBSTACLE_ALERT_THRESHOLD - duration
-                                if int(remaining) % 10 == 0:
-                                    print(f"⏱️ [Camera {camera_id+1}] Obstacle duration: {duration:.1f}s / {OBSTACLE_ALERT_THRESHOLD}s")
-                        
-                        else:
-                            # ไม่เจอสิ่งกีดขวาง - reset timer
-                            if self.obstacle_first_detected[camera_id] != 0:
-                                print(f"✅ [Camera {camera_id+1}] Obstacle cleared (was detected for {self.obstacle_duration[camera_id]:.1f}s)")
-                            
-                            self.obstacle_first_detected[camera_id] = 0
-                            self.obstacle_duration[camera_id] = 0
-                            self.obstacle_alert_triggered[camera_id] = False
-                        
-                        # Handle NG detections
-                        with self.ng_frame_lock:
-                            if has_ng:
-                                self.consecutive_ng_frames[camera_id] += 1
-                                self.ng_count_total[camera_id] += 1
-                                
-                                # Save image and send alerts if threshold reached
-                                if self.consecutive_ng_frames[camera_id] >= CONSECUTIVE_NG_THRESHOLD:
-                                    self._handle_ng_detection(
-                                        camera_id,
-                                        frame.copy(),
-                                        annotated_frame.copy(),
-                                        detections
-                                    )
-                            else:
-                                self.consecutive_ng_frames[camera_id] = 0
-                        
-                    except Exception as e:
-                        print(f"❌ [Camera {camera_id+1}] Detection error: {e}")
-                        with self.frame_locks[camera_id]:
-                            self.detected_frames[camera_id] = frame.copy()
-                else:
-                    # Use previous detection frame if available
-                    with self.frame_locks[camera_id]:
-                        if self.detected_frames[camera_id] is None:
-                            self.detected_frames[camera_id] = frame.copy()
+                # Publish the slot and wake up the detection thread
+                with self.frame_conditions[camera_id]:
+                    self.frame_seq[camera_id] = ring.commit()
+                    self.frame_conditions[camera_id].notify_all()
+                
+                if frame_count == 0:
+                    event_hub.update_camera(camera_id, status="active")
                 
                 frame_count += 1
-                time.sleep(0.01)
                 
             except Exception as e:
                 print(f"❌ [Camera {camera_id+1}] Unexpected error: {e}")
@@ -252,7 +320,293 @@ class CameraManager:
                 time.sleep(0.1)
         
         cap.release()
-        print(f"✅ [Camera {camera_id+1}] Stopped (processed {frame_count} frames)")
+        print(f"✅ [Camera {camera_id+1}] Stopped (captured {frame_count} frames)")
+    
+    def _detection_thread(self, camera_id: int):
+        """
+        Detection thread: whenever free, takes the newest captured frame
+        (at most one every detection interval frames) and runs detection on it
+        
+        Args:
+            camera_id: Camera index
+        """
+        # Stagger cameras when they run independently; batched cameras should stay aligned
+        detection_offset = 0 if self.inference_backend is not None else camera_id * CAMERA_OFFSET
+        last_seq = detection_offset - DETECTION_INTERVAL
+        detections_run = 0
+        
+        condition = self.frame_conditions[camera_id]
+        
+        while not self.stop_event.is_set():
+            with condition:
+                interval = self._get_detection_interval(camera_id)
+                ready = condition.wait_for(
+                    lambda: self.stop_event.is_set() or
+                            self.frame_seq[camera_id] - last_seq >= interval,
+                    timeout=1.0
+                )
+                if not ready or self.stop_event.is_set():
+                    continue
+                
+                last_seq = self.frame_seq[camera_id]
+            
+            # Pin the slot so capture cannot overwrite it while we use it
+            lease = self.frame_buffers[camera_id].lease_latest()
+            if lease is None:
+                continue
+            
+            with lease:
+                mode = self._get_detection_mode(camera_id, lease.frame)
+                if mode is None:
+                    self.motion_skipped[camera_id] += 1
+                    continue
+                
+                self._process_detection(camera_id, lease.frame, full=(mode == 'full'), seq=lease.seq, lease=lease)
+                detections_run += 1
+        
+        print(f"✅ [Camera {camera_id+1}] Detection stopped (ran {detections_run} detections)")
+    
+    def _get_detection_mode(self, camera_id: int, frame):
+        """
+        Decide how much of the pipeline to run on this frame (motion gating)
+        
+        Returns:
+            'full', 'obstacle' (obstacle model only) or None (skip)
+        """
+        if not ENABLE_MOTION_GATING:
+            return 'full'
+        
+        current_time = time.time()
+        has_motion = self.motion_detectors[camera_id].update(frame)
+        
+        # Keep running while people are in view, and re-check a static scene now and then
+        if has_motion or self.scene_active[camera_id] or \
+           current_time - self.last_full_detection_time[camera_id] >= MOTION_MAX_SKIP_SECONDS:
+            return 'full'
+        
+        if ENABLE_OBSTACLE_DETECTION and \
+           current_time - self.last_obstacle_check_time[camera_id] >= MOTION_IDLE_OBSTACLE_INTERVAL:
+            return 'obstacle'
+        
+        return None
+    
+    def _process_detection(self, camera_id: int, frame, full=True, seq=0, lease=None):
+        """
+        Run 3-stage detection on a frame and handle obstacle/NG results
+        
+        Args:
+            camera_id: Camera index
+            frame: Frame to analyse (pinned ring slot, valid until this returns)
+            full: False to run only the obstacle model
+            seq: Ring sequence number of the frame
+            lease: The lease pinning frame (lets worker processes map the slot directly)
+        """
+        try:
+            detection_start = time.time()
+            
+            # Run 3-stage detection
+            annotated_frame, detections, has_ng, has_obstacle, person_count = self._run_detection(
+                frame, camera_id, full, lease
+            )
+            
+            self.last_obstacle_check_time[camera_id] = detection_start
+            if full:
+                self.last_full_detection_time[camera_id] = detection_start
+                # Someone standing in the ROI keeps the scene active even if none of their PPE was classified
+                self.scene_active[camera_id] = has_ng or person_count > 0 or any(
+                    d.get('type') == 'forklift' for d in detections
+                )
+            
+            detection_time = time.time() - detection_start
+            if detection_time > 1.0:
+                print(f"⚠️ [Camera {camera_id+1}] Slow detection: {detection_time:.2f}s")
+            
+            if ENABLE_ADAPTIVE_INTERVAL and full:
+                # Stage 1 count: a person whose PPE was not classified still counts as activity
+                has_activity = has_ng or person_count > 0 or any(d.get('type') == 'forklift' for d in detections)
+                self.interval_controllers[camera_id].update(
+                    self.camera_fps[camera_id],
+                    detection_time,
+                    self._get_queue_depth(),
+                    has_activity
+                )
+            
+            # Store results
+            with self.frame_locks[camera_id]:
+                self.detected_frames[camera_id] = annotated_frame
+                self.detected_seq[camera_id] = seq
+                self.frame_conditions[camera_id].notify_all()
+                self.detection_results[camera_id] = detections
+                if has_ng or has_obstacle:
+                    self.alert_timestamps[camera_id] = time.time()
+                    
+            # Handle obstacle detection with timing
+            current_time = time.time()
+            
+            if has_obstacle:
+                if self.obstacle_first_detected[camera_id] == 0:
+                    self.obstacle_first_detected[camera_id] = current_time
+                    print(f"⏱️ [Camera {camera_id+1}] Obstacle detected - starting timer")
+                
+                duration = current_time - self.obstacle_first_detected[camera_id]
+                self.obstacle_duration[camera_id] = duration
+                
+                if duration >= OBSTACLE_ALERT_THRESHOLD:
+                    time_since_last_alert = current_time - self.last_obstacle_alert_time[camera_id]
+                    
+                    if not self.obstacle_alert_triggered[camera_id] or \
+                       time_since_last_alert >= OBSTACLE_COOLDOWN_AFTER_ALERT:
+                        # Trigger alert!
+                        self.obstacle_count_total[camera_id] += 1
+                        self.last_obstacle_time[camera_id] = current_time
+                        self.obstacle_alert_triggered[camera_id] = True
+                        self.last_obstacle_alert_time[camera_id] = current_time
+                        
+                        print(f"🚨 [Camera {camera_id+1}] OBSTACLE ALERT! Duration: {duration:.1f}s")
+                        
+                        self._handle_obstacle_alert(
+                            camera_id,
+                            frame,
+                            annotated_frame,
+                            detections,
+                            duration
+                        )
+                else:
+                    remaining = OBSTACLE_ALERT_THRESHOLD - duration
+                    if int(remaining) % 10 == 0:
+                        print(f"⏱️ [Camera {camera_id+1}] Obstacle duration: {duration:.1f}s / {OBSTACLE_ALERT_THRESHOLD}s")
+            
+            else:
+                # ไม่เจอสิ่งกีดขวาง - reset timer
+                if self.obstacle_first_detected[camera_id] != 0:
+                    print(f"✅ [Camera {camera_id+1}] Obstacle cleared (was detected for {self.obstacle_duration[camera_id]:.1f}s)")
+                
+                self.obstacle_first_detected[camera_id] = 0
+                self.obstacle_duration[camera_id] = 0
+                self.obstacle_alert_triggered[camera_id] = False
+            
+            # Handle NG detections
+            with self.ng_frame_lock:
+                if has_ng:
+                    self.consecutive_ng_frames[camera_id] += 1
+                    self.ng_count_total[camera_id] += 1
+                    
+                    # Save image and send alerts if threshold reached
+                    if self.consecutive_ng_frames[camera_id] >= CONSECUTIVE_NG_THRESHOLD:
+                        self._handle_ng_detection(
+                            camera_id,
+                            frame,
+                            annotated_frame,
+                            detections
+                        )
+                else:
+                    self.consecutive_ng_frames[camera_id] = 0
+            
+            self._publish_state(camera_id)
+            
+        except Exception as e:
+            print(f"❌ [Camera {camera_id+1}] Detection error: {e}")
+            # Fall back to the live frame instead of a stale annotation
+            with self.frame_locks[camera_id]:
+                self.detected_frames[camera_id] = None
+                self.frame_conditions[camera_id].notify_all()
+    
+    def _publish_state(self, camera_id: int):
+        """Push this camera's detections and status to the event hub (only changes go out)"""
+        detections = self.get_detections(camera_id)
+        event_hub.update_detections(camera_id, detections)
+        
+        duration = self.obstacle_duration[camera_id]
+        has_alert = self.has_recent_alert(camera_id)
+        event_hub.update_camera(
+            camera_id,
+            detections=len(detections),
+            ng_count=sum(1 for d in detections if d.get('is_ng', False)),
+            obstacle_count=sum(1 for d in detections if d.get('type') == 'obstacle'),
+            ng_detected=self.ng_count_total[camera_id],
+            ng_saved=self.ng_saved_count[camera_id],
+            has_alert=has_alert,
+            last_alert_time=self.alert_timestamps[camera_id] or None,
+            has_obstacle=duration > 0,
+            # Whole seconds, so a standing obstacle sends one update per second at most
+            obstacle_current_duration=int(duration),
+            obstacle_alert_active=self.obstacle_alert_triggered[camera_id],
+            total_obstacles=self.obstacle_count_total[camera_id]
+        )
+        
+        if has_alert:
+            self._schedule_alert_expiry(camera_id)
+    
+    def _schedule_alert_expiry(self, camera_id: int):
+        """
+        Arm the timer that clears has_alert when the alert window ends
+        
+        Nothing else publishes once detections stop (motion gating, idle
+        interval), so without it clients would keep a stale has_alert=True.
+        """
+        if self.stop_event.is_set():
+            return
+        
+        remaining = self.alert_timestamps[camera_id] + ALERT_ACTIVE_SECONDS - time.time()
+        
+        with self.alert_timer_lock:
+            if camera_id in self.alert_expiry_timers:
+                # Already armed; it re-arms itself if newer alerts extended the window
+                return
+            
+            timer = threading.Timer(max(0, remaining) + 0.05, self._expire_alert, args=(camera_id,))
+            timer.daemon = True
+            self.alert_expiry_timers[camera_id] = timer
+            timer.start()
+    
+    def _expire_alert(self, camera_id: int):
+        """Timer callback: republish, which clears has_alert or re-arms if a newer alert extended it"""
+        with self.alert_timer_lock:
+            self.alert_expiry_timers.pop(camera_id, None)
+        
+        self._publish_state(camera_id)
+    
+    def _get_detection_interval(self, camera_id: int):
+        """Frames between detections for this camera"""
+        if ENABLE_ADAPTIVE_INTERVAL:
+            return self.interval_controllers[camera_id].get_interval()
+        return DETECTION_INTERVAL
+    
+    def _get_queue_depth(self):
+        """Inference backlog as a fraction of one batch (0 = no backlog)"""
+        if self.inference_backend is None:
+            return 0.0
+        return self.inference_backend.get_pending_count() / self.inference_backend.max_batch_size
+    
+    def _run_detection(self, frame, camera_id, full=True, lease=None):
+        """
+        Run 3-stage detection, in the worker pool or batched with the other cameras when enabled
+        
+        Args:
+            frame: Frame to analyse
+            camera_id: Camera index
+            full: False to run only the obstacle model
+            lease: FrameLease pinning frame, if it is a ring slot
+        
+        Returns:
+            tuple: (annotated_frame, detections, has_ng, has_obstacle, person_count)
+        """
+        if self.inference_backend is inference_pool:
+            return inference_pool.infer(frame, camera_id, full, lease=lease)
+        
+        if self.inference_backend is not None:
+            return self.inference_backend.infer(frame, camera_id, full)
+        
+        if not full:
+            return detect_obstacles_only(frame, camera_id=camera_id)
+        
+        return detect_and_classify(frame, camera_id=camera_id)
+    
+    def get_inference_statistics(self):
+        """Statistics of the active inference backend"""
+        if self.inference_backend is None:
+            return {}
+        return self.inference_backend.get_statistics()
     
     def _handle_ng_detection(self, camera_id, original_frame, annotated_frame, detections):
         """
@@ -273,6 +627,10 @@ class CameraManager:
                     return
                 self.last_ng_save_time[camera_id] = current_time
             
+            # Client-side annotation: draw only for the saved evidence
+            if annotated_frame is None:
+                annotated_frame = draw_detections(original_frame, detections, camera_id)
+            
             # Save images
             image_paths, ng_detections = save_ng_image(
                 original_frame,
@@ -299,20 +657,123 @@ class CameraManager:
             print(f"❌ Error handling NG detection: {e}")
     
     def get_latest_frame(self, camera_id: int):
-        """Get latest frame from camera"""
+        """
+        Get a copy of the latest frame from camera
+        
+        Use lease_frame() to read the ring slot without copying.
+        """
         if camera_id < 0 or camera_id >= self.num_cameras:
             return None
         
-        with self.frame_locks[camera_id]:
-            return self.latest_frames[camera_id]
+        _, frame = self.frame_buffers[camera_id].latest()
+        return frame
+    
+    def get_frame_info(self, camera_id: int):
+        """
+        Sequence number and shape of the latest frame (status/resolution without reading pixels)
+        
+        Returns:
+            tuple: (seq, shape) or (0, None)
+        """
+        if camera_id < 0 or camera_id >= self.num_cameras:
+            return 0, None
+        
+        return self.frame_buffers[camera_id].latest_info()
+    
+    def lease_frame(self, camera_id: int, detected=False):
+        """
+        Pin the latest raw or detected frame for zero-copy reading
+        
+        The detected view shows the live frame until an annotation exists.
+        Annotated frames are never written after they are stored, so their
+        lease pins nothing.
+        
+        Returns:
+            FrameLease (context manager; lease.seq, lease.frame) or None
+        """
+        if camera_id < 0 or camera_id >= self.num_cameras:
+            return None
+        
+        if detected:
+            with self.frame_locks[camera_id]:
+                if self.detected_frames[camera_id] is not None:
+                    return FrameLease(None, 0, -1, self.detected_seq[camera_id], self.detected_frames[camera_id])
+        
+        return self.frame_buffers[camera_id].lease_latest()
     
     def get_detected_frame(self, camera_id: int):
-        """Get latest detected frame from camera"""
+        """Get latest detected frame from camera (copy of the live frame until the first detection)"""
         if camera_id < 0 or camera_id >= self.num_cameras:
             return None
         
         with self.frame_locks[camera_id]:
-            return self.detected_frames[camera_id]
+            detected = self.detected_frames[camera_id]
+        
+        if detected is None:
+            return self.get_latest_frame(camera_id)
+        return detected
+    
+    def get_frame_seq(self, camera_id: int, detected=False):
+        """
+        Sequence number of the latest raw or detected frame
+        
+        The detected stream shows the live frame until an annotation exists,
+        so compare sequence numbers with != rather than >.
+        """
+        if camera_id < 0 or camera_id >= self.num_cameras:
+            return 0
+        
+        if detected:
+            with self.frame_locks[camera_id]:
+                if self.detected_frames[camera_id] is not None:
+                    return self.detected_seq[camera_id]
+        
+        return self.frame_buffers[camera_id].latest_info()[0]
+    
+    def get_display_frame(self, camera_id: int, level='dual', detected=False, seq=None, frame=None):
+        """
+        Get the raw/detected frame at a display resolution from DISPLAY_SIZES
+        
+        Args:
+            level: 'dual', 'single', 'thumb', ...
+            seq, frame: Frame to scale, held by the caller's lease (default: lease the current one)
+        
+        Returns:
+            tuple: (seq, resized frame) or (0, None); the resized frame is not a ring slot
+        """
+        if frame is None:
+            lease = self.lease_frame(camera_id, detected)
+            if lease is None:
+                return 0, None
+            with lease:
+                return lease.seq, self.pyramids[(camera_id, detected)].get(lease.seq, lease.frame, level)
+        
+        return seq, self.pyramids[(camera_id, detected)].get(seq, frame, level)
+    
+    def wait_for_new_frame(self, camera_id: int, last_seq, detected=False, timeout=1.0):
+        """
+        Block until the raw/detected frame differs from last_seq
+        
+        Returns:
+            int: Current seq (== last_seq on timeout); lease_frame() to read it
+        """
+        if camera_id < 0 or camera_id >= self.num_cameras:
+            return 0
+        
+        deadline = time.time() + timeout
+        while not self.stop_event.is_set():
+            seq = self.get_frame_seq(camera_id, detected)
+            if seq != 0 and seq != last_seq:
+                return seq
+            
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            
+            with self.frame_conditions[camera_id]:
+                self.frame_conditions[camera_id].wait(timeout=remaining)
+        
+        return self.get_frame_seq(camera_id, detected)
     
     def get_detections(self, camera_id: int):
         """Get current detections for camera"""
@@ -322,7 +783,35 @@ class CameraManager:
         with self.frame_locks[camera_id]:
             return self.detection_results[camera_id].copy()
     
-    def has_recent_alert(self, camera_id: int, threshold_seconds=3):
+    def get_overlay(self, camera_id: int):
+        """
+        Detection metadata for drawing annotations on the client
+        
+        Boxes are in full-frame pixels; scale by display size / frame_size.
+        """
+        if camera_id < 0 or camera_id >= self.num_cameras:
+            return None
+        
+        _, shape = self.frame_buffers[camera_id].latest_info()
+        height, width = shape[:2] if shape is not None else (0, 0)
+        
+        with self.frame_locks[camera_id]:
+            seq = self.detected_seq[camera_id]
+            detections = self.detection_results[camera_id].copy()
+        
+        roi = ROI_ZONES.get(camera_id)
+        return {
+            "camera_id": camera_id,
+            "seq": seq,
+            "server_side_annotation": SERVER_SIDE_ANNOTATION,
+            "frame_size": [width, height],
+            "roi_zones": [
+                {"name": "OBSTRUCTION DETECTION ZONE", "kind": "obstruction", "points": [list(p) for p in roi]}
+            ] if DRAW_ROI and roi else [],
+            "detections": detections
+        }
+    
+    def has_recent_alert(self, camera_id: int, threshold_seconds=ALERT_ACTIVE_SECONDS):
         """Check if camera has recent alert"""
         if camera_id < 0 or camera_id >= self.num_cameras:
             return False
@@ -344,7 +833,8 @@ class CameraManager:
                 "obstacle_detected": self.obstacle_count_total[camera_id],
                 "obstacle_current_duration": round(self.obstacle_duration[camera_id], 1),
                 "obstacle_alert_active": self.obstacle_alert_triggered[camera_id],
-                "last_obstacle_time": self.last_obstacle_time[camera_id] if self.last_obstacle_time[camera_id] > 0 else None
+                "last_obstacle_time": self.last_obstacle_time[camera_id] if self.last_obstacle_time[camera_id] > 0 else None,
+                **self._get_detection_stats(camera_id)
             }
         else:
             # Return statistics for all cameras
@@ -356,7 +846,8 @@ class CameraManager:
                         "images_saved": self.ng_saved_count[i],
                         "obstacle_detected": self.obstacle_count_total[i],
                         "obstacle_current_duration": round(self.obstacle_duration[i], 1),
-                        "obstacle_alert_active": self.obstacle_alert_triggered[i]
+                        "obstacle_alert_active": self.obstacle_alert_triggered[i],
+                        **self._get_detection_stats(i)
                     }
                     for i in range(self.num_cameras)
                 ],
@@ -365,6 +856,16 @@ class CameraManager:
                 "total_obstacles": sum(self.obstacle_count_total.values())
             }
             
+    def _get_detection_stats(self, camera_id: int):
+        """Detection rate info for statistics"""
+        return {
+            "detection_interval": self._get_detection_interval(camera_id),
+            "detection_latency_ms": round(self.interval_controllers[camera_id].get_latency() * 1000, 1),
+            "camera_fps": round(self.camera_fps[camera_id], 1),
+            "motion_skipped": self.motion_skipped[camera_id],
+            "scene_active": self.scene_active[camera_id]
+        }
+    
     def has_recent_obstacle(self, camera_id: int, threshold_seconds=5):
         """
         Check if camera has recent obstacle detection
@@ -389,6 +890,9 @@ class CameraManager:
         try:
             from alerts import save_obstacle_image, email_alert
             
+            if annotated_frame is None:
+                annotated_frame = draw_detections(original_frame, detections, camera_id)
+            
             # Save images
             image_paths, obstacle_detections = save_obstacle_image(
                 original_frame,
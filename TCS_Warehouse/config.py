@@ -7,7 +7,14 @@ from pathlib import Path
 DEVICE = 'cuda' if torch.cuda.is_available() else 'cpu'
 USE_HALF_PRECISION = True
 
+# Inference backend: 'torch' (.pt), 'onnx' (ONNX Runtime) หรือ 'openvino'
+# onnx/openvino จะ export จาก .pt ครั้งแรกแล้ว cache ไว้ข้างไฟล์ weights
+MODEL_BACKEND = os.getenv('MODEL_BACKEND', 'torch')
+ONNX_INTRA_OP_THREADS = int(os.getenv('ONNX_INTRA_OP_THREADS', os.cpu_count() or 4))
+ONNX_INTER_OP_THREADS = 1
+
 print(f"🖥️  Device: {DEVICE}")
+print(f"🧠 Model backend: {MODEL_BACKEND}")
 if DEVICE == 'cuda':
     print(f"🎮 GPU: {torch.cuda.get_device_name(0)}")
     print(f"💾 VRAM Available: {torch.cuda.get_device_properties(0).total_memory / 1024**3:.2f} GB")
@@ -21,6 +28,42 @@ CAM_URLS = [
 # Display settings
 DUAL_W, DUAL_H = 760, 720
 SINGLE_W, SINGLE_H = 1024, 768
+THUMB_W, THUMB_H = 320, 240
+
+# ขนาดภาพที่ย่อไว้ล่วงหน้าต่อเฟรม (stream/snapshot ใช้ร่วมกัน)
+DISPLAY_SIZES = {
+    'dual': (DUAL_W, DUAL_H),
+    'single': (SINGLE_W, SINGLE_H),
+    'thumb': (THUMB_W, THUMB_H),
+}
+
+# MJPEG streaming (encode ครั้งเดียวต่อเฟรม แล้วส่งให้ทุก client)
+STREAM_JPEG_QUALITY = 85
+STREAM_MAX_FPS = 30
+STREAM_KEEPALIVE = 5  # วินาที - ส่งเฟรมเดิมซ้ำถ้าไม่มีเฟรมใหม่นานเกินนี้ (0 = ปิด)
+SNAPSHOT_JPEG_QUALITY = 90
+
+# JPEG encoder: 'auto' (simplejpeg > turbojpeg > opencv), 'simplejpeg', 'turbojpeg' หรือ 'opencv'
+JPEG_ENCODER = 'auto'
+JPEG_FAST_DCT = True
+JPEG_SUBSAMPLING = '420'  # '444', '422' หรือ '420'
+
+# Push events (WebSocket /ws/events, SSE /events) - ส่งเฉพาะเมื่อข้อมูลเปลี่ยน
+EVENT_QUEUE_SIZE = 100  # ข้อความค้างต่อ client สูงสุด เกินนี้ส่ง snapshot ใหม่แทน
+EVENT_KEEPALIVE = 15  # วินาที - ส่ง comment (SSE) / ping (WebSocket) ตอนไม่มีอะไรเปลี่ยน กัน proxy ตัดและตรวจ client ที่หลุด
+ALERT_ACTIVE_SECONDS = 3  # วินาที - has_alert เป็น True หลัง NG/obstacle ล่าสุด แล้วส่ง update เมื่อหมดเวลา
+
+# H.264 live stream (fragmented MP4 ผ่าน ffmpeg ในเครื่อง) - encode ครั้งเดียวต่อกล้อง ใช้ bandwidth น้อยกว่า MJPEG มาก
+ENABLE_H264_STREAM = False
+FFMPEG_PATH = os.getenv('FFMPEG_PATH', 'ffmpeg')
+H264_LEVEL = 'single'  # ขนาดภาพจาก DISPLAY_SIZES
+H264_FPS = 10
+H264_BITRATE = '800k'
+H264_PRESET = 'veryfast'
+H264_GOP_SECONDS = 1  # keyframe ทุกกี่วินาที (= ความยาว fragment, viewer ใหม่รอไม่เกินนี้)
+H264_CLIENT_QUEUE = 10  # fragment ค้างต่อ client สูงสุด เกินนี้ข้ามไป fragment ล่าสุด
+H264_IDLE_TIMEOUT = 10  # วินาที - หยุด ffmpeg หลังไม่มีคนดู
+H264_STALL_TIMEOUT = 5  # วินาที - ไม่มี fragment ใหม่นานเกินนี้ ตรวจว่า ffmpeg ยังอยู่ ถ้าไม่อยู่ ปิด response ให้ client reconnect
 
 # OBSTACLE DETECTION ZONES
 ROI_ZONES = {
@@ -85,9 +128,47 @@ DRAW_ROI = True
 ROI_COLOR = (0, 0, 255)  # สีแดง
 ROI_THICKNESS = 3
 
+# False = ไม่วาด annotation ใน hot path: stream ส่งภาพดิบ + metadata (/camera/{id}/overlay) ให้ dashboard วาดเอง
+# (ภาพ NG/obstacle ที่บันทึกยังวาด annotation เหมือนเดิม)
+SERVER_SIDE_ANNOTATION = True
+
 # Detection settings
 DETECTION_INTERVAL = 10
 CAMERA_OFFSET = 5
+FRAME_RING_SLOTS = 4  # จำนวน slot ต่อกล้องใน shared-memory ring buffer
+
+# Adaptive detection interval (ปรับ interval ตาม latency ที่วัดได้จริง)
+ENABLE_ADAPTIVE_INTERVAL = True
+TARGET_DETECTIONS_PER_SECOND = 1.5  # งบ detection ต่อกล้องต่อวินาที
+MIN_DETECTION_INTERVAL = 3  # เฟรม
+MAX_DETECTION_INTERVAL = 60  # เฟรม
+ACTIVITY_HOLD_SECONDS = 10  # วินาที - หลังเจอคน/NG จะ detect ถี่ขึ้นช่วงนี้
+ACTIVITY_RATE_BOOST = 2.0  # คูณ detection rate ช่วงที่มี activity
+
+# Motion gating (ข้าม person/PPE model เมื่อภาพใน ROI ไม่เปลี่ยน)
+ENABLE_MOTION_GATING = True
+MOTION_USE_ROI = True  # นับเฉพาะการเปลี่ยนแปลงใน ROI_ZONES
+MOTION_FRAME_WIDTH = 160  # ย่อภาพก่อนเทียบ
+MOTION_PIXEL_THRESHOLD = 25  # ค่าต่าง grayscale ที่ถือว่า pixel เปลี่ยน
+MOTION_MIN_CHANGED_RATIO = 0.005  # สัดส่วน pixel ที่เปลี่ยนขั้นต่ำ
+MOTION_BACKGROUND_ALPHA = 0.05
+MOTION_MAX_SKIP_SECONDS = 30  # วินาที - บังคับรัน full detection อย่างน้อยทุกช่วงนี้
+MOTION_IDLE_OBSTACLE_INTERVAL = 10  # วินาที - รัน obstacle model ระหว่าง idle
+
+# Batched inference scheduler (รวมเฟรมจากทุกกล้องเป็น batch เดียว)
+ENABLE_BATCH_INFERENCE = True
+INFERENCE_BATCH_SIZE = 16  # จำนวนเฟรมสูงสุดต่อ batch
+INFERENCE_BATCH_MAX_WAIT = 0.05  # วินาที - รอเฟรมจากกล้องอื่นได้นานสุด
+INFERENCE_TIMEOUT = 10  # วินาที
+
+# Multi-process inference (แต่ละ worker process มี ModelManager ของตัวเอง, ส่งเฟรมผ่าน shared memory)
+INFERENCE_WORKERS = int(os.getenv('INFERENCE_WORKERS', 0))  # 0 = รันใน process หลัก
+INFERENCE_WORKER_START_TIMEOUT = 180  # วินาที - รอ worker โหลด model ครั้งแรก
+
+# Batched Stage-2 PPE detection (ทุก person crop เข้า PPE model ครั้งเดียว)
+ENABLE_BATCH_PPE_DETECTION = True
+PPE_BATCH_ACROSS_CAMERAS = True  # รวม person crops จากทุกกล้องใน batch เดียวกัน
+PPE_MAX_BATCH_SIZE = 32  # จำนวน crops สูงสุดต่อการเรียก model
 
 # MODEL CONFIG
 MODEL_DIR = Path("Model")
@@ -96,6 +177,17 @@ PPE_MODEL_PATH = MODEL_DIR / "object_train2.pt"
 CLASSIFICATION_MODEL_PATH = MODEL_DIR / "classify_train1.pt"
 OBSTACLE_MODEL_PATH = MODEL_DIR / "Obstruction.pt"
 ENABLE_OBSTACLE_DETECTION = True
+PERSON_INPUT_SIZE = 640
+PERSON_PRELETTERBOX = True  # letterbox เป็น 640x640 ก่อนส่งเข้า person model (batch ขนาดเท่ากันเสมอ)
+
+# Precision ต่อ model: 'fp32' หรือ 'int8'
+# int8 = ONNX static quantization (calibrate จากภาพใน NG_SAVE_DIR/original) รันผ่าน ONNX Runtime
+MODEL_PRECISION = {
+    'person': 'fp32',
+    'ppe': 'fp32',
+    'classification': 'fp32',
+    'obstacle': 'fp32',
+}
 
 # Model thresholds
 PERSON_CONFIDENCE_THRESHOLD = 0.5
@@ -133,6 +225,11 @@ os.makedirs(NG_SAVE_DIR / "original", exist_ok=True)
 os.makedirs(NG_SAVE_DIR / "annotated", exist_ok=True)
 os.makedirs(NG_SAVE_DIR / "obstacle", exist_ok=True)
 
+# INT8 calibration (ใช้ภาพ NG ที่เซฟไว้แล้ว)
+QUANT_CALIBRATION_DIR = NG_SAVE_DIR / "original"
+QUANT_CALIBRATION_SAMPLES = 200  # จำนวนภาพสูงสุดที่ใช้ calibrate
+QUANT_HOLDOUT_EVERY = 5  # ทุกๆ ภาพที่ 5 เก็บไว้วัด accuracy drift (ไม่ใช้ calibrate)
+
 # SOUND ALERT CONFIG
 ENABLE_SOUND_ALERT = True
 SOUND_FILE = Path("Sound Alarm/emergency-alarmsiren-type.mp3")
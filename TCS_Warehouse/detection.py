@@ -5,7 +5,6 @@ Stage 2: PPE Detection within person bbox
 Stage 3: Safety Classification
 """
 import cv2
-import numpy as np
 import torch
 from config import (
     PERSON_CONFIDENCE_THRESHOLD,
@@ -14,10 +13,15 @@ from config import (
     CLASS_MAPPING,
     ENABLE_NMS,
     NMS_IOU_THRESHOLD,
-    ROI_ZONES, DRAW_ROI, ROI_COLOR, ROI_THICKNESS,
-    ENABLE_OBSTACLE_DETECTION, OBSTACLE_CONFIDENCE_THRESHOLD
+    ROI_ZONES,
+    ENABLE_OBSTACLE_DETECTION, OBSTACLE_CONFIDENCE_THRESHOLD,
+    ENABLE_BATCH_PPE_DETECTION, PPE_BATCH_ACROSS_CAMERAS, PPE_MAX_BATCH_SIZE,
+    PERSON_INPUT_SIZE, PERSON_PRELETTERBOX,
+    SERVER_SIDE_ANNOTATION
 )
 from models import model_manager
+from frame_pyramid import letterbox, unletterbox_result
+from static_overlay import static_overlay
 
 
 def apply_nms(boxes, scores, iou_threshold=0.45):
@@ -39,7 +43,7 @@ def apply_nms(boxes, scores, iou_threshold=0.45):
     return keep
 
 
-def crop_bbox(image, bbox, padding=10):
+def crop_bbox(image, bbox, padding=10, return_origin=False):
     """
     Crop region from image with optional padding
     
@@ -47,9 +51,10 @@ def crop_bbox(image, bbox, padding=10):
         image: Input image
         bbox: Bounding box [x1, y1, x2, y2]
         padding: Padding around bbox
+        return_origin: Also return the (x, y) of the crop's top-left corner
         
     Returns:
-        Cropped image
+        Cropped image, or (cropped, (x1, y1)) if return_origin
     """
     x1, y1, x2, y2 = map(int, bbox)
     
@@ -60,6 +65,9 @@ def crop_bbox(image, bbox, padding=10):
     y2 = min(image.shape[0], y2 + padding)
     
     cropped = image[y1:y2, x1:x2]
+    
+    if return_origin:
+        return cropped, (x1, y1)
     return cropped
 
 
@@ -75,37 +83,67 @@ def classify_ppe_item(frame, bbox, detected_class):
     Returns:
         tuple: (classified_name, confidence, is_classified)
     """
-    # Check if this class needs classification
-    if detected_class not in CLASS_MAPPING:
-        return detected_class, 0.0, False
+    return classify_ppe_items(frame, [(bbox, detected_class)])[0]
+
+
+def classify_ppe_items(frame, items):
+    """
+    Stage 3 (batched): Classify every PPE item of a frame in one model call
     
-    try:
+    Args:
+        frame: Original frame
+        items: List of (bbox, detected_class) tuples
+        
+    Returns:
+        list: (classified_name, confidence, is_classified) per item, in order
+    """
+    outputs = [(detected_class, 0.0, False) for _, detected_class in items]
+    
+    crops = []
+    crop_indices = []
+    
+    for i, (bbox, detected_class) in enumerate(items):
+        # Check if this class needs classification
+        if detected_class not in CLASS_MAPPING:
+            continue
+        
         # Crop PPE item
         cropped = crop_bbox(frame, bbox, padding=10)
         
         if cropped.size == 0:
             print(f"⚠️ Empty crop for {detected_class}")
-            return detected_class, 0.0, False
-        
-        # Run classification
-        class_name, confidence = model_manager.classify_ppe(cropped)
+            continue
         
-        if class_name is None:
-            return detected_class, 0.0, False
+        crops.append(cropped)
+        crop_indices.append(i)
+    
+    if not crops:
+        return outputs
+    
+    try:
+        # Run classification on all crops at once
+        results = model_manager.classify_ppe_batch(crops)
         
-        # Validate that classification result is in expected classes
-        relevant_classes = CLASS_MAPPING.get(detected_class, [])
+        for i, (class_name, confidence) in zip(crop_indices, results):
+            detected_class = items[i][1]
+            
+            if class_name is None:
+                continue
+            
+            # Validate that classification result is in expected classes
+            relevant_classes = CLASS_MAPPING.get(detected_class, [])
+            
+            if class_name in relevant_classes:
+                print(f"✅ Classified {detected_class} → {class_name} (conf: {confidence:.2f})")
+                outputs[i] = (class_name, confidence, True)
+            else:
+                print(f"⚠️ Unexpected class {class_name} for {detected_class}")
         
-        if class_name in relevant_classes:
-            print(f"✅ Classified {detected_class} → {class_name} (conf: {confidence:.2f})")
-            return class_name, confidence, True
-        else:
-            print(f"⚠️ Unexpected class {class_name} for {detected_class}")
-            return detected_class, 0.0, False
+        return outputs
         
     except Exception as e:
-        print(f"❌ Classification error for {detected_class}: {e}")
-        return detected_class, 0.0, False
+        print(f"❌ Classification error: {e}")
+        return outputs
 
 
 def detect_ppe_in_person(frame, person_bbox):
@@ -119,63 +157,147 @@ def detect_ppe_in_person(frame, person_bbox):
     Returns:
         list: List of PPE detections with adjusted coordinates
     """
-    try:
+    return detect_ppe_in_persons([(frame, person_bbox)])[0]
+
+
+def detect_ppe_in_persons(person_crops):
+    """
+    Stage 2 (batched): Detect PPE items for many persons in one model call
+    
+    Every person crop is letterboxed to the PPE model input size and the
+    crops run as one batch (split into PPE_MAX_BATCH_SIZE chunks).
+    Boxes are mapped back to the coordinates of the frame they came from.
+    
+    Args:
+        person_crops: List of (frame, person_bbox) tuples; frames may come from different cameras
+        
+    Returns:
+        list: List of PPE detections per person, in order
+    """
+    outputs = [[] for _ in person_crops]
+    
+    crops = []
+    origins = []
+    indices = []
+    
+    for i, (frame, person_bbox) in enumerate(person_crops):
         # Crop person region with padding
-        person_crop = crop_bbox(frame, person_bbox, padding=20)
+        person_crop, origin = crop_bbox(frame, person_bbox, padding=20, return_origin=True)
         
         if person_crop.size == 0:
-            return []
-        
-        # Run PPE detection on cropped image
-        ppe_results = model_manager.detect_ppe(
-            person_crop,
-            conf_threshold=PPE_CONFIDENCE_THRESHOLD
-        )
-        
-        if ppe_results is None or len(ppe_results[0].boxes) == 0:
-            return []
+            continue
         
-        # Get detection results
-        boxes = ppe_results[0].boxes.xyxy
-        scores = ppe_results[0].boxes.conf
-        classes = ppe_results[0].boxes.cls
+        crops.append(person_crop)
+        origins.append(origin)
+        indices.append(i)
+    
+    for start in range(0, len(crops), PPE_MAX_BATCH_SIZE):
+        end = start + PPE_MAX_BATCH_SIZE
+        
+        try:
+            # Run PPE detection on the cropped images
+            ppe_results = model_manager.detect_ppe(
+                crops[start:end],
+                conf_threshold=PPE_CONFIDENCE_THRESHOLD
+            )
+            
+            if ppe_results is None:
+                continue
+            
+            for i, origin, result in zip(indices[start:end], origins[start:end], ppe_results):
+                outputs[i] = _ppe_result_to_detections(result, origin)
+                
+        except Exception as e:
+            print(f"❌ Error in detect_ppe_in_persons: {e}")
+    
+    return outputs
+
+
+def _ppe_result_to_detections(ppe_result, origin):
+    """
+    Convert a PPE YOLO result of one person crop to frame coordinates
+    
+    Args:
+        ppe_result: YOLO result for the crop
+        origin: (x, y) of the crop's top-left corner in the frame
         
-        # Apply NMS if enabled
-        if ENABLE_NMS and len(boxes) > 1:
-            keep = apply_nms(boxes, scores, iou_threshold=NMS_IOU_THRESHOLD)
-            boxes = boxes[keep]
-            scores = scores[keep]
-            classes = classes[keep]
+    Returns:
+        list: List of PPE detections with adjusted coordinates
+    """
+    if len(ppe_result.boxes) == 0:
+        return []
+    
+    # Get detection results
+    boxes = ppe_result.boxes.xyxy
+    scores = ppe_result.boxes.conf
+    classes = ppe_result.boxes.cls
+    
+    # Apply NMS if enabled
+    if ENABLE_NMS and len(boxes) > 1:
+        keep = apply_nms(boxes, scores, iou_threshold=NMS_IOU_THRESHOLD)
+        boxes = boxes[keep]
+        scores = scores[keep]
+        classes = classes[keep]
+    
+    # Convert to original frame coordinates
+    detections = []
+    x1_offset, y1_offset = origin
+    
+    for i in range(len(boxes)):
+        crop_x1, crop_y1, crop_x2, crop_y2 = boxes[i].cpu().numpy()
         
         # Convert to original frame coordinates
-        detections = []
-        x1_offset, y1_offset = map(int, person_bbox[:2])
-        
-        for i in range(len(boxes)):
-            crop_x1, crop_y1, crop_x2, crop_y2 = boxes[i].cpu().numpy()
-            
-            # Convert to original frame coordinates
-            orig_x1 = int(crop_x1 + x1_offset)
-            orig_y1 = int(crop_y1 + y1_offset)
-            orig_x2 = int(crop_x2 + x1_offset)
-            orig_y2 = int(crop_y2 + y1_offset)
-            
-            cls_id = int(classes[i])
-            class_name = model_manager.ppe_model.names[cls_id]
-            conf = float(scores[i])
-            
-            detections.append({
-                'bbox': [orig_x1, orig_y1, orig_x2, orig_y2],
-                'conf': conf,
-                'class': class_name,
-                'cls': cls_id
-            })
+        orig_x1 = int(crop_x1 + x1_offset)
+        orig_y1 = int(crop_y1 + y1_offset)
+        orig_x2 = int(crop_x2 + x1_offset)
+        orig_y2 = int(crop_y2 + y1_offset)
+        
+        cls_id = int(classes[i])
+        class_name = model_manager.ppe_model.names[cls_id]
+        conf = float(scores[i])
+        
+        detections.append({
+            'bbox': [orig_x1, orig_y1, orig_x2, orig_y2],
+            'conf': conf,
+            'class': class_name,
+            'cls': cls_id
+        })
+    
+    return detections
+
+
+def detect_ppe_for_frames(frames, person_results):
+    """
+    Stage 2 for a whole batch: one PPE model call for every person in every frame
+    
+    Args:
+        frames: List of input frames
+        person_results: Stage 1 YOLO result of each frame (or None)
         
-        return detections
+    Returns:
+        list: Per frame, a dict {person_idx: [PPE detections]} (forklifts are skipped)
+    """
+    person_crops = []
+    owners = []
+    
+    for frame_idx, (frame, person_result) in enumerate(zip(frames, person_results)):
+        if person_result is None:
+            continue
         
-    except Exception as e:
-        print(f"❌ Error in detect_ppe_in_person: {e}")
-        return []
+        for person_idx, person_box in enumerate(person_result.boxes):
+            person_class_name = model_manager.person_model.names[int(person_box.cls)]
+            if person_class_name.lower() == 'forklift':
+                continue
+            
+            person_crops.append((frame, person_box.xyxy[0].cpu().numpy()))
+            owners.append((frame_idx, person_idx))
+    
+    ppe_by_frame = [{} for _ in frames]
+    
+    for (frame_idx, person_idx), ppe_detections in zip(owners, detect_ppe_in_persons(person_crops)):
+        ppe_by_frame[frame_idx][person_idx] = ppe_detections
+    
+    return ppe_by_frame
 
 
 def detect_and_classify(frame, camera_id=0):
@@ -189,140 +311,234 @@ def detect_and_classify(frame, camera_id=0):
         frame: Input frame
         
     Returns:
-        tuple: (annotated_frame, detections, has_ng)
+        tuple: (annotated_frame, detections, has_ng, has_obstacle, person_count)
+    """
+    return detect_and_classify_batch([frame], [camera_id])[0]
+
+
+def detect_obstacles_only(frame, camera_id=0):
+    """
+    Obstacle-only detection (person/PPE stages skipped), used while the scene is static
+    
+    Returns:
+        tuple: (annotated_frame, detections, has_ng, has_obstacle, person_count)
+    """
+    return detect_and_classify_batch([frame], [camera_id], [False])[0]
+
+
+def detect_and_classify_batch(frames, camera_ids, full_flags=None):
+    """
+    Batched 3-Stage Detection for frames from several cameras
+    
+    The person and obstacle models each run once for the whole batch,
+    so N cameras share one model launch instead of N.
+    
+    Args:
+        frames: List of input frames
+        camera_ids: Camera ID of each frame
+        full_flags: Per frame, False to run the obstacle model only (default: all True)
+        
+    Returns:
+        list: (annotated_frame, detections, has_ng, has_obstacle, person_count) per frame, in order
+    """
+    if full_flags is None:
+        full_flags = [True] * len(frames)
+    
+    # Obstacle model: only frames from cameras that have an ROI zone
+    obstacle_detections = detect_obstacles_in_roi_batch(frames, camera_ids)
+    
+    # Stage 1: Detect persons and forklifts
+    person_results = [None] * len(frames)
+    full_indices = [i for i, full in enumerate(full_flags) if full]
+    
+    if full_indices:
+        # Square 640 inputs: the model skips its own resize and mixed resolutions batch evenly
+        if PERSON_PRELETTERBOX:
+            boxed = [letterbox(frames[i], PERSON_INPUT_SIZE) for i in full_indices]
+            person_inputs = [b[0] for b in boxed]
+        else:
+            person_inputs = [frames[i] for i in full_indices]
+        
+        results = model_manager.detect_persons(
+            person_inputs,
+            conf_threshold=PERSON_CONFIDENCE_THRESHOLD,
+            imgsz=PERSON_INPUT_SIZE
+        )
+        
+        if results is not None:
+            for n, (i, result) in enumerate(zip(full_indices, results)):
+                if PERSON_PRELETTERBOX:
+                    _, scale, pad = boxed[n]
+                    unletterbox_result(result, scale, pad, frames[i].shape)
+                person_results[i] = result
+    
+    # Stage 2: one PPE batch for the persons of every camera in this batch
+    if ENABLE_BATCH_PPE_DETECTION and PPE_BATCH_ACROSS_CAMERAS:
+        ppe_by_frame = detect_ppe_for_frames(frames, person_results)
+    else:
+        ppe_by_frame = [None] * len(frames)
+    
+    outputs = []
+    for idx, (frame, camera_id) in enumerate(zip(frames, camera_ids)):
+        outputs.append(
+            _classify_frame(frame, camera_id, person_results[idx],
+                            obstacle_detections[idx], ppe_by_frame[idx])
+        )
+    
+    return outputs
+
+
+def _classify_frame(frame, camera_id, person_result, obstacle_detections, ppe_by_person=None):
+    """
+    Stage 2 + 3 for a single frame of a batch
+    
+    Args:
+        frame: Input frame
+        camera_id: Camera ID
+        person_result: Stage 1 YOLO result for this frame (or None)
+        obstacle_detections: Obstacles found in this frame's ROI
+        ppe_by_person: Precomputed Stage 2 results {person_idx: [PPE detections]}
+        
+    Returns:
+        tuple: (annotated_frame, detections, has_ng, has_obstacle, person_count);
+        annotated_frame is None when SERVER_SIDE_ANNOTATION is off,
+        person_count counts Stage 1 persons whether or not their PPE was classified
     """
-    annotated_frame = frame.copy()
     all_detections = []
     has_ng = False
-    has_obstacle = False
-    
-    if DRAW_ROI and camera_id in ROI_ZONES:
-        roi = ROI_ZONES[camera_id]
-        pts = np.array(roi, np.int32).reshape((-1, 1, 2))
-        cv2.polylines(annotated_frame, [pts], True, ROI_COLOR, ROI_THICKNESS)
-        cv2.putText(annotated_frame, "OBSTRUCTION DETECTION ZONE", 
-                   (roi[0][0], roi[0][1] - 10),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.8, ROI_COLOR, 2)
-        
-    obstacle_detections = detect_obstacles_in_roi(frame, camera_id)
-    if len(obstacle_detections) > 0:
-        has_obstacle = True
-        all_detections.extend(obstacle_detections)
-        
-        # วาด bounding box สำหรับสิ่งกีดขวาง
-        for obs in obstacle_detections:
-            x1, y1, x2, y2 = obs['bbox']
-            color = (0, 165, 255)  # สีส้ม (BGR)
-            thickness = 3
+    has_obstacle = len(obstacle_detections) > 0
+    person_count = 0
+    
+    all_detections.extend(obstacle_detections)
+    
+    if person_result is not None and len(person_result.boxes) > 0:
+        # Stage 2 for all persons of this frame in one batch
+        if ppe_by_person is None and ENABLE_BATCH_PPE_DETECTION:
+            ppe_by_person = detect_ppe_for_frames([frame], [person_result])[0]
+        
+        # PPE items of every person in this frame, classified together below
+        ppe_items = []
+        
+        # Process each detected person/forklift
+        for person_idx, person_box in enumerate(person_result.boxes):
+            person_conf = float(person_box.conf)
+            person_bbox = person_box.xyxy[0].cpu().numpy()
+            person_class_id = int(person_box.cls)
+            person_class_name = model_manager.person_model.names[person_class_id]
             
-            # วาด bbox
-            cv2.rectangle(annotated_frame, (x1, y1), (x2, y2), color, thickness)
+            px1, py1, px2, py2 = map(int, person_bbox)
             
-            # วาด label
-            label = f"⚠️ {obs['class']}: {obs['confidence']:.2f}"
-            (text_w, text_h), _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)
-            cv2.rectangle(annotated_frame, (x1, y1 - text_h - 10), 
-                         (x1 + text_w + 10, y1), color, -1)
-            cv2.putText(annotated_frame, label, (x1 + 5, y1 - 5),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+            # If forklift, skip PPE detection
+            if person_class_name.lower() == 'forklift':
+                all_detections.append({
+                    'type': 'forklift',
+                    'bbox': [px1, py1, px2, py2],
+                    'confidence': person_conf,
+                    'person_id': None
+                })
+                continue
             
-            # วาดจุดกึ่งกลาง
-            cv2.circle(annotated_frame, ((x1+x2)//2, (y1+y2)//2), 5, color, -1)
-    
-    # Stage 1: Detect persons and forklifts
-    person_results = model_manager.detect_persons(
-        frame,
-        conf_threshold=PERSON_CONFIDENCE_THRESHOLD
-    )
-    
-    if person_results is None or len(person_results[0].boxes) == 0:
-        return annotated_frame, all_detections, has_ng, has_obstacle
-    
-    # Process each detected person/forklift
-    for person_idx, person_box in enumerate(person_results[0].boxes):
-        person_conf = float(person_box.conf)
-        person_bbox = person_box.xyxy[0].cpu().numpy()
-        person_class_id = int(person_box.cls)
-        person_class_name = model_manager.person_model.names[person_class_id]
-        
-        px1, py1, px2, py2 = map(int, person_bbox)
-        
-        # If forklift, just draw and skip PPE detection
-        if person_class_name.lower() == 'forklift':
-            cv2.rectangle(annotated_frame, (px1, py1), (px2, py2), (255, 0, 0), 2)
-            label = f"Forklift: {person_conf:.2f}"
+            person_count += 1
             
-            (text_w, text_h), _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)
-            cv2.rectangle(annotated_frame, (px1, py1 - text_h - 10), (px1 + text_w + 10, py1), (255, 0, 0), -1)
-            cv2.putText(annotated_frame, label, (px1 + 5, py1 - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+            # Stage 2: Detect PPE within person bbox
+            if ppe_by_person is not None:
+                person_ppe = ppe_by_person.get(person_idx, [])
+            else:
+                person_ppe = detect_ppe_in_person(frame, person_bbox)
             
-            all_detections.append({
-                'type': 'forklift',
-                'bbox': [px1, py1, px2, py2],
-                'confidence': person_conf,
-                'person_id': None
-            })
-            continue
+            for ppe in person_ppe:
+                ppe_items.append((person_idx, ppe))
         
-        # Stage 2: Detect PPE within person bbox
-        ppe_detections = detect_ppe_in_person(frame, person_bbox)
+        # Stage 3: Classify all PPE detections of the frame in one batch
+        classifications = classify_ppe_items(
+            frame, [(ppe['bbox'], ppe['class']) for _, ppe in ppe_items]
+        )
         
-        # Stage 3: Classify each PPE detection
-        for ppe in ppe_detections:
-            bbox = ppe['bbox']
-            x1, y1, x2, y2 = bbox
-            class_name = ppe['class']
-            det_conf = ppe['conf']
-            
-            # Classify PPE
-            classified_name, class_conf, is_classified = classify_ppe_item(
-                frame, bbox, class_name
-            )
-            
+        for (person_idx, ppe), (classified_name, class_conf, is_classified) in zip(ppe_items, classifications):
             # Skip if classification failed or confidence too low
             if not is_classified or class_conf < CLASSIFICATION_THRESHOLD:
                 continue
             
-            # Determine display name
-            # display_name = classified_name.split('_', 1)[1] if '_' in classified_name else classified_name
-            # display_name = display_name.replace('-', ' ').title()
-            
             # Check if NG (non-safety)
             is_non_safety = 'non-safety' in classified_name.lower()
-            
             if is_non_safety:
                 has_ng = True
-                color = (0, 0, 255)  # Red
-                thickness = 4
-            else:
-                color = (0, 255, 0)  # Green
-                thickness = 2
             
             # Store detection result
             all_detections.append({
                 'type': 'ppe',
                 'person_id': person_idx + 1,
-                'bbox': bbox,
-                'detected_class': class_name,
+                'bbox': ppe['bbox'],
+                'detected_class': ppe['class'],
                 'classified_as': classified_name,
-                'detection_conf': round(det_conf, 2),
+                'detection_conf': round(ppe['conf'], 2),
                 'classification_conf': round(class_conf, 2),
                 'is_ng': is_non_safety
             })
-            
-            # Draw PPE bbox
-            cv2.rectangle(annotated_frame, (x1, y1), (x2, y2), color, thickness)
-            
-            # Draw label
-            label = f"{classified_name}"
-            (text_w, text_h), _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)
-            cv2.rectangle(annotated_frame, (x1, y1 - text_h - 10), (x1 + text_w + 10, y1), color, -1)
-            cv2.putText(annotated_frame, label, (x1 + 5, y1 - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-            
-            # Draw center point
+    
+    annotated_frame = draw_detections(frame, all_detections, camera_id) if SERVER_SIDE_ANNOTATION else None
+    
+    return annotated_frame, all_detections, has_ng, has_obstacle, person_count
+
+
+def draw_detections(frame, detections, camera_id=0):
+    """
+    Draw ROI zone, obstacles, forklifts and classified PPE onto a copy of the frame
+    
+    Used for the detected stream (SERVER_SIDE_ANNOTATION) and for saved
+    NG/obstacle evidence; with client-side annotation the dashboard draws
+    the same thing from /camera/{id}/overlay.
+    
+    Args:
+        frame: Original frame
+        detections: Detections from detect_and_classify
+        camera_id: Camera ID (for the ROI zone)
+        
+    Returns:
+        Annotated copy of the frame
+    """
+    annotated_frame = frame.copy()
+    
+    # ROI outline + label: pre-rendered once per camera, composited with one masked copy
+    static_overlay.apply(annotated_frame, camera_id)
+    
+    for det in detections:
+        x1, y1, x2, y2 = det['bbox']
+        det_type = det.get('type')
+        
+        if det_type == 'obstacle':
+            # วาด bounding box สำหรับสิ่งกีดขวาง
+            color = (0, 165, 255)  # สีส้ม (BGR)
+            thickness = 3
+            label = f"⚠️ {det['class']}: {det['confidence']:.2f}"
+        elif det_type == 'forklift':
+            color = (255, 0, 0)
+            thickness = 2
+            label = f"Forklift: {det['confidence']:.2f}"
+        elif det_type == 'ppe':
+            if det['is_ng']:
+                color = (0, 0, 255)  # Red
+                thickness = 4
+            else:
+                color = (0, 255, 0)  # Green
+                thickness = 2
+            label = f"{det['classified_as']}"
+        else:
+            continue
+        
+        # Draw bbox
+        cv2.rectangle(annotated_frame, (x1, y1), (x2, y2), color, thickness)
+        
+        # Draw label
+        (text_w, text_h), _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)
+        cv2.rectangle(annotated_frame, (x1, y1 - text_h - 10), (x1 + text_w + 10, y1), color, -1)
+        cv2.putText(annotated_frame, label, (x1 + 5, y1 - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+        
+        # Draw center point (forklifts have none)
+        if det_type != 'forklift':
             cv2.circle(annotated_frame, ((x1+x2)//2, (y1+y2)//2), 5, color, -1)
     
-    return annotated_frame, all_detections, has_ng, has_obstacle
+    return annotated_frame
 
 
 def is_point_in_polygon(point, polygon):
@@ -364,49 +580,87 @@ def detect_obstacles_in_roi(frame, camera_id):
     Returns:
         list: List of obstacle detections
     """
+    return detect_obstacles_in_roi_batch([frame], [camera_id])[0]
+
+
+def detect_obstacles_in_roi_batch(frames, camera_ids):
+    """
+    Detect obstacles within ROI zones for a batch of frames
+    
+    Args:
+        frames: List of input frames
+        camera_ids: Camera ID of each frame (for ROI zone selection)
+        
+    Returns:
+        list: List of obstacle detections per frame, in order
+    """
+    obstacles = [[] for _ in frames]
+    
     if not ENABLE_OBSTACLE_DETECTION:
-        return []
+        return obstacles
     
-    if camera_id not in ROI_ZONES:
-        return []
+    # Only cameras with an ROI zone need the obstacle model
+    indices = [i for i, camera_id in enumerate(camera_ids) if camera_id in ROI_ZONES]
+    if not indices:
+        return obstacles
     
     try:
-        # Run obstacle detection on full frame
+        # Run obstacle detection on full frames
         obstacle_results = model_manager.detect_obstacles(
-            frame,
+            [frames[i] for i in indices],
             conf_threshold=OBSTACLE_CONFIDENCE_THRESHOLD
         )
         
-        if obstacle_results is None or len(obstacle_results[0].boxes) == 0:
-            return []
+        if obstacle_results is None:
+            return obstacles
         
-        # Filter detections that are inside ROI
-        roi_polygon = ROI_ZONES[camera_id]
-        obstacles_in_roi = []
+        for i, result in zip(indices, obstacle_results):
+            obstacles[i] = filter_obstacles_in_roi(result, camera_ids[i])
         
-        for box in obstacle_results[0].boxes:
-            bbox = box.xyxy[0].cpu().numpy()
-            x1, y1, x2, y2 = map(int, bbox)
-            
-            # Check if center point is in ROI
-            center_x = (x1 + x2) // 2
-            center_y = (y1 + y2) // 2
-            
-            if is_point_in_polygon((center_x, center_y), roi_polygon):
-                cls_id = int(box.cls)
-                class_name = model_manager.obstacle_model.names[cls_id]
-                conf = float(box.conf)
-                
-                obstacles_in_roi.append({
-                    'type': 'obstacle',
-                    'class': class_name,
-                    'bbox': [x1, y1, x2, y2],
-                    'confidence': conf,
-                    'in_roi': True
-                })
-        
-        return obstacles_in_roi
+        return obstacles
         
     except Exception as e:
         print(f"❌ Error in obstacle detection: {e}")
-        return []
\ No newline at end of file
+        return obstacles
+
+
+def filter_obstacles_in_roi(obstacle_result, camera_id):
+    """
+    Keep only obstacle boxes whose center is inside the camera ROI
+    
+    Args:
+        obstacle_result: YOLO result for a single frame
+        camera_id: Camera ID for ROI zone selection
+        
+    Returns:
+        list: List of obstacle detections
+    """
+    if len(obstacle_result.boxes) == 0:
+        return []
+    
+    # Filter detections that are inside ROI
+    roi_polygon = ROI_ZONES[camera_id]
+    obstacles_in_roi = []
+    
+    for box in obstacle_result.boxes:
+        bbox = box.xyxy[0].cpu().numpy()
+        x1, y1, x2, y2 = map(int, bbox)
+        
+        # Check if center point is in ROI
+        center_x = (x1 + x2) // 2
+        center_y = (y1 + y2) // 2
+        
+        if is_point_in_polygon((center_x, center_y), roi_polygon):
+            cls_id = int(box.cls)
+            class_name = model_manager.obstacle_model.names[cls_id]
+            conf = float(box.conf)
+            
+            obstacles_in_roi.append({
+                'type': 'obstacle',
+                'class': class_name,
+                'bbox': [x1, y1, x2, y2],
+                'confidence': conf,
+                'in_roi': True
+            })
+    
+    return obstacles_in_roi
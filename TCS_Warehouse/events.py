@@ -0,0 +1,158 @@
+"""
+Change notifications for dashboards:
+CameraManager pushes per-camera state (status, detections, alert flag,
+obstacle timer, NG totals) into the hub whenever it changes; the hub
+keeps the latest state, diffs it and fans each change out to every
+connected client's asyncio queue. Clients get a full snapshot on
+connect and after falling too far behind.
+Served as a WebSocket (/ws/events) and as Server-Sent Events (/events).
+"""
+import json
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+from config import EVENT_QUEUE_SIZE, EVENT_KEEPALIVE
+
+
+class EventHub:
+    """Latest per-camera state plus fan-out of changes to async subscribers"""
+
+    def __init__(self, queue_size=EVENT_QUEUE_SIZE):
+        self.queue_size = queue_size
+
+        self.camera_state = {}  # camera_id -> {field: value}
+        self.detections = {}    # camera_id -> detection list
+        self.version = 0
+        self.lock = threading.Lock()
+
+        # (event loop, asyncio.Queue) per client
+        self.subscribers = set()
+
+    def update_camera(self, camera_id, **fields):
+        """
+        Merge fields into a camera's state and broadcast only what changed
+
+        Returns:
+            dict: Changed fields (empty if nothing changed)
+        """
+        with self.lock:
+            state = self.camera_state.setdefault(camera_id, {})
+            changes = {k: v for k, v in fields.items() if state.get(k) != v}
+            if not changes:
+                return {}
+
+            state.update(changes)
+            self.version += 1
+            message = {"type": "camera", "camera_id": camera_id, "version": self.version, "changes": changes}
+
+        self._broadcast(message)
+        return changes
+
+    def update_detections(self, camera_id, detections):
+        """Store a camera's detections and broadcast them if they differ from the last ones"""
+        with self.lock:
+            if self.detections.get(camera_id) == detections:
+                return False
+
+            self.detections[camera_id] = detections
+            self.version += 1
+            message = {
+                "type": "detections",
+                "camera_id": camera_id,
+                "version": self.version,
+                "count": len(detections),
+                "detections": detections
+            }
+
+        self._broadcast(message)
+        return True
+
+    def snapshot(self, include_detections=True):
+        """Full state message for new or resynchronising clients"""
+        with self.lock:
+            message = {
+                "type": "snapshot",
+                "version": self.version,
+                "cameras": {cid: dict(state) for cid, state in self.camera_state.items()}
+            }
+            if include_detections:
+                message["detections"] = {cid: list(d) for cid, d in self.detections.items()}
+            return message
+
+    @asynccontextmanager
+    async def subscription(self):
+        """Register an asyncio queue for the lifetime of a connection"""
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        subscriber = (loop, queue)
+
+        with self.lock:
+            self.subscribers.add(subscriber)
+        try:
+            yield queue
+        finally:
+            with self.lock:
+                self.subscribers.discard(subscriber)
+
+    async def sse_generator(self):
+        """
+        Async Server-Sent Events generator for StreamingResponse
+
+        Emits a full snapshot on connect, then one "camera" event per change
+        with only the changed fields. Detection lists are left to the
+        WebSocket; their count is already part of the camera state. Sends a
+        comment line after EVENT_KEEPALIVE idle seconds so proxies keep the
+        connection open.
+        """
+        async with self.subscription() as queue:
+            yield _sse(self.snapshot(include_detections=False))
+
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=EVENT_KEEPALIVE or None)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+
+                if message["type"] == "resync":
+                    message = self.snapshot(include_detections=False)
+                elif message["type"] != "camera":
+                    continue
+
+                yield _sse(message)
+
+    def get_subscriber_count(self):
+        with self.lock:
+            return len(self.subscribers)
+
+    def _broadcast(self, message):
+        """Hand a message to every subscriber's event loop (safe from any thread)"""
+        with self.lock:
+            subscribers = list(self.subscribers)
+
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(_offer, queue, message)
+            except RuntimeError:
+                # Event loop already closed
+                with self.lock:
+                    self.subscribers.discard((loop, queue))
+
+
+def _sse(message):
+    """Format a message as one SSE event (the version doubles as the event id)"""
+    return f"id: {message['version']}\nevent: {message['type']}\ndata: {json.dumps(message)}\n\n"
+
+
+def _offer(queue, message):
+    """Queue a message; a client that fell behind gets one resync instead of a backlog"""
+    if queue.full():
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait({"type": "resync"})
+        return
+    queue.put_nowait(message)
+
+
+# Global event hub instance
+event_hub = EventHub()
@@ -0,0 +1,193 @@
+"""
+Per-camera frame ring buffer in shared memory:
+Capture decodes straight into a preallocated slot. Readers get
+zero-copy views only through a lease, which pins the slot so capture
+skips it until the lease is released; everything else gets a copy.
+"""
+import threading
+from multiprocessing import shared_memory
+import numpy as np
+from config import FRAME_RING_SLOTS
+
+
+class FrameLease:
+    """
+    Keeps a ring slot from being overwritten until released
+
+    ring=None wraps a frame that is not in a ring (nothing to unpin).
+    """
+
+    def __init__(self, ring, generation, slot, seq, frame):
+        self.ring = ring
+        self.generation = generation
+        self.slot = slot
+        self.seq = seq
+        self.frame = frame
+        self._released = False
+
+    def release(self):
+        """Unpin the slot (safe to call more than once)"""
+        if not self._released:
+            self._released = True
+            if self.ring is not None:
+                self.ring._unpin(self.generation, self.slot)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+class FrameRingBuffer:
+    """Fixed number of preallocated frame slots with sequence numbers"""
+
+    def __init__(self, num_slots=FRAME_RING_SLOTS):
+        # Newest frame + one being written + one pinned by detection, at least
+        self.num_slots = max(3, num_slots)
+
+        self.shm = None
+        self.frames = None
+        self.shape = None
+        self.retired = []
+        self.generation = 0
+
+        self.slot_seq = [0] * self.num_slots
+        self.pins = [0] * self.num_slots
+        self.latest_slot = -1
+        self.write_slot = -1
+        self.seq = 0
+
+        self.lock = threading.Lock()
+
+    def _allocate(self, shape):
+        """(Re)allocate the slots for a new frame shape"""
+        if self.shm is not None:
+            # Readers may still hold views of the old block; unmap it on close()
+            self.retired.append(self.shm)
+            self.shm.unlink()
+
+        size = self.num_slots * int(np.prod(shape))
+        self.shm = shared_memory.SharedMemory(create=True, size=size)
+        self.frames = np.ndarray((self.num_slots, *shape), np.uint8, buffer=self.shm.buf)
+        self.shape = tuple(shape)
+        self.generation += 1
+
+        self.slot_seq = [0] * self.num_slots
+        self.pins = [0] * self.num_slots
+        self.latest_slot = -1
+        self.write_slot = -1
+
+    def begin_write(self, shape=None):
+        """
+        Get the slot the next frame should be decoded into
+
+        Args:
+            shape: Frame shape; (re)allocates the ring if it differs
+
+        Returns:
+            numpy view of a slot that is neither the newest frame nor pinned
+        """
+        with self.lock:
+            if shape is not None and tuple(shape) != self.shape:
+                self._allocate(shape)
+
+            if self.frames is None:
+                return None
+
+            for step in range(1, self.num_slots + 1):
+                slot = (self.write_slot + step) % self.num_slots
+                if slot != self.latest_slot and self.pins[slot] == 0:
+                    self.write_slot = slot
+                    return self.frames[slot]
+
+            raise RuntimeError("All frame ring slots are pinned")
+
+    def commit(self):
+        """
+        Publish the slot returned by begin_write() as the newest frame
+
+        Returns:
+            int: Sequence number of the frame
+        """
+        with self.lock:
+            self.seq += 1
+            self.slot_seq[self.write_slot] = self.seq
+            self.latest_slot = self.write_slot
+            return self.seq
+
+    def latest(self):
+        """
+        Copy of the newest frame (use lease_latest() for a zero-copy view)
+
+        Returns:
+            tuple: (seq, frame) or (0, None) before the first frame
+        """
+        lease = self.lease_latest()
+        if lease is None:
+            return 0, None
+        with lease:
+            return lease.seq, lease.frame.copy()
+
+    def latest_info(self):
+        """
+        Sequence number and shape of the newest frame, without touching its pixels
+
+        Returns:
+            tuple: (seq, shape) or (0, None) before the first frame
+        """
+        with self.lock:
+            if self.latest_slot < 0:
+                return 0, None
+            return self.slot_seq[self.latest_slot], self.shape
+
+    def lease_latest(self):
+        """
+        Pin the newest frame
+
+        Returns:
+            FrameLease or None before the first frame
+        """
+        with self.lock:
+            if self.latest_slot < 0:
+                return None
+            slot = self.latest_slot
+            self.pins[slot] += 1
+            return FrameLease(self, self.generation, slot, self.slot_seq[slot], self.frames[slot])
+
+    def locate(self, lease):
+        """
+        Where a leased frame lives in shared memory, so another process can map it
+
+        Returns:
+            tuple: (shm name, shape of the whole block, slot) or None if the ring was reallocated since
+        """
+        with self.lock:
+            if lease.ring is not self or lease.generation != self.generation or self.shm is None:
+                return None
+            return self.shm.name, self.frames.shape, lease.slot
+
+    def _unpin(self, generation, slot):
+        with self.lock:
+            # Leases from before a reallocation point at the retired block
+            if generation == self.generation and self.pins[slot] > 0:
+                self.pins[slot] -= 1
+
+    def close(self):
+        """Release the shared memory"""
+        with self.lock:
+            self.frames = None
+            blocks = self.retired + ([self.shm] if self.shm is not None else [])
+            if self.shm is not None:
+                self.shm.unlink()
+            self.shm = None
+            self.shape = None
+            self.retired = []
+            self.latest_slot = -1
+
+        for shm in blocks:
+            try:
+                shm.close()
+            except BufferError:
+                # A reader still holds a view; the mapping goes away with the process
+                pass
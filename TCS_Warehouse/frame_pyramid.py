@@ -0,0 +1,103 @@
+"""
+Pre-scaled frame pyramid:
+Each camera view keeps its display resolutions (DISPLAY_SIZES) for the
+current frame sequence, so streams and snapshots at the same size share
+one resize per frame instead of resizing per request.
+Also holds the letterbox helpers used to feed the person model a
+ready-made square input.
+"""
+import threading
+import cv2
+import numpy as np
+from config import DISPLAY_SIZES
+
+
+class FramePyramid:
+    """Display resolutions of one camera view, built at most once per frame sequence"""
+
+    def __init__(self, sizes=DISPLAY_SIZES):
+        self.sizes = sizes
+        self.key = None
+        self.levels = {}
+        self.lock = threading.Lock()
+
+    def get(self, seq, frame, level):
+        """
+        Get a level for the given frame
+
+        Args:
+            seq: Sequence number of frame
+            frame: Full-resolution frame (a leased or owned buffer, not written while this runs)
+            level: Key in DISPLAY_SIZES ('dual', 'single', 'thumb', ...)
+
+        Returns:
+            Resized frame (shared, treat as read-only)
+        """
+        # The detected view can show the raw frame and later its annotation under
+        # the same seq, so the buffer address is part of the key
+        key = (seq, frame.__array_interface__['data'][0])
+
+        with self.lock:
+            if key != self.key:
+                self.key = key
+                self.levels = {}
+
+            image = self.levels.get(level)
+            if image is None:
+                image = cv2.resize(frame, self.sizes[level], interpolation=cv2.INTER_AREA)
+                self.levels[level] = image
+
+            return image
+
+
+def letterbox(image, size=640, color=(114, 114, 114)):
+    """
+    Resize keeping aspect ratio and pad to a size x size square
+
+    Returns:
+        tuple: (letterboxed image, scale, (pad_x, pad_y))
+    """
+    h, w = image.shape[:2]
+    scale = min(size / h, size / w)
+    nh, nw = int(round(h * scale)), int(round(w * scale))
+
+    pad_x = (size - nw) // 2
+    pad_y = (size - nh) // 2
+
+    boxed = np.full((size, size, 3), color, np.uint8)
+    boxed[pad_y:pad_y + nh, pad_x:pad_x + nw] = cv2.resize(image, (nw, nh), interpolation=cv2.INTER_LINEAR)
+
+    return boxed, scale, (pad_x, pad_y)
+
+
+def unletterbox_result(result, scale, pad, orig_shape):
+    """
+    Map YOLO boxes predicted on a letterboxed image back to the original frame
+
+    The boxes tensor was created under torch.inference_mode and cannot be
+    written outside it, so the mapping runs on a copy that replaces the
+    result's boxes.
+
+    Args:
+        result: ultralytics Results for the letterboxed image (updated)
+        scale: Scale returned by letterbox()
+        pad: (pad_x, pad_y) returned by letterbox()
+        orig_shape: (h, w) of the original frame
+
+    Returns:
+        The same result
+    """
+    result.orig_shape = tuple(orig_shape[:2])
+
+    boxes = result.boxes
+    if boxes is None:
+        return result
+
+    data = boxes.data.clone()
+    if len(data):
+        data[:, [0, 2]] = ((data[:, [0, 2]] - pad[0]) / scale).clamp(0, orig_shape[1])
+        data[:, [1, 3]] = ((data[:, [1, 3]] - pad[1]) / scale).clamp(0, orig_shape[0])
+
+    # New Boxes with the original frame's shape
+    result.update(boxes=data)
+    return result
@@ -0,0 +1,326 @@
+"""
+Low-bitrate H.264 live stream (fragmented MP4):
+One local ffmpeg process per camera re-encodes the detected view at a
+fixed frame rate and writes fragmented MP4 to a pipe. The init segment
+(ftyp+moov) is kept for late joiners and every moof+mdat fragment is
+fanned out to all viewers, so each camera is encoded once no matter how
+many people watch. Encoders run only while someone is watching; no
+external media server is needed.
+"""
+import time
+import struct
+import asyncio
+import subprocess
+import threading
+from config import (
+    DISPLAY_SIZES, FFMPEG_PATH,
+    H264_LEVEL, H264_FPS, H264_BITRATE, H264_PRESET, H264_GOP_SECONDS,
+    H264_CLIENT_QUEUE, H264_IDLE_TIMEOUT, H264_STALL_TIMEOUT
+)
+from camera_manager import camera_manager
+
+
+def _read_exact(stream, size):
+    """Read exactly size bytes from an unbuffered pipe (short result only at end of stream)"""
+    chunks = []
+    while size > 0:
+        chunk = stream.read(size)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def read_mp4_box(stream):
+    """
+    Read one top-level MP4 box from a pipe
+
+    Returns:
+        tuple: (box type, full box bytes) or (None, None) at end of stream
+    """
+    header = _read_exact(stream, 8)
+    if len(header) < 8:
+        return None, None
+
+    size, box_type = struct.unpack(">I4s", header)
+    if size == 1:
+        # 64-bit largesize follows the type
+        extended = _read_exact(stream, 8)
+        if len(extended) < 8:
+            return None, None
+        size = struct.unpack(">Q", extended)[0]
+        header += extended
+    elif size == 0:
+        # Box runs to end of stream; never produced by ffmpeg's fragmented output
+        return box_type.decode('ascii', 'replace'), header + stream.read()
+
+    body = _read_exact(stream, size - len(header))
+    if len(body) < size - len(header):
+        return None, None
+
+    return box_type.decode('ascii', 'replace'), header + body
+
+
+def offer_fragment(queue, fragment):
+    """Queue a fragment; a client that fell behind skips to the newest one (each starts on a keyframe)"""
+    if queue.full():
+        while not queue.empty():
+            queue.get_nowait()
+    queue.put_nowait(fragment)
+
+
+class H264Encoder:
+    """Shared ffmpeg encoder for one camera's detected view"""
+
+    def __init__(self, camera_id):
+        self.camera_id = camera_id
+        self.level = H264_LEVEL
+        self.size = DISPLAY_SIZES[self.level]
+
+        self.process = None
+        self.init_segment = None
+        self.lock = threading.Lock()
+
+        # (event loop, asyncio.Queue) per client
+        self.subscribers = set()
+        self.last_subscriber_time = 0.0
+
+        # Statistics
+        self.frames_written = 0
+        self.fragments = 0
+        self.bytes_out = 0
+
+    def subscribe(self, loop, queue):
+        """Register a client queue; starts ffmpeg if needed"""
+        with self.lock:
+            self.subscribers.add((loop, queue))
+            self.last_subscriber_time = time.time()
+
+            if self.process is None or self.process.poll() is not None:
+                self._start()
+
+            return self.init_segment
+
+    def unsubscribe(self, loop, queue):
+        """Remove a client queue"""
+        with self.lock:
+            self.subscribers.discard((loop, queue))
+            self.last_subscriber_time = time.time()
+
+    def _start(self):
+        """Launch ffmpeg with its feeder and reader threads (lock held)"""
+        width, height = self.size
+        gop = max(1, int(H264_FPS * H264_GOP_SECONDS))
+
+        command = [
+            FFMPEG_PATH, '-loglevel', 'error', '-nostdin',
+            '-f', 'rawvideo', '-pix_fmt', 'bgr24', '-s', f'{width}x{height}', '-r', str(H264_FPS),
+            '-i', 'pipe:0',
+            '-an', '-c:v', 'libx264', '-preset', H264_PRESET, '-tune', 'zerolatency',
+            '-pix_fmt', 'yuv420p', '-profile:v', 'main',
+            '-b:v', H264_BITRATE, '-maxrate', H264_BITRATE, '-bufsize', H264_BITRATE,
+            '-g', str(gop), '-keyint_min', str(gop), '-sc_threshold', '0',
+            '-f', 'mp4', '-movflags', 'frag_keyframe+empty_moov+default_base_moof',
+            'pipe:1'
+        ]
+
+        try:
+            self.process = subprocess.Popen(
+                command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, bufsize=0
+            )
+        except Exception as e:
+            print(f"❌ [Camera {self.camera_id+1}] Cannot start ffmpeg ({FFMPEG_PATH}): {e}")
+            self.process = None
+            return
+
+        self.init_segment = None
+        threading.Thread(target=self._feed_thread, args=(self.process,), daemon=True).start()
+        threading.Thread(target=self._read_thread, args=(self.process,), daemon=True).start()
+        print(f"🎞️ [Camera {self.camera_id+1}] H.264 encoder started ({width}x{height} @ {H264_FPS} fps, {H264_BITRATE})")
+
+    def _stop(self, process):
+        """Terminate ffmpeg"""
+        try:
+            process.stdin.close()
+        except Exception:
+            pass
+        try:
+            process.wait(timeout=2)
+        except Exception:
+            process.kill()
+
+    def _feed_thread(self, process):
+        """
+        Write the detected view to ffmpeg at a constant frame rate
+
+        The detected view only changes once per detection, so the last
+        frame is repeated in between; repeated frames cost almost nothing
+        after encoding.
+        """
+        interval = 1.0 / H264_FPS
+        next_time = time.time()
+
+        while process.poll() is None and not camera_manager.stop_event.is_set():
+            with self.lock:
+                idle = not self.subscribers and time.time() - self.last_subscriber_time >= H264_IDLE_TIMEOUT
+                if idle and self.process is process:
+                    # Detach first so a new viewer starts a fresh process
+                    self.process = None
+            if idle:
+                break
+
+            _, frame = camera_manager.get_display_frame(self.camera_id, self.level, detected=True)
+            if frame is not None:
+                try:
+                    process.stdin.write(frame.tobytes())
+                    self.frames_written += 1
+                except (BrokenPipeError, OSError, ValueError):
+                    break
+
+            next_time += interval
+            delay = next_time - time.time()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                # Fell behind; don't try to catch up with a burst
+                next_time = time.time()
+
+        self._stop(process)
+        print(f"🎞️ [Camera {self.camera_id+1}] H.264 encoder stopped")
+
+    def _read_thread(self, process):
+        """Split ffmpeg's fragmented MP4 output into init segment and fragments"""
+        pending = []
+        header_done = False
+
+        while True:
+            box_type, box = read_mp4_box(process.stdout)
+            if box is None:
+                break
+
+            pending.append(box)
+
+            if not header_done:
+                # ftyp + moov
+                if box_type == 'moov':
+                    header_done = True
+                    with self.lock:
+                        if self.process is process:
+                            self.init_segment = b''.join(pending)
+                    pending = []
+                continue
+
+            # moof + mdat (+ any styp/sidx in front)
+            if box_type == 'mdat':
+                if self.process is process:
+                    self._publish(b''.join(pending))
+                pending = []
+
+    def _publish(self, fragment):
+        """Hand a fragment to every client's event loop"""
+        with self.lock:
+            subscribers = list(self.subscribers)
+            self.fragments += 1
+            self.bytes_out += len(fragment)
+
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(offer_fragment, queue, fragment)
+            except RuntimeError:
+                # Event loop already closed
+                self.unsubscribe(loop, queue)
+
+    def stop(self):
+        """Stop ffmpeg regardless of viewers"""
+        with self.lock:
+            process = self.process
+            self.process = None
+        if process is not None and process.poll() is None:
+            self._stop(process)
+
+
+class H264StreamHub:
+    """Owns one H.264 encoder per camera"""
+
+    def __init__(self):
+        self.encoders = {}
+        self.lock = threading.Lock()
+
+    def get(self, camera_id):
+        """Get (or create) the encoder for a camera"""
+        with self.lock:
+            if camera_id not in self.encoders:
+                self.encoders[camera_id] = H264Encoder(camera_id)
+            return self.encoders[camera_id]
+
+    async def fmp4_generator(self, camera_id):
+        """
+        Async fragmented MP4 generator for StreamingResponse
+
+        Sends the init segment, then every fragment from the next keyframe on.
+        Ends the response once its ffmpeg process exits or is replaced (a new
+        process needs a new init segment), so the client reconnects.
+        """
+        encoder = self.get(camera_id)
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=H264_CLIENT_QUEUE)
+
+        init_segment = encoder.subscribe(loop, queue)
+        process = encoder.process
+        try:
+            # Wait for ffmpeg to write the header on a fresh start
+            for _ in range(100):
+                if init_segment is not None:
+                    break
+                if encoder.process is None:
+                    return
+                await asyncio.sleep(0.05)
+                init_segment = encoder.init_segment
+
+            if init_segment is None:
+                print(f"⚠️ [Camera {camera_id+1}] H.264 encoder produced no header")
+                return
+
+            yield init_segment
+
+            while True:
+                try:
+                    fragment = await asyncio.wait_for(queue.get(), timeout=H264_STALL_TIMEOUT)
+                except asyncio.TimeoutError:
+                    if process is None or encoder.process is not process or process.poll() is not None:
+                        print(f"⚠️ [Camera {camera_id+1}] H.264 encoder gone, closing stream")
+                        return
+                    continue
+                yield fragment
+        finally:
+            encoder.unsubscribe(loop, queue)
+
+    def stop(self):
+        """Stop all encoders"""
+        with self.lock:
+            encoders = list(self.encoders.values())
+        for encoder in encoders:
+            encoder.stop()
+
+    def get_statistics(self):
+        """Viewers and output per encoder"""
+        with self.lock:
+            encoders = list(self.encoders.values())
+
+        return [
+            {
+                "camera_id": e.camera_id,
+                "size": f"{e.size[0]}x{e.size[1]}",
+                "running": e.process is not None and e.process.poll() is None,
+                "subscribers": len(e.subscribers),
+                "frames_written": e.frames_written,
+                "fragments": e.fragments,
+                "mbytes_out": round(e.bytes_out / 1e6, 1)
+            }
+            for e in encoders
+        ]
+
+
+# Global H.264 stream hub instance
+h264_stream_hub = H264StreamHub()
@@ -0,0 +1,424 @@
+"""
+Multi-process inference:
+A pool of worker processes, each with its own ModelManager, so Python
+pre/post-processing (cropping, box loops, drawing) runs outside the
+main process's GIL.
+Workers read frames straight from the camera's ring buffer slot
+(pinned by the caller's lease) and write annotated frames into one
+shared-memory output slot per camera; only the small task/result tuples
+are pickled. Frames that are not in a ring are copied into a per-camera
+input slot instead. Each camera has at most one frame in flight, so one
+slot per camera is enough.
+"""
+import os
+import sys
+import time
+import queue
+import threading
+import itertools
+from contextlib import contextmanager
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import numpy as np
+from config import (
+    CAM_URLS, INFERENCE_WORKERS, INFERENCE_BATCH_SIZE,
+    INFERENCE_TIMEOUT, INFERENCE_WORKER_START_TIMEOUT
+)
+
+
+def _attach_shared_memory(name):
+    """Attach to a block created by the parent without letting this process unlink it"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13: attaching registers the block with this process's resource tracker
+        shm = shared_memory.SharedMemory(name=name)
+        try:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+        return shm
+
+
+def _free(blocks):
+    """Close and unlink shared-memory blocks created by this process (None entries are skipped)"""
+    for shm in blocks:
+        if shm is not None:
+            shm.close()
+            shm.unlink()
+
+
+@contextmanager
+def _main_module_hidden():
+    """
+    Start spawned processes without re-running the parent's main script
+
+    A spawned child imports the parent's __main__ (as __mp_main__) before
+    its target runs. Started as `python main.py`, that would build the app
+    and a CameraManager in every worker; the workers only need this module
+    and detection. Process.start() reads __main__ synchronously, so hiding
+    its file/spec for the duration of the start is enough.
+    """
+    main_module = sys.modules.get('__main__')
+    saved = {name: main_module.__dict__[name] for name in ('__file__', '__spec__')
+             if main_module is not None and name in main_module.__dict__}
+
+    for name in saved:
+        if name == '__spec__':
+            main_module.__spec__ = None
+        else:
+            del main_module.__dict__[name]
+    try:
+        yield
+    finally:
+        main_module.__dict__.update(saved)
+
+
+def _worker_main(worker_id, task_queue, result_queue, num_threads):
+    """
+    Worker process: load the models, then run batches of tasks until a None task arrives
+
+    Task:   (task_id, camera_id, (in_name, in_block_shape, slot or None), out_name, shape, full)
+    Result: (task_id, detections, has_ng, has_obstacle, person_count, annotated_in_shm, annotated_or_None, error)
+    """
+    import cv2
+    import torch
+
+    torch.set_num_threads(num_threads)
+    cv2.setNumThreads(1)
+
+    # This process's own ModelManager (lazy when INFERENCE_WORKERS > 0)
+    from models import model_manager
+    model_manager.load()
+    from detection import detect_and_classify_batch
+
+    attached = {}  # camera_id -> {shm name: shm}
+
+    def get_views(camera_id, in_ref, out_name, shape):
+        in_name, in_shape, slot = in_ref
+        blocks = attached.get(camera_id, {})
+        if set(blocks) != {in_name, out_name}:
+            # Ring or slots reallocated: drop the blocks this camera no longer uses
+            for name in set(blocks) - {in_name, out_name}:
+                blocks.pop(name).close()
+            for name in {in_name, out_name} - set(blocks):
+                blocks[name] = _attach_shared_memory(name)
+            attached[camera_id] = blocks
+
+        frame = np.ndarray(in_shape, np.uint8, buffer=blocks[in_name].buf)
+        if slot is not None:
+            frame = frame[slot]
+        return frame, np.ndarray(shape, np.uint8, buffer=blocks[out_name].buf)
+
+    result_queue.put(("ready", worker_id))
+
+    stopping = False
+    while not stopping:
+        task = task_queue.get()
+        if task is None:
+            break
+
+        # Drain whatever else is already waiting into the same batch
+        tasks = [task]
+        while len(tasks) < INFERENCE_BATCH_SIZE:
+            try:
+                task = task_queue.get_nowait()
+            except queue.Empty:
+                break
+            if task is None:
+                stopping = True
+                break
+            tasks.append(task)
+
+        try:
+            views = [get_views(t[1], t[2], t[3], t[4]) for t in tasks]
+            results = detect_and_classify_batch(
+                [v[0] for v in views],
+                [t[1] for t in tasks],
+                [t[5] for t in tasks]
+            )
+
+            for t, (_, out_view), (annotated, detections, has_ng, has_obstacle, person_count) in zip(tasks, views, results):
+                if annotated is not None and annotated.shape == out_view.shape:
+                    np.copyto(out_view, annotated)
+                    result_queue.put((t[0], detections, has_ng, has_obstacle, person_count, True, None, None))
+                else:
+                    result_queue.put((t[0], detections, has_ng, has_obstacle, person_count, False, annotated, None))
+
+        except Exception as e:
+            for t in tasks:
+                result_queue.put((t[0], None, False, False, 0, False, None, f"{type(e).__name__}: {e}"))
+
+        finally:
+            # No views may outlive the batch: get_views() closes blocks a camera stopped using
+            views = results = out_view = annotated = None
+
+    for blocks in attached.values():
+        for shm in blocks.values():
+            shm.close()
+
+
+class _PendingTask:
+    """A frame handed to the pool, waiting for its result"""
+
+    def __init__(self, camera_id, out_view):
+        self.camera_id = camera_id
+        self.out_view = out_view
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class InferencePool:
+    """Runs 3-stage detection in worker processes; same infer() interface as InferenceScheduler"""
+
+    def __init__(self, num_workers=INFERENCE_WORKERS):
+        self.num_workers = num_workers
+        # Frames processed concurrently, used to express the backlog as a queue depth
+        self.max_batch_size = max(1, num_workers)
+
+        self.ctx = mp.get_context("spawn")
+        self.task_queue = None
+        self.result_queue = None
+        self.workers = []
+
+        # Shared-memory slots per camera: camera_id -> (shape, in_shm or None, out_shm)
+        self.slots = {}
+        self.slot_lock = threading.Lock()
+        # Slots of timed-out tasks a worker may still use: task_id -> (in_shm, out_shm)
+        self.retired_slots = {}
+
+        self.pending = {}
+        self.pending_lock = threading.Lock()
+        self.task_ids = itertools.count()
+
+        # Control
+        self.ready_workers = 0
+        self.ready_event = threading.Event()
+        self.stop_event = threading.Event()
+        self.listener = None
+
+        # Statistics
+        self.frames_run = 0
+        self.last_latency = 0.0
+
+    def start(self):
+        """Spawn the worker processes (models load in the background)"""
+        if self.workers:
+            return
+
+        # Each camera has at most one frame in flight, so at most one worker per camera is busy at once
+        busy_workers = max(1, min(self.num_workers, len(CAM_URLS)))
+        cores = os.cpu_count() or 1
+        num_threads = max(1, cores // busy_workers)
+
+        # Children read these at import time; keep one worker from claiming every core
+        os.environ.setdefault("OMP_NUM_THREADS", str(num_threads))
+        os.environ.setdefault("ONNX_INTRA_OP_THREADS", str(num_threads))
+
+        self.stop_event.clear()
+        self.task_queue = self.ctx.Queue()
+        self.result_queue = self.ctx.Queue()
+
+        with _main_module_hidden():
+            for worker_id in range(self.num_workers):
+                process = self.ctx.Process(
+                    target=_worker_main,
+                    args=(worker_id, self.task_queue, self.result_queue, num_threads),
+                    daemon=True
+                )
+                process.start()
+                self.workers.append(process)
+
+        self.listener = threading.Thread(target=self._result_thread, daemon=True)
+        self.listener.start()
+
+        print(f"✅ Inference pool started ({self.num_workers} workers × {num_threads} threads)")
+        if self.num_workers > len(CAM_URLS):
+            print(f"⚠️ {self.num_workers} inference workers for {len(CAM_URLS)} cameras: "
+                  f"at most {len(CAM_URLS)} are busy at a time")
+
+    def stop(self):
+        """Stop the workers, fail waiting requests and release shared memory"""
+        self.stop_event.set()
+
+        if self.task_queue is not None:
+            for _ in self.workers:
+                self.task_queue.put(None)
+
+        for process in self.workers:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self.workers = []
+
+        if self.listener is not None:
+            self.listener.join(timeout=2)
+
+        with self.pending_lock:
+            for task in self.pending.values():
+                task.error = RuntimeError("Inference pool stopped")
+                task.done.set()
+            self.pending.clear()
+
+        with self.slot_lock:
+            for _, *blocks in self.slots.values():
+                _free(blocks)
+            self.slots.clear()
+
+            for blocks in self.retired_slots.values():
+                _free(blocks)
+            self.retired_slots.clear()
+
+    def _get_slots(self, camera_id, shape, need_input):
+        """
+        Shared-memory slots for a camera, reallocated if the frame size changes
+
+        The input slot is only created once a frame that is not in a ring arrives.
+        """
+        with self.slot_lock:
+            slots = self.slots.get(camera_id)
+            if slots is not None and slots[0] == shape and (slots[1] is not None or not need_input):
+                return slots
+
+            size = int(np.prod(shape))
+            if slots is not None and slots[0] == shape:
+                # Same size, first copied frame: keep the output slot
+                slots = (shape, shared_memory.SharedMemory(create=True, size=size), slots[2])
+            else:
+                if slots is not None:
+                    _free(slots[1:])
+                slots = (shape,
+                         shared_memory.SharedMemory(create=True, size=size) if need_input else None,
+                         shared_memory.SharedMemory(create=True, size=size))
+            self.slots[camera_id] = slots
+            return slots
+
+    def infer(self, frame, camera_id, full=True, lease=None):
+        """
+        Hand a frame to the pool and wait for its result
+
+        Args:
+            frame: Input frame (BGR uint8)
+            camera_id: Camera ID
+            full: False to run only the obstacle model
+            lease: FrameLease pinning frame in its ring for the duration of the call;
+                   the worker then maps the ring slot instead of receiving a copy
+
+        Returns:
+            tuple: (annotated_frame, detections, has_ng, has_obstacle, person_count)
+        """
+        if not self.ready_event.wait(INFERENCE_WORKER_START_TIMEOUT):
+            raise TimeoutError("No inference worker became ready")
+
+        in_ref = lease.ring.locate(lease) if lease is not None and lease.ring is not None else None
+
+        shape, in_shm, out_shm = self._get_slots(camera_id, frame.shape, need_input=in_ref is None)
+        if in_ref is None:
+            np.copyto(np.ndarray(shape, np.uint8, buffer=in_shm.buf), frame)
+            in_ref = (in_shm.name, shape, None)
+
+        task_id = next(self.task_ids)
+        task = _PendingTask(camera_id, np.ndarray(shape, np.uint8, buffer=out_shm.buf))
+
+        with self.pending_lock:
+            self.pending[task_id] = task
+
+        start = time.time()
+        self.task_queue.put((task_id, camera_id, in_ref, out_shm.name, shape, full))
+
+        if not task.done.wait(INFERENCE_TIMEOUT):
+            with self.pending_lock:
+                # Retire under pending_lock so a late result always finds the slots registered
+                timed_out = self.pending.pop(task_id, None) is not None
+                if timed_out:
+                    self._retire_slots(camera_id, task_id)
+            if timed_out:
+                raise TimeoutError(f"Inference timed out after {INFERENCE_TIMEOUT}s")
+            # The result thread took the task just as the wait expired; it is about to finish
+            task.done.wait()
+
+        self.last_latency = time.time() - start
+
+        if task.error is not None:
+            raise task.error
+
+        return task.result
+
+    def _retire_slots(self, camera_id, task_id):
+        """
+        Take a timed-out task's slots away from its camera
+
+        The worker may still be reading the input or writing the output,
+        so the camera's next frame gets fresh slots and these stay mapped
+        until the late result for task_id arrives (or the pool stops).
+        A ring slot it may still be reading is released with the caller's
+        lease; the late result is discarded either way.
+        """
+        with self.slot_lock:
+            slots = self.slots.pop(camera_id, None)
+            if slots is not None:
+                self.retired_slots[task_id] = slots[1:]
+
+    def _release_retired(self, task_id):
+        """Free the slots of a timed-out task once its worker is done with them"""
+        with self.slot_lock:
+            slots = self.retired_slots.pop(task_id, None)
+        if slots is not None:
+            _free(slots)
+
+    def get_pending_count(self):
+        """Number of frames handed to the pool and not yet returned"""
+        with self.pending_lock:
+            return len(self.pending)
+
+    def get_statistics(self):
+        """Get pool statistics"""
+        return {
+            "workers": self.num_workers,
+            "workers_alive": sum(1 for p in self.workers if p.is_alive()),
+            "workers_ready": self.ready_workers,
+            "frames_run": self.frames_run,
+            "last_latency": round(self.last_latency, 3),
+            "pending": self.get_pending_count()
+        }
+
+    def _result_thread(self):
+        """Match worker results to waiting requests"""
+        while not self.stop_event.is_set():
+            try:
+                message = self.result_queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                break
+
+            if message[0] == "ready":
+                self.ready_workers += 1
+                self.ready_event.set()
+                continue
+
+            task_id, detections, has_ng, has_obstacle, person_count, in_shm, annotated, error = message
+
+            with self.pending_lock:
+                task = self.pending.pop(task_id, None)
+            if task is None:
+                # Late result of a timed-out task: its slots can go now
+                self._release_retired(task_id)
+                continue
+
+            if error is not None:
+                task.error = RuntimeError(error)
+            else:
+                # Copy out: the slot is reused by this camera's next frame
+                if in_shm:
+                    annotated = task.out_view.copy()
+                task.result = (annotated, detections, has_ng, has_obstacle, person_count)
+                self.frames_run += 1
+
+            task.done.set()
+
+
+# Global inference pool instance (only started when INFERENCE_WORKERS > 0)
+inference_pool = InferencePool(num_workers=max(1, INFERENCE_WORKERS))
@@ -0,0 +1,172 @@
+"""
+Batched cross-camera inference:
+Camera threads submit frames, one scheduler thread gathers pending frames
+from all cameras (up to a max-wait deadline) and runs the 3-stage models
+on them as a single batch.
+"""
+import time
+import threading
+from config import (
+    CAM_URLS,
+    INFERENCE_BATCH_SIZE, INFERENCE_BATCH_MAX_WAIT, INFERENCE_TIMEOUT
+)
+from detection import detect_and_classify_batch
+
+
+class InferenceRequest:
+    """A single frame waiting for its batch to run"""
+
+    def __init__(self, frame, camera_id, full=True):
+        self.frame = frame
+        self.camera_id = camera_id
+        self.full = full
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class InferenceScheduler:
+    """Collects frames from all cameras and runs them through the models in batches"""
+
+    def __init__(self, max_batch_size=INFERENCE_BATCH_SIZE, max_wait=INFERENCE_BATCH_MAX_WAIT):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+
+        self.pending = []
+        self.condition = threading.Condition()
+
+        # Control
+        self.stop_event = threading.Event()
+        self.thread = None
+
+        # Statistics
+        self.batches_run = 0
+        self.frames_run = 0
+        self.last_batch_time = 0.0
+
+    def start(self):
+        """Start the scheduler thread"""
+        if self.thread is not None and self.thread.is_alive():
+            return
+
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._scheduler_thread, daemon=True)
+        self.thread.start()
+        print(f"✅ Inference scheduler started (batch ≤ {self.max_batch_size}, wait ≤ {self.max_wait*1000:.0f} ms)")
+
+    def stop(self):
+        """Stop the scheduler thread and fail any waiting requests"""
+        self.stop_event.set()
+        with self.condition:
+            self.condition.notify_all()
+
+        if self.thread is not None:
+            self.thread.join(timeout=2)
+
+        with self.condition:
+            for request in self.pending:
+                request.error = RuntimeError("Inference scheduler stopped")
+                request.done.set()
+            self.pending.clear()
+
+    def infer(self, frame, camera_id, full=True):
+        """
+        Submit a frame and wait until its batch has been processed
+
+        Args:
+            frame: Input frame
+            camera_id: Camera ID
+            full: False to run only the obstacle model on this frame
+
+        Returns:
+            tuple: (annotated_frame, detections, has_ng, has_obstacle, person_count)
+        """
+        request = InferenceRequest(frame, camera_id, full)
+
+        with self.condition:
+            self.pending.append(request)
+            self.condition.notify_all()
+
+        if not request.done.wait(INFERENCE_TIMEOUT):
+            with self.condition:
+                if request in self.pending:
+                    self.pending.remove(request)
+            raise TimeoutError(f"Inference timed out after {INFERENCE_TIMEOUT}s")
+
+        if request.error is not None:
+            raise request.error
+
+        return request.result
+
+    def get_pending_count(self):
+        """Number of frames waiting for a batch"""
+        with self.condition:
+            return len(self.pending)
+
+    def get_statistics(self):
+        """Get batching statistics"""
+        return {
+            "batches_run": self.batches_run,
+            "frames_run": self.frames_run,
+            "avg_batch_size": round(self.frames_run / self.batches_run, 2) if self.batches_run else 0,
+            "last_batch_time": round(self.last_batch_time, 3),
+            "pending": self.get_pending_count()
+        }
+
+    def _collect_batch(self):
+        """Wait for pending frames and return up to max_batch_size of them"""
+        with self.condition:
+            while not self.pending and not self.stop_event.is_set():
+                self.condition.wait(timeout=0.5)
+
+            if self.stop_event.is_set():
+                return []
+
+            # Give the other cameras until the deadline to join this batch
+            deadline = time.time() + self.max_wait
+            while len(self.pending) < self.max_batch_size and not self.stop_event.is_set():
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                self.condition.wait(timeout=remaining)
+
+            batch = self.pending[:self.max_batch_size]
+            del self.pending[:self.max_batch_size]
+            return batch
+
+    def _scheduler_thread(self):
+        """Run batches until stopped"""
+        while not self.stop_event.is_set():
+            batch = self._collect_batch()
+            if not batch:
+                continue
+
+            try:
+                batch_start = time.time()
+
+                results = detect_and_classify_batch(
+                    [request.frame for request in batch],
+                    [request.camera_id for request in batch],
+                    [request.full for request in batch]
+                )
+
+                self.last_batch_time = time.time() - batch_start
+                self.batches_run += 1
+                self.frames_run += len(batch)
+
+                for request, result in zip(batch, results):
+                    request.result = result
+                    request.done.set()
+
+            except Exception as e:
+                print(f"❌ Batch inference error ({len(batch)} frames): {e}")
+                for request in batch:
+                    request.error = e
+                    request.done.set()
+
+
+# Global inference scheduler instance
+# Each camera has at most one frame in flight, so a batch never needs more slots than cameras
+inference_scheduler = InferenceScheduler(
+    max_batch_size=max(1, min(INFERENCE_BATCH_SIZE, len(CAM_URLS)))
+)
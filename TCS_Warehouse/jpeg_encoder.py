@@ -0,0 +1,120 @@
+"""
+JPEG encoding shared by the streams, snapshots and NG image saving:
+Uses libjpeg-turbo through simplejpeg or PyTurboJPEG when installed
+(chroma subsampling and fast DCT configurable), falling back to OpenCV.
+"""
+import numpy as np
+import cv2
+from config import JPEG_ENCODER, JPEG_FAST_DCT, JPEG_SUBSAMPLING
+
+JPEG_ENCODERS = ('simplejpeg', 'turbojpeg', 'opencv')
+
+
+class JpegEncoder:
+    """Encodes BGR images to JPEG bytes with one of the available backends"""
+
+    def __init__(self, backend=JPEG_ENCODER, fast_dct=JPEG_FAST_DCT, subsampling=JPEG_SUBSAMPLING):
+        """
+        Args:
+            backend: 'auto' or one of JPEG_ENCODERS
+            fast_dct: Use the faster, slightly less accurate integer DCT
+            subsampling: Chroma subsampling '444', '422' or '420'
+        """
+        self.fast_dct = fast_dct
+        self.subsampling = subsampling
+
+        self._simplejpeg = None
+        self._turbojpeg = None
+        self.backend = self._select_backend(backend)
+
+    def _select_backend(self, backend):
+        """Pick the requested backend, or the fastest installed one for 'auto'"""
+        candidates = JPEG_ENCODERS if backend == 'auto' else (backend,)
+
+        for candidate in candidates:
+            try:
+                if candidate == 'simplejpeg':
+                    import simplejpeg
+                    self._simplejpeg = simplejpeg
+                elif candidate == 'turbojpeg':
+                    from turbojpeg import TurboJPEG
+                    self._turbojpeg = TurboJPEG()
+                elif candidate != 'opencv':
+                    raise ValueError(f"Unknown JPEG encoder '{candidate}'")
+                return candidate
+            except Exception as e:
+                if backend != 'auto':
+                    print(f"⚠️ JPEG encoder '{candidate}' unavailable ({e}), using OpenCV")
+
+        return 'opencv'
+
+    def encode(self, image, quality=85):
+        """
+        Encode a BGR image
+
+        Args:
+            image: BGR uint8 image
+            quality: JPEG quality (1-100)
+
+        Returns:
+            bytes: JPEG data
+        """
+        if self.backend == 'simplejpeg':
+            return self._simplejpeg.encode_jpeg(
+                np.ascontiguousarray(image),
+                quality=quality,
+                colorspace='BGR',
+                colorsubsampling=self.subsampling,
+                fastdct=self.fast_dct
+            )
+
+        if self.backend == 'turbojpeg':
+            from turbojpeg import TJSAMP_444, TJSAMP_422, TJSAMP_420, TJFLAG_FASTDCT
+            samp = {'444': TJSAMP_444, '422': TJSAMP_422, '420': TJSAMP_420}[self.subsampling]
+            return self._turbojpeg.encode(
+                np.ascontiguousarray(image),
+                quality=quality,
+                jpeg_subsample=samp,
+                flags=TJFLAG_FASTDCT if self.fast_dct else 0
+            )
+
+        params = [cv2.IMWRITE_JPEG_QUALITY, quality]
+        sampling = getattr(cv2, f"IMWRITE_JPEG_SAMPLING_FACTOR_{self.subsampling}", None)
+        if sampling is not None:
+            params += [cv2.IMWRITE_JPEG_SAMPLING_FACTOR, sampling]
+
+        ok, buffer = cv2.imencode('.jpg', image, params)
+        if not ok:
+            raise RuntimeError("cv2.imencode failed")
+        return buffer.tobytes()
+
+    def write(self, path, image, quality=95):
+        """
+        Encode and save a BGR image
+
+        Returns:
+            bool: True on success
+        """
+        try:
+            data = self.encode(image, quality)
+            with open(path, 'wb') as f:
+                f.write(data)
+            return True
+        except Exception as e:
+            print(f"❌ Error writing JPEG {path}: {e}")
+            return False
+
+
+# Global JPEG encoder instance
+jpeg_encoder = JpegEncoder()
+print(f"🖼️  JPEG encoder: {jpeg_encoder.backend}")
+
+
+def encode_jpeg(image, quality=85):
+    """Encode a BGR image with the configured encoder"""
+    return jpeg_encoder.encode(image, quality)
+
+
+def write_jpeg(path, image, quality=95):
+    """Save a BGR image as JPEG with the configured encoder"""
+    return jpeg_encoder.write(path, image, quality)
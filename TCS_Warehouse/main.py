@@ -1,9 +1,9 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi.encoders import jsonable_encoder
 from fastapi.responses import StreamingResponse, FileResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-import cv2
-import time
+import asyncio
 import os
 from pathlib import Path
 from datetime import datetime
@@ -13,14 +13,17 @@ from email.mime.text import MIMEText
 from email.utils import formataddr
 
 from config import (
-    API_HOST, API_PORT, API_TITLE,
-    CAM_URLS, DUAL_W, DUAL_H, SINGLE_W, SINGLE_H,
-    NG_SAVE_DIR,
-    ENABLE_EMAIL_ALERT, RECIPIENT_EMAILS, CC_EMAILS,
+    API_HOST, API_PORT, API_TITLE, INFERENCE_WORKERS,
+    CAM_URLS, NG_SAVE_DIR, SNAPSHOT_JPEG_QUALITY, ENABLE_H264_STREAM,
+    ENABLE_EMAIL_ALERT, RECIPIENT_EMAILS, CC_EMAILS, EVENT_KEEPALIVE,
     SMTP_SERVER, SMTP_PORT, SENDER_EMAIL, SENDER_PASSWORD, SENDER_NAME
 )
 from models import model_manager
 from camera_manager import camera_manager
+from streaming import stream_hub
+from events import event_hub
+from h264_stream import h264_stream_hub
+from jpeg_encoder import encode_jpeg
 
 
 # FASTAPI APP SETUP
@@ -43,8 +46,8 @@ async def startup_event():
     print(f"🚀 Starting Warehouse PPE Detection System")
     print(f"{'='*60}")
     
-    # Check if models are ready
-    if not model_manager.is_ready():
+    # Check if models are ready (worker processes load and report their own)
+    if INFERENCE_WORKERS == 0 and not model_manager.is_ready():
         print("❌ Models not loaded properly!")
         return
     
@@ -58,6 +61,7 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     """Stop camera system"""
+    h264_stream_hub.stop()
     camera_manager.stop()
 
 
@@ -75,7 +79,8 @@ async def root():
             "person_detection": model_manager.person_model is not None,
             "ppe_detection": model_manager.ppe_model is not None,
             "classification": model_manager.classification_model is not None,
-            "obstacle_detection": model_manager.obstacle_model is not None
+            "obstacle_detection": model_manager.obstacle_model is not None,
+            "loaded_in_workers": INFERENCE_WORKERS > 0
         },
         "cameras": len(CAM_URLS),
         "obstacle_alert_threshold": OBSTACLE_ALERT_THRESHOLD,
@@ -85,14 +90,18 @@ async def root():
             "GET /camera/{id} - Camera info",
             "GET /camera/{id}/stream - Original video stream",
             "GET /camera/{id}/stream/detected - Detected video stream",
+            "GET /camera/{id}/stream/h264 - Detected video stream (H.264 fragmented MP4)",
             "GET /camera/{id}/detections - Current detections",
+            "GET /camera/{id}/overlay - Detections + ROI for client-side annotation",
             "GET /camera/{id}/snapshot - Single frame",
             "GET /camera/{id}/alert - Check alert status",
             "GET /camera/{id}/obstacle - Check obstacle status with timing",
             "GET /obstacles/status - All cameras obstacle status",
             "GET /statistics - Detection statistics",
             "GET /ng-images - List saved NG images",
-            "GET /test/email - Test email alert"
+            "GET /test/email - Test email alert",
+            "WS /ws/events - Push detections, alerts and obstacle timers on change",
+            "GET /events - Camera status changes (Server-Sent Events)"
         ]
     }
 
@@ -102,14 +111,14 @@ async def get_cameras():
     """Get list of all cameras with status"""
     cameras = []
     for i in range(len(CAM_URLS)):
-        frame = camera_manager.get_latest_frame(i)
+        _, shape = camera_manager.get_frame_info(i)
         detections = camera_manager.get_detections(i)
         stats = camera_manager.get_statistics(i)
         
         cameras.append({
             "id": i,
             "url": CAM_URLS[i],
-            "status": "active" if frame is not None else "inactive",
+            "status": "active" if shape is not None else "inactive",
             "detections": len(detections),
             "ng_detected": stats["total_ng_detected"],
             "ng_saved": stats["images_saved"]
@@ -124,16 +133,16 @@ async def get_camera_info(camera_id: int):
     if camera_id < 0 or camera_id >= len(CAM_URLS):
         return {"error": "Invalid camera ID"}
     
-    frame = camera_manager.get_latest_frame(camera_id)
+    _, shape = camera_manager.get_frame_info(camera_id)
     detections = camera_manager.get_detections(camera_id)
     stats = camera_manager.get_statistics(camera_id)
     
-    height, width = frame.shape[:2] if frame is not None else (0, 0)
+    height, width = shape[:2] if shape is not None else (0, 0)
     
     return {
         "id": camera_id,
         "url": CAM_URLS[camera_id],
-        "status": "active" if frame is not None else "inactive",
+        "status": "active" if shape is not None else "inactive",
         "resolution": f"{width}x{height}",
         "detections": len(detections),
         "ng_detected": stats["total_ng_detected"],
@@ -147,28 +156,8 @@ async def video_stream(camera_id: int, single: bool = False):
     if camera_id < 0 or camera_id >= len(CAM_URLS):
         return {"error": "Invalid camera ID"}
     
-    target_w = SINGLE_W if single else DUAL_W
-    target_h = SINGLE_H if single else DUAL_H
-    
-    def generate():
-        while True:
-            frame = camera_manager.get_latest_frame(camera_id)
-            
-            if frame is None:
-                time.sleep(0.1)
-                continue
-            
-            resized = cv2.resize(frame, (target_w, target_h))
-            _, buffer = cv2.imencode('.jpg', resized, [cv2.IMWRITE_JPEG_QUALITY, 85])
-            frame_bytes = buffer.tobytes()
-            
-            yield (b'--frame\r\n'
-                   b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
-            
-            time.sleep(0.033)
-    
     return StreamingResponse(
-        generate(),
+        stream_hub.mjpeg_generator(camera_id, detected=False, single=single),
         media_type="multipart/x-mixed-replace; boundary=frame"
     )
 
@@ -179,51 +168,42 @@ async def video_stream_detected(camera_id: int, single: bool = False):
     if camera_id < 0 or camera_id >= len(CAM_URLS):
         return {"error": "Invalid camera ID"}
     
-    target_w = SINGLE_W if single else DUAL_W
-    target_h = SINGLE_H if single else DUAL_H
+    return StreamingResponse(
+        stream_hub.mjpeg_generator(camera_id, detected=True, single=single),
+        media_type="multipart/x-mixed-replace; boundary=frame"
+    )
+
+
+@app.get("/camera/{camera_id}/stream/h264")
+async def video_stream_h264(camera_id: int):
+    """Stream video with detections as low-bitrate H.264 (fragmented MP4, plays in <video>)"""
+    if not ENABLE_H264_STREAM:
+        return {"error": "H.264 stream is disabled in config"}
     
-    def generate():
-        while True:
-            frame = camera_manager.get_detected_frame(camera_id)
-            
-            if frame is None:
-                time.sleep(0.1)
-                continue
-            
-            resized = cv2.resize(frame, (target_w, target_h))
-            _, buffer = cv2.imencode('.jpg', resized, [cv2.IMWRITE_JPEG_QUALITY, 85])
-            frame_bytes = buffer.tobytes()
-            
-            yield (b'--frame\r\n'
-                   b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
-            
-            time.sleep(0.033)
+    if camera_id < 0 or camera_id >= len(CAM_URLS):
+        return {"error": "Invalid camera ID"}
     
     return StreamingResponse(
-        generate(),
-        media_type="multipart/x-mixed-replace; boundary=frame"
+        h264_stream_hub.fmp4_generator(camera_id),
+        media_type='video/mp4',
+        headers={"Cache-Control": "no-cache"}
     )
 
 
 @app.get("/camera/{camera_id}/snapshot")
-async def get_snapshot(camera_id: int, detected: bool = False, single: bool = False):
+async def get_snapshot(camera_id: int, detected: bool = False, single: bool = False, thumb: bool = False):
     """Get single frame as JPEG"""
     if camera_id < 0 or camera_id >= len(CAM_URLS):
         return {"error": "Invalid camera ID"}
     
-    frame = camera_manager.get_detected_frame(camera_id) if detected else camera_manager.get_latest_frame(camera_id)
+    level = 'thumb' if thumb else 'single' if single else 'dual'
+    _, resized = camera_manager.get_display_frame(camera_id, level, detected)
     
-    if frame is None:
+    if resized is None:
         return {"error": "No frame available"}
     
-    target_w = SINGLE_W if single else DUAL_W
-    target_h = SINGLE_H if single else DUAL_H
-    
-    resized = cv2.resize(frame, (target_w, target_h))
-    _, buffer = cv2.imencode('.jpg', resized, [cv2.IMWRITE_JPEG_QUALITY, 90])
-    
     return StreamingResponse(
-        iter([buffer.tobytes()]),
+        iter([encode_jpeg(resized, SNAPSHOT_JPEG_QUALITY)]),
         media_type="image/jpeg"
     )
 
@@ -249,13 +229,23 @@ async def get_detections(camera_id: int):
     }
 
 
+@app.get("/camera/{camera_id}/overlay")
+async def get_overlay(camera_id: int):
+    """Get detection boxes, ROI polygons and frame size for drawing annotations on the client"""
+    overlay = camera_manager.get_overlay(camera_id)
+    if overlay is None:
+        return {"error": "Invalid camera ID"}
+    
+    return overlay
+
+
 @app.get("/camera/{camera_id}/alert")
 async def check_alert(camera_id: int):
     """Check if there's a recent alert"""
     if camera_id < 0 or camera_id >= len(CAM_URLS):
         return {"error": "Invalid camera ID"}
     
-    has_alert = camera_manager.has_recent_alert(camera_id, threshold_seconds=3)
+    has_alert = camera_manager.has_recent_alert(camera_id)
     
     return {
         "camera_id": camera_id,
@@ -315,10 +305,86 @@ async def get_statistics():
     
     return {
         **stats,
+        "streams": stream_hub.get_statistics(),
+        "h264_streams": h264_stream_hub.get_statistics(),
+        "event_subscribers": event_hub.get_subscriber_count(),
+        "inference": camera_manager.get_inference_statistics(),
         "save_directory": str(NG_SAVE_DIR.absolute())
     }
 
 
+@app.websocket("/ws/events")
+async def events_websocket(websocket: WebSocket):
+    """
+    Push channel replacing /cameras, /camera/{id}/detections and alert polling
+    
+    Sends a "snapshot" message on connect, then "camera" (changed fields
+    only) and "detections" messages whenever CameraManager reports a change.
+    """
+    await websocket.accept()
+    
+    # Clients never send anything, but reading is the only way to see them leave
+    receiver = asyncio.create_task(receive_until_disconnect(websocket))
+    
+    try:
+        async with event_hub.subscription() as queue:
+            await websocket.send_json(jsonable_encoder(event_hub.snapshot()))
+            
+            while True:
+                getter = asyncio.ensure_future(queue.get())
+                done, _ = await asyncio.wait(
+                    {getter, receiver}, timeout=EVENT_KEEPALIVE or None,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                
+                if receiver in done:
+                    getter.cancel()
+                    break
+                
+                if getter not in done:
+                    # Idle: a ping fails fast on a dead connection that never sent a close
+                    getter.cancel()
+                    await websocket.send_json({"type": "ping"})
+                    continue
+                
+                message = getter.result()
+                if message["type"] == "resync":
+                    message = event_hub.snapshot()
+                await websocket.send_json(jsonable_encoder(message))
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        print(f"⚠️ Event socket closed: {e}")
+    finally:
+        receiver.cancel()
+
+
+async def receive_until_disconnect(websocket: WebSocket):
+    """Read and discard client messages; returns once the client disconnects"""
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+    except Exception:
+        return
+
+
+@app.get("/events")
+async def events_stream():
+    """
+    Server-Sent Events alternative to polling /obstacles/status and /statistics
+    
+    A "snapshot" event on connect, then "camera" events carrying only the
+    fields that changed (detections count, NG totals, obstacle timer, alert flags).
+    """
+    return StreamingResponse(
+        event_hub.sse_generator(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @app.get("/ng-images")
 async def list_ng_images():
     """List all saved NG images"""
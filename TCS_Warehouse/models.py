@@ -1,32 +1,47 @@
-from ultralytics import YOLO
+import threading
 import torch
 from config import (
     PERSON_MODEL_PATH, PPE_MODEL_PATH, CLASSIFICATION_MODEL_PATH,
     OBSTACLE_MODEL_PATH, ENABLE_OBSTACLE_DETECTION,
-    DEVICE, USE_HALF_PRECISION
+    DEVICE, USE_HALF_PRECISION, MODEL_BACKEND, MODEL_PRECISION,
+    INFERENCE_WORKERS
 )
+from backends import load_backend_model
 
 class ModelManager:
     """Manages loading and inference for all YOLO models"""
     
-    def __init__(self):
+    def __init__(self, lazy=False):
+        """
+        Args:
+            lazy: Don't load the models until load() is called
+        """
         self.person_model = None
         self.ppe_model = None
         self.classification_model = None
         self.obstacle_model = None
         
-        self._load_models()
+        self.loaded = False
+        self._load_lock = threading.Lock()
+        
+        if not lazy:
+            self.load()
     
-    def _load_model(self, model_path, model_name):
-        """Load a single YOLO model"""
+    def load(self):
+        """Load all models (once; later calls return immediately)"""
+        with self._load_lock:
+            if not self.loaded:
+                self._load_models()
+                self.loaded = True
+    
+    def _load_model(self, model_path, model_name, key, task='detect'):
+        """Load a single YOLO model through the configured backend and precision"""
         try:
-            model = YOLO(str(model_path))
-            model.to(DEVICE)
-            
-            if DEVICE == 'cuda' and USE_HALF_PRECISION:
-                model.model.half()
+            precision = MODEL_PRECISION.get(key, 'fp32')
+            model = load_backend_model(model_path, task, MODEL_BACKEND, precision)
             
-            print(f"✅ {model_name} model loaded from {model_path}")
+            backend = 'onnx' if precision == 'int8' else MODEL_BACKEND
+            print(f"✅ {model_name} model loaded from {model_path} ({backend}, {precision})")
             print(f"📋 Classes: {model.names}")
             return model
         except Exception as e:
@@ -40,31 +55,31 @@ class ModelManager:
         print("="*60)
         
         # Load Person Detection Model
-        self.person_model = self._load_model(PERSON_MODEL_PATH, "Person Detection")
+        self.person_model = self._load_model(PERSON_MODEL_PATH, "Person Detection", 'person')
         
         # Load PPE Detection Model
-        self.ppe_model = self._load_model(PPE_MODEL_PATH, "PPE Detection")
+        self.ppe_model = self._load_model(PPE_MODEL_PATH, "PPE Detection", 'ppe')
         
         # Load Classification Model
-        self.classification_model = self._load_model(CLASSIFICATION_MODEL_PATH, "Classification")
+        self.classification_model = self._load_model(CLASSIFICATION_MODEL_PATH, "Classification", 'classification', task='classify')
         
         if ENABLE_OBSTACLE_DETECTION:
-            self.obstacle_model = self._load_model(OBSTACLE_MODEL_PATH, "Obstacle Detection (YOLO11)")
+            self.obstacle_model = self._load_model(OBSTACLE_MODEL_PATH, "Obstacle Detection (YOLO11)", 'obstacle')
         else:
             print("⚠️ Obstacle detection is disabled")
         
         print("="*60 + "\n")
     
-    def detect_persons(self, image, conf_threshold=0.5):
+    def detect_persons(self, image, conf_threshold=0.5, imgsz=640):
         """
         Detect persons and forklifts in image
         
         Args:
-            image: Input image
+            image: Input image, or list of images to run as one batch
             conf_threshold: Confidence threshold
             
         Returns:
-            YOLO results object
+            YOLO results object (one result per image)
         """
         if self.person_model is None:
             return None
@@ -75,7 +90,7 @@ class ModelManager:
             verbose=False,
             half=USE_HALF_PRECISION,
             conf=conf_threshold,
-            imgsz=640
+            imgsz=imgsz
         )
         return results
     
@@ -102,40 +117,64 @@ class ModelManager:
         Returns:
             tuple: (class_name, confidence) or (None, 0.0) if failed
         """
+        return self.classify_ppe_batch([crop_image])[0]
+    
+    def classify_ppe_batch(self, crop_images):
+        """
+        Classify many PPE crops in a single forward pass
+        
+        The classifier resizes every crop to its input size and stacks
+        them into one tensor, so N crops cost one model call.
+        
+        Args:
+            crop_images: List of cropped PPE images
+            
+        Returns:
+            list: (class_name, confidence) per crop, in order; (None, 0.0) if failed
+        """
+        if not crop_images:
+            return []
+        
+        failed = [(None, 0.0)] * len(crop_images)
+        
         if self.classification_model is None:
-            return None, 0.0
+            return failed
         
         try:
             results = self.classification_model(
-                crop_image,
+                crop_images,
                 device=DEVICE,
                 verbose=False
             )
             
-            if len(results) > 0 and len(results[0].probs) > 0:
-                probs = results[0].probs
-                top1_idx = probs.top1
-                top1_conf = probs.top1conf.item()
-                class_name = results[0].names[top1_idx]
-                
-                return class_name, top1_conf
+            outputs = []
+            for result in results:
+                if result.probs is not None and len(result.probs) > 0:
+                    probs = result.probs
+                    top1_idx = probs.top1
+                    top1_conf = probs.top1conf.item()
+                    class_name = result.names[top1_idx]
+                    
+                    outputs.append((class_name, top1_conf))
+                else:
+                    outputs.append((None, 0.0))
             
-            return None, 0.0
+            return outputs if len(outputs) == len(crop_images) else failed
             
         except Exception as e:
             print(f"❌ Classification error: {e}")
-            return None, 0.0
+            return failed
     
     def detect_obstacles(self, image, conf_threshold=0.5):
         """
         Detect obstacles in image using YOLO11
         
         Args:
-            image: Input image
+            image: Input image, or list of images to run as one batch
             conf_threshold: Confidence threshold
             
         Returns:
-            YOLO results object
+            YOLO results object (one result per image)
         """
         if self.obstacle_model is None:
             return None
@@ -164,4 +203,5 @@ class ModelManager:
 
 
 # Global model manager instance
-model_manager = ModelManager()
\ No newline at end of file
+# With worker processes the models live in the workers; each worker calls load()
+model_manager = ModelManager(lazy=INFERENCE_WORKERS > 0)
\ No newline at end of file
@@ -0,0 +1,77 @@
+"""
+Motion gating:
+Cheap frame differencing on a downscaled grayscale copy of the frame,
+used to skip the person/PPE models while the ROI is static.
+"""
+import cv2
+import numpy as np
+from config import (
+    MOTION_FRAME_WIDTH, MOTION_PIXEL_THRESHOLD,
+    MOTION_MIN_CHANGED_RATIO, MOTION_BACKGROUND_ALPHA
+)
+
+
+class MotionDetector:
+    """Detects changes against a running-average background for one camera"""
+
+    def __init__(self, roi=None):
+        """
+        Args:
+            roi: Optional polygon [(x, y), ...] in frame coordinates; only changes inside it count
+        """
+        self.roi = roi
+        self.background = None
+        self.mask = None
+        self.mask_area = 0
+        self.last_changed_ratio = 0.0
+
+    def _build_mask(self, shape, scale):
+        """Rasterize the ROI polygon at the downscaled resolution"""
+        if self.roi is None:
+            self.mask = None
+            self.mask_area = shape[0] * shape[1]
+            return
+
+        mask = np.zeros(shape, np.uint8)
+        pts = (np.array(self.roi, np.float32) * scale).astype(np.int32).reshape((-1, 1, 2))
+        cv2.fillPoly(mask, [pts], 255)
+
+        self.mask = mask
+        self.mask_area = max(1, cv2.countNonZero(mask))
+
+    def update(self, frame):
+        """
+        Feed a frame and check it against the background
+
+        Args:
+            frame: Full-resolution BGR frame
+
+        Returns:
+            bool: True if enough of the ROI changed
+        """
+        h, w = frame.shape[:2]
+        scale = MOTION_FRAME_WIDTH / w
+        small = cv2.resize(frame, (MOTION_FRAME_WIDTH, max(1, int(h * scale))),
+                           interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        gray = cv2.GaussianBlur(gray, (5, 5), 0)
+
+        # First frame (or resolution change): nothing to compare against yet
+        if self.background is None or self.background.shape != gray.shape:
+            self.background = gray.astype(np.float32)
+            self._build_mask(gray.shape, scale)
+            self.last_changed_ratio = 1.0
+            return True
+
+        diff = cv2.absdiff(gray, cv2.convertScaleAbs(self.background))
+        _, changed = cv2.threshold(diff, MOTION_PIXEL_THRESHOLD, 255, cv2.THRESH_BINARY)
+
+        if self.mask is not None:
+            changed = cv2.bitwise_and(changed, self.mask)
+
+        self.last_changed_ratio = cv2.countNonZero(changed) / self.mask_area
+
+        # Slowly absorb lighting changes and parked objects into the background
+        cv2.accumulateWeighted(gray, self.background, MOTION_BACKGROUND_ALPHA)
+
+        return self.last_changed_ratio >= MOTION_MIN_CHANGED_RATIO
@@ -0,0 +1,259 @@
+"""
+INT8 static quantization for CPU nodes:
+The FP32 ONNX export of each model is quantized with ONNX Runtime,
+calibrated on NG frames already saved under NG_SAVE_DIR/original.
+Every QUANT_HOLDOUT_EVERY-th frame is held out of calibration and used
+to measure drift against the FP32 PyTorch model.
+
+Usage (report drift and throughput, quantizing as needed):
+    python quantization.py [--models person ppe classification obstacle]
+"""
+import argparse
+import ast
+from pathlib import Path
+import cv2
+import numpy as np
+from config import (
+    PERSON_MODEL_PATH, PPE_MODEL_PATH, CLASSIFICATION_MODEL_PATH, OBSTACLE_MODEL_PATH,
+    PERSON_CONFIDENCE_THRESHOLD, PPE_CONFIDENCE_THRESHOLD,
+    QUANT_CALIBRATION_DIR, QUANT_CALIBRATION_SAMPLES, QUANT_HOLDOUT_EVERY
+)
+
+MODEL_SPECS = {
+    'person': (PERSON_MODEL_PATH, 'detect'),
+    'ppe': (PPE_MODEL_PATH, 'detect'),
+    'classification': (CLASSIFICATION_MODEL_PATH, 'classify'),
+    'obstacle': (OBSTACLE_MODEL_PATH, 'detect'),
+}
+
+
+def get_int8_path(onnx_path):
+    """Path of the quantized model next to the FP32 export"""
+    onnx_path = Path(onnx_path)
+    return onnx_path.with_name(f"{onnx_path.stem}_int8.onnx")
+
+
+def split_calibration_images(image_dir=QUANT_CALIBRATION_DIR):
+    """
+    Deterministic calibration / held-out split of saved frames
+
+    Returns:
+        tuple: (calibration_paths, holdout_paths)
+    """
+    paths = sorted(p for p in Path(image_dir).glob("*") if p.suffix.lower() in ('.jpg', '.jpeg', '.png'))
+    holdout = paths[::QUANT_HOLDOUT_EVERY]
+    calibration = [p for i, p in enumerate(paths) if i % QUANT_HOLDOUT_EVERY != 0]
+    return calibration[:QUANT_CALIBRATION_SAMPLES], holdout
+
+
+def read_images(paths):
+    """Read images, skipping unreadable files"""
+    images = []
+    for path in paths:
+        image = cv2.imread(str(path))
+        if image is not None:
+            images.append(image)
+    return images
+
+
+def _crop_boxes(frames, model, conf, class_filter=None):
+    """Crop every detected box of `model` out of `frames`"""
+    crops = []
+    for frame, result in zip(frames, model(frames, verbose=False, conf=conf)):
+        for box in result.boxes:
+            if class_filter and model.names[int(box.cls)].lower() not in class_filter:
+                continue
+            x1, y1, x2, y2 = map(int, box.xyxy[0])
+            crop = frame[max(0, y1 - 10):y2 + 10, max(0, x1 - 10):x2 + 10]
+            if crop.size > 0:
+                crops.append(crop)
+    return crops
+
+
+def build_model_inputs(name, frames):
+    """
+    Images each model actually sees in production
+
+    person/obstacle run on full frames, ppe on person crops and
+    classification on PPE crops, so calibrate and evaluate on the same.
+    """
+    if name in ('person', 'obstacle') or not frames:
+        return frames
+
+    from backends import load_backend_model
+
+    person_model = load_backend_model(PERSON_MODEL_PATH, 'detect', 'torch')
+    person_crops = _crop_boxes(frames, person_model, PERSON_CONFIDENCE_THRESHOLD, class_filter={'person'})
+    if name == 'ppe':
+        return person_crops
+
+    ppe_model = load_backend_model(PPE_MODEL_PATH, 'detect', 'torch')
+    return _crop_boxes(person_crops, ppe_model, PPE_CONFIDENCE_THRESHOLD) if person_crops else []
+
+
+def _letterbox(image, size):
+    """Resize keeping aspect ratio and pad to size (h, w) like the YOLO predictor"""
+    h, w = image.shape[:2]
+    scale = min(size[0] / h, size[1] / w)
+    nh, nw = int(round(h * scale)), int(round(w * scale))
+    resized = cv2.resize(image, (nw, nh), interpolation=cv2.INTER_LINEAR)
+    top = (size[0] - nh) // 2
+    left = (size[1] - nw) // 2
+    return cv2.copyMakeBorder(resized, top, size[0] - nh - top, left, size[1] - nw - left,
+                              cv2.BORDER_CONSTANT, value=(114, 114, 114))
+
+
+def _center_crop(image, size):
+    """Shortest-side resize and center crop like the YOLO classify transforms"""
+    h, w = image.shape[:2]
+    scale = size[0] / min(h, w)
+    resized = cv2.resize(image, (max(size[1], int(round(w * scale))), max(size[0], int(round(h * scale)))),
+                         interpolation=cv2.INTER_LINEAR)
+    top = (resized.shape[0] - size[0]) // 2
+    left = (resized.shape[1] - size[1]) // 2
+    return resized[top:top + size[0], left:left + size[1]]
+
+
+def preprocess(image, task, imgsz):
+    """BGR image → 1xCxHxW float32 network input"""
+    image = _center_crop(image, imgsz) if task == 'classify' else _letterbox(image, imgsz)
+    image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    return np.ascontiguousarray(image.transpose(2, 0, 1)[None], dtype=np.float32) / 255.0
+
+
+def _read_imgsz(onnx_model):
+    """Input size stored by the ultralytics exporter"""
+    for prop in onnx_model.metadata_props:
+        if prop.key == 'imgsz':
+            imgsz = ast.literal_eval(prop.value)
+            return (imgsz, imgsz) if isinstance(imgsz, int) else tuple(imgsz)
+    return (640, 640)
+
+
+def quantize_model(onnx_path, task, calibration_images):
+    """
+    Quantize an FP32 ONNX export to INT8 (QDQ, per-channel weights)
+
+    Args:
+        onnx_path: FP32 .onnx exported by backends.export_model
+        task: 'detect' or 'classify'
+        calibration_images: BGR images the model sees in production
+
+    Returns:
+        Path: Quantized .onnx
+    """
+    import onnx
+    from onnxruntime.quantization import (
+        quantize_static, CalibrationDataReader, QuantFormat, QuantType
+    )
+
+    onnx_path = Path(onnx_path)
+    int8_path = get_int8_path(onnx_path)
+
+    fp32_model = onnx.load(str(onnx_path))
+    input_name = fp32_model.graph.input[0].name
+    imgsz = _read_imgsz(fp32_model)
+
+    class _Reader(CalibrationDataReader):
+        def __init__(self):
+            self.images = iter(calibration_images)
+
+        def get_next(self):
+            image = next(self.images, None)
+            if image is None:
+                return None
+            return {input_name: preprocess(image, task, imgsz)}
+
+    print(f"📐 Calibrating {onnx_path.name} on {len(calibration_images)} images...")
+    quantize_static(
+        str(onnx_path),
+        str(int8_path),
+        _Reader(),
+        quant_format=QuantFormat.QDQ,
+        per_channel=True,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8
+    )
+
+    # Keep the ultralytics metadata (names, task, imgsz, stride)
+    int8_model = onnx.load(str(int8_path))
+    del int8_model.metadata_props[:]
+    int8_model.metadata_props.extend(fp32_model.metadata_props)
+    onnx.save(int8_model, str(int8_path))
+
+    print(f"✅ Quantized {onnx_path.name} → {int8_path.name}")
+    return int8_path
+
+
+def get_quantized_model(model_path, task, name=None):
+    """
+    Quantized artifact for .pt weights, creating it on first use
+
+    Args:
+        model_path: Path to .pt weights
+        task: 'detect' or 'classify'
+        name: Key in MODEL_SPECS, used to pick calibration inputs
+
+    Returns:
+        Path: INT8 .onnx
+    """
+    from backends import export_model, is_artifact_fresh
+
+    onnx_path = export_model(model_path, 'onnx')
+    int8_path = get_int8_path(onnx_path)
+
+    if is_artifact_fresh(int8_path, onnx_path):
+        return int8_path
+
+    if name is None:
+        name = next((key for key, (path, _) in MODEL_SPECS.items() if Path(path) == Path(model_path)), 'person')
+
+    calibration_paths, _ = split_calibration_images()
+    calibration_images = build_model_inputs(name, read_images(calibration_paths))
+    if not calibration_images:
+        raise RuntimeError(f"No calibration images for {name} in {QUANT_CALIBRATION_DIR}")
+
+    return quantize_model(onnx_path, task, calibration_images)
+
+
+def main():
+    from backends import load_backend_model
+    from benchmark_backends import compare_outputs, time_model
+
+    parser = argparse.ArgumentParser(description="Quantize models to INT8 and report drift / throughput")
+    parser.add_argument("--models", nargs="+", default=list(MODEL_SPECS), choices=list(MODEL_SPECS))
+    args = parser.parse_args()
+
+    _, holdout_paths = split_calibration_images()
+    holdout_frames = read_images(holdout_paths)
+    if not holdout_frames:
+        print(f"❌ No held-out images in {QUANT_CALIBRATION_DIR}")
+        return
+
+    print(f"📷 {len(holdout_frames)} held-out frames from {QUANT_CALIBRATION_DIR}")
+    print(f"{'model':<16}{'images':>8}{'fp32 img/s':>12}{'int8 img/s':>12}{'gain':>8}{'agreement':>11}")
+
+    for name in args.models:
+        model_path, task = MODEL_SPECS[name]
+        if not Path(model_path).exists():
+            print(f"{name:<16} skipped (missing {model_path})")
+            continue
+
+        images = build_model_inputs(name, holdout_frames)
+        if not images:
+            print(f"{name:<16} skipped (no held-out inputs)")
+            continue
+
+        reference, fp32_ms = time_model(load_backend_model(model_path, task, 'torch'), images)
+        candidate, int8_ms = time_model(load_backend_model(model_path, task, 'onnx', precision='int8'), images)
+
+        fp32_ips = 1000 / max(fp32_ms.mean(), 1e-9)
+        int8_ips = 1000 / max(int8_ms.mean(), 1e-9)
+        agreement = compare_outputs(task, reference, candidate)
+
+        print(f"{name:<16}{len(images):>8}{fp32_ips:>12.1f}{int8_ips:>12.1f}"
+              f"{int8_ips / fp32_ips:>7.2f}x{agreement:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Cached static overlay:
+The ROI zone outline and its label never change between frames, so they
+are rendered once per camera (and frame size) into an overlay image and
+a mask, cropped to the zone's bounding box. Annotating a frame is then
+a single masked copy instead of rebuilding the polygon and re-drawing
+the polyline and text every detection cycle. The cache is rebuilt
+automatically when the zone points or the frame size change.
+"""
+import threading
+import cv2
+import numpy as np
+from config import ROI_ZONES, DRAW_ROI, ROI_COLOR, ROI_THICKNESS
+
+
+class StaticOverlayCache:
+    """Pre-rendered ROI overlay + mask per camera"""
+
+    def __init__(self, zones=ROI_ZONES):
+        self.zones = zones
+        self.cache = {}  # camera_id -> (key, (y0, y1, x0, x1), overlay, mask)
+        self.lock = threading.Lock()
+
+    def _render(self, camera_id, shape):
+        """
+        Draw the zone onto a blank canvas and keep the touched pixels
+
+        Returns:
+            tuple: ((y0, y1, x0, x1), overlay crop, mask crop) or None if nothing is drawn
+        """
+        roi = self.zones[camera_id]
+        canvas = np.zeros((shape[0], shape[1], 3), np.uint8)
+        mask = np.zeros(shape[:2], np.uint8)
+
+        pts = np.array(roi, np.int32).reshape((-1, 1, 2))
+        text_org = (roi[0][0], roi[0][1] - 10)
+        label = "OBSTRUCTION DETECTION ZONE"
+
+        cv2.polylines(canvas, [pts], True, ROI_COLOR, ROI_THICKNESS)
+        cv2.putText(canvas, label, text_org, cv2.FONT_HERSHEY_SIMPLEX, 0.8, ROI_COLOR, 2)
+
+        # Same strokes in white give an exact mask, even for black ROI_COLOR
+        cv2.polylines(mask, [pts], True, 255, ROI_THICKNESS)
+        cv2.putText(mask, label, text_org, cv2.FONT_HERSHEY_SIMPLEX, 0.8, 255, 2)
+
+        ys, xs = np.nonzero(mask)
+        if len(ys) == 0:
+            return None
+
+        y0, y1, x0, x1 = ys.min(), ys.max() + 1, xs.min(), xs.max() + 1
+        return (y0, y1, x0, x1), canvas[y0:y1, x0:x1].copy(), mask[y0:y1, x0:x1, None].astype(bool)
+
+    def get(self, camera_id, shape):
+        """
+        Get the cached overlay for a camera, rebuilding it if zones or frame size changed
+
+        Returns:
+            tuple: ((y0, y1, x0, x1), overlay, mask) or None
+        """
+        if not DRAW_ROI or camera_id not in self.zones:
+            return None
+
+        key = (shape[:2], tuple(map(tuple, self.zones[camera_id])))
+
+        with self.lock:
+            cached = self.cache.get(camera_id)
+            if cached is None or cached[0] != key:
+                cached = (key, self._render(camera_id, shape))
+                self.cache[camera_id] = cached
+
+            return cached[1]
+
+    def apply(self, image, camera_id):
+        """
+        Composite the camera's static overlay onto image in place
+
+        Args:
+            image: BGR frame to annotate (modified)
+            camera_id: Camera ID
+
+        Returns:
+            The same image
+        """
+        layer = self.get(camera_id, image.shape)
+        if layer is None:
+            return image
+
+        (y0, y1, x0, x1), overlay, mask = layer
+        np.copyto(image[y0:y1, x0:x1], overlay, where=mask)
+        return image
+
+    def invalidate(self, camera_id=None):
+        """Drop cached overlays (all cameras if camera_id is None)"""
+        with self.lock:
+            if camera_id is None:
+                self.cache.clear()
+            else:
+                self.cache.pop(camera_id, None)
+
+
+# Global static overlay cache instance
+static_overlay = StaticOverlayCache()
@@ -0,0 +1,191 @@
+"""
+Encode-once MJPEG fan-out:
+One broadcaster per (camera, raw|detected, single|dual) resizes and
+encodes each new frame exactly once and hands the same JPEG bytes to
+every subscribed client. Broadcasters run only while someone watches,
+and only push when the frame's sequence number changes (the detected
+view changes once per detection, not once per captured frame).
+Clients are async generators fed through a one-slot asyncio queue, so a
+slow client drops frames instead of holding a thread.
+"""
+import time
+import asyncio
+import threading
+from config import (
+    DISPLAY_SIZES,
+    STREAM_JPEG_QUALITY, STREAM_MAX_FPS, STREAM_KEEPALIVE
+)
+from camera_manager import camera_manager
+from jpeg_encoder import encode_jpeg
+
+
+def offer_latest(queue, item):
+    """Put item into a one-slot queue, replacing whatever the client has not taken yet"""
+    if queue.full():
+        try:
+            queue.get_nowait()
+        except asyncio.QueueEmpty:
+            pass
+    queue.put_nowait(item)
+
+
+class FrameBroadcaster:
+    """Encodes one camera view on new frames and shares the JPEG with all subscribers"""
+
+    def __init__(self, camera_id, detected=False, single=False):
+        self.camera_id = camera_id
+        self.detected = detected
+        self.level = 'single' if single else 'dual'
+        self.size = DISPLAY_SIZES[self.level]
+
+        self.jpeg = None
+        self.seq = 0
+        self.condition = threading.Condition()
+
+        # (event loop, asyncio.Queue(maxsize=1)) per client
+        self.subscribers = set()
+        self.thread = None
+
+        # Statistics
+        self.frames_encoded = 0
+
+    def subscribe(self, loop, queue):
+        """Register a client queue; starts the encode thread if needed"""
+        with self.condition:
+            self.subscribers.add((loop, queue))
+            if self.jpeg is not None:
+                offer_latest(queue, (self.seq, self.jpeg))
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._encode_thread, daemon=True)
+                self.thread.start()
+
+    def unsubscribe(self, loop, queue):
+        """Remove a client queue"""
+        with self.condition:
+            self.subscribers.discard((loop, queue))
+
+    def _publish(self, seq, jpeg):
+        """Store the new JPEG and hand it to every client's event loop"""
+        with self.condition:
+            self.jpeg = jpeg
+            self.seq = seq
+            self.frames_encoded += 1
+            subscribers = list(self.subscribers)
+
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(offer_latest, queue, (seq, jpeg))
+            except RuntimeError:
+                # Event loop already closed
+                self.unsubscribe(loop, queue)
+
+    def _encode_thread(self):
+        """Encode each new frame once while there are subscribers"""
+        min_interval = 1.0 / STREAM_MAX_FPS
+        last_encode = 0.0
+
+        while True:
+            with self.condition:
+                if not self.subscribers:
+                    self.thread = None
+                    return
+
+            seq = camera_manager.wait_for_new_frame(
+                self.camera_id, self.seq, detected=self.detected, timeout=1.0
+            )
+            if seq == 0 or seq == self.seq:
+                continue
+
+            wait = min_interval - (time.time() - last_encode)
+            if wait > 0:
+                time.sleep(wait)
+            last_encode = time.time()
+
+            try:
+                # Lease after throttling: picks up anything that arrived meanwhile, and
+                # capture cannot overwrite the slot while the pyramid resizes it
+                lease = camera_manager.lease_frame(self.camera_id, self.detected)
+                if lease is None:
+                    continue
+                with lease:
+                    seq, resized = camera_manager.get_display_frame(
+                        self.camera_id, self.level, self.detected, lease.seq, lease.frame
+                    )
+                jpeg = encode_jpeg(resized, STREAM_JPEG_QUALITY)
+            except Exception as e:
+                print(f"❌ [Camera {self.camera_id+1}] Stream encode error: {e}")
+                time.sleep(0.1)
+                continue
+
+            self._publish(seq, jpeg)
+
+
+class StreamHub:
+    """Owns one broadcaster per (camera, raw|detected, single|dual)"""
+
+    def __init__(self):
+        self.broadcasters = {}
+        self.lock = threading.Lock()
+
+    def get(self, camera_id, detected=False, single=False):
+        """Get (or create) the broadcaster for a camera view"""
+        key = (camera_id, bool(detected), bool(single))
+        with self.lock:
+            if key not in self.broadcasters:
+                self.broadcasters[key] = FrameBroadcaster(camera_id, detected, single)
+            return self.broadcasters[key]
+
+    async def mjpeg_generator(self, camera_id, detected=False, single=False):
+        """
+        Async multipart MJPEG generator for StreamingResponse
+
+        Pushes a part only when the sequence number advances; with
+        STREAM_KEEPALIVE set, re-sends the last JPEG after that many idle
+        seconds so proxies and browsers keep the connection open.
+        """
+        broadcaster = self.get(camera_id, detected, single)
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=1)
+
+        broadcaster.subscribe(loop, queue)
+        try:
+            last_seq = 0
+            last_jpeg = None
+            while True:
+                try:
+                    seq, jpeg = await asyncio.wait_for(queue.get(), timeout=STREAM_KEEPALIVE or None)
+                except asyncio.TimeoutError:
+                    if last_jpeg is not None:
+                        yield (b'--frame\r\n'
+                               b'Content-Type: image/jpeg\r\n\r\n' + last_jpeg + b'\r\n')
+                    continue
+
+                if seq == last_seq:
+                    continue
+                last_seq = seq
+                last_jpeg = jpeg
+
+                yield (b'--frame\r\n'
+                       b'Content-Type: image/jpeg\r\n\r\n' + jpeg + b'\r\n')
+        finally:
+            broadcaster.unsubscribe(loop, queue)
+
+    def get_statistics(self):
+        """Subscribers and encodes per active view"""
+        with self.lock:
+            broadcasters = list(self.broadcasters.values())
+
+        return [
+            {
+                "camera_id": b.camera_id,
+                "view": "detected" if b.detected else "raw",
+                "size": f"{b.size[0]}x{b.size[1]}",
+                "subscribers": len(b.subscribers),
+                "frames_encoded": b.frames_encoded
+            }
+            for b in broadcasters
+        ]
+
+
+# Global stream hub instance
+stream_hub = StreamHub()
@@ -0,0 +1,122 @@
+import sys
+import types
+
+import pytest
+
+pytest.importorskip("ultralytics")
+
+import backends
+
+
+class FakeSession:
+    def __init__(self, path=None, sess_options=None, providers=None):
+        self.path = path
+        self.sess_options = sess_options
+        self.providers = providers or ['CPUExecutionProvider']
+
+    def get_providers(self):
+        return self.providers
+
+
+class FakeOnnxRuntime(types.ModuleType):
+    class SessionOptions:
+        pass
+
+    class GraphOptimizationLevel:
+        ORT_ENABLE_ALL = 99
+
+    InferenceSession = FakeSession
+
+    def __init__(self):
+        super().__init__('onnxruntime')
+
+
+class FormatBackend:
+    """Per-format backend holding the session (newer ultralytics)"""
+
+    def __init__(self, dynamic=True):
+        self.session = FakeSession()
+        self.dynamic = dynamic
+        self.use_io_binding = False
+
+
+class ProxyAutoBackend:
+    """AutoBackend that only proxies reads to .backend"""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def __getattr__(self, name):
+        return getattr(self.__dict__['backend'], name)
+
+
+class FlatAutoBackend(FormatBackend):
+    """AutoBackend that owns the session itself (older ultralytics)"""
+
+
+class FakeYOLO:
+    def __init__(self, autobackend):
+        self.predictor = types.SimpleNamespace(model=autobackend)
+        self.sessions_used = []
+
+    def predict(self, *args, **kwargs):
+        self.sessions_used.append(getattr(self.predictor.model, 'session', None))
+
+
+@pytest.fixture(autouse=True)
+def fake_onnxruntime(monkeypatch):
+    monkeypatch.setitem(sys.modules, 'onnxruntime', FakeOnnxRuntime())
+
+
+def test_replaces_session_held_by_format_backend():
+    inner = FormatBackend()
+    default_session = inner.session
+    model = FakeYOLO(ProxyAutoBackend(inner))
+
+    assert backends.tune_onnx_session(model, 'model.onnx')
+
+    assert inner.session is not default_session
+    assert inner.session.sess_options.intra_op_num_threads == backends.ONNX_INTRA_OP_THREADS
+    assert inner.session.sess_options.inter_op_num_threads == backends.ONNX_INTER_OP_THREADS
+    assert 'session' not in vars(model.predictor.model)
+    assert model.sessions_used[-1] is inner.session
+
+
+def test_replaces_session_held_by_autobackend():
+    autobackend = FlatAutoBackend()
+    model = FakeYOLO(autobackend)
+
+    assert backends.tune_onnx_session(model, 'model.onnx')
+    assert autobackend.session.path == 'model.onnx'
+
+
+def test_static_axes_keep_default_session():
+    inner = FormatBackend(dynamic=False)
+    default_session = inner.session
+
+    assert not backends.tune_onnx_session(FakeYOLO(ProxyAutoBackend(inner)), 'model.onnx')
+    assert inner.session is default_session
+
+
+def test_unknown_layout_keeps_default_session(capsys):
+    model = FakeYOLO(types.SimpleNamespace())
+
+    assert not backends.tune_onnx_session(model, 'model.onnx')
+    assert 'keeping default session' in capsys.readouterr().out
+
+
+def test_failed_tuned_predict_restores_default_session():
+    inner = FormatBackend()
+    default_session = inner.session
+    model = FakeYOLO(ProxyAutoBackend(inner))
+    calls = []
+
+    def predict(*args, **kwargs):
+        calls.append(1)
+        if len(calls) > 1:
+            raise RuntimeError("bad session")
+
+    model.predict = predict
+
+    assert not backends.tune_onnx_session(model, 'model.onnx')
+    assert inner.session is default_session
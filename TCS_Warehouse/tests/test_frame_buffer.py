@@ -0,0 +1,107 @@
+import numpy as np
+import pytest
+
+from frame_buffer import FrameLease, FrameRingBuffer
+
+SHAPE = (2, 3, 3)
+
+
+@pytest.fixture
+def ring():
+    ring = FrameRingBuffer(num_slots=3)
+    yield ring
+    ring.close()
+
+
+def write(ring, value, shape=SHAPE):
+    slot = ring.begin_write(shape)
+    slot[:] = value
+    return ring.commit()
+
+
+def test_latest_before_first_frame(ring):
+    assert ring.latest() == (0, None)
+    assert ring.lease_latest() is None
+    assert ring.begin_write() is None
+
+
+def test_latest_returns_newest_frame(ring):
+    write(ring, 1)
+    seq = write(ring, 2)
+
+    latest_seq, frame = ring.latest()
+    assert latest_seq == seq == 2
+    assert (frame == 2).all()
+
+
+def test_writer_never_overwrites_the_newest_frame(ring):
+    write(ring, 1)
+    for value in range(2, 10):
+        slot = ring.begin_write(SHAPE)
+        assert (ring.latest()[1] == value - 1).all()
+        slot[:] = value
+        ring.commit()
+
+
+def test_leased_frame_survives_later_writes(ring):
+    write(ring, 7)
+    lease = ring.lease_latest()
+
+    for value in range(10):
+        write(ring, value)
+
+    assert (lease.frame == 7).all()
+    lease.release()
+
+
+def test_all_slots_pinned_raises(ring):
+    leases = []
+    for value in range(2):
+        write(ring, value)
+        leases.append(ring.lease_latest())
+    write(ring, 2)
+
+    with pytest.raises(RuntimeError):
+        ring.begin_write(SHAPE)
+
+    leases[0].release()
+    leases[0].release()  # releasing twice is harmless
+    assert ring.begin_write(SHAPE) is not None
+
+
+def test_shape_change_reallocates(ring):
+    write(ring, 1)
+    lease = ring.lease_latest()
+
+    write(ring, 5, shape=(4, 4, 3))
+
+    assert ring.latest()[1].shape == (4, 4, 3)
+    # A lease from the old block no longer affects the new slots
+    lease.release()
+    assert ring.pins == [0, 0, 0]
+
+
+def test_latest_is_a_copy(ring):
+    write(ring, 1)
+    _, frame = ring.latest()
+
+    for value in range(2, 6):
+        write(ring, value)
+
+    assert (frame == 1).all()
+    assert ring.pins == [0, 0, 0]
+
+
+def test_latest_info_reports_seq_and_shape(ring):
+    assert ring.latest_info() == (0, None)
+    ring.begin_write(SHAPE)
+    assert ring.latest_info() == (0, None)
+
+    seq = write(ring, 1)
+    assert ring.latest_info() == (seq, SHAPE)
+
+
+def test_lease_without_ring_pins_nothing():
+    frame = np.zeros(SHAPE, np.uint8)
+    with FrameLease(None, 0, -1, 5, frame) as lease:
+        assert lease.seq == 5 and lease.frame is frame
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("cv2")
+results = pytest.importorskip("ultralytics.engine.results")
+
+from frame_pyramid import letterbox, unletterbox_result
+
+
+def make_result(boxes, shape=(640, 640)):
+    # Predictions come out of torch.inference_mode, which makes the tensor read-only afterwards
+    with torch.inference_mode():
+        data = torch.tensor(boxes, dtype=torch.float32).reshape(-1, 6)
+    return results.Results(np.zeros((*shape, 3), np.uint8), path="", names={0: "person"}, boxes=data)
+
+
+def test_letterbox_pads_to_square():
+    image = np.zeros((360, 640, 3), np.uint8)
+    boxed, scale, pad = letterbox(image, size=640)
+
+    assert boxed.shape == (640, 640, 3)
+    assert scale == 1.0
+    assert pad == (0, 140)
+
+
+def test_unletterbox_maps_boxes_back_to_original_frame():
+    image = np.zeros((720, 1280, 3), np.uint8)
+    _, scale, pad = letterbox(image, size=640)
+    result = make_result([[0, 140, 320, 320, 0.9, 0]])
+
+    unletterbox_result(result, scale, pad, image.shape)
+
+    assert result.orig_shape == (720, 1280)
+    assert result.boxes.orig_shape == (720, 1280)
+    assert result.boxes.xyxy[0].tolist() == pytest.approx([0, 0, 640, 360])
+    assert result.boxes.conf[0].item() == pytest.approx(0.9)
+
+
+def test_unletterbox_clamps_to_frame():
+    image = np.zeros((720, 1280, 3), np.uint8)
+    _, scale, pad = letterbox(image, size=640)
+    result = make_result([[-10, 100, 650, 600, 0.5, 0]])
+
+    unletterbox_result(result, scale, pad, image.shape)
+
+    assert result.boxes.xyxy[0].tolist() == pytest.approx([0, 0, 1280, 720])
+
+
+def test_unletterbox_without_detections():
+    image = np.zeros((720, 1280, 3), np.uint8)
+    _, scale, pad = letterbox(image, size=640)
+    result = make_result([])
+
+    unletterbox_result(result, scale, pad, image.shape)
+
+    assert len(result.boxes) == 0
+    assert result.orig_shape == (720, 1280)
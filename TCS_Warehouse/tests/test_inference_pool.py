@@ -0,0 +1,180 @@
+import queue
+import threading
+
+import numpy as np
+import pytest
+
+import inference_pool as pool_module
+from inference_pool import InferencePool, _PendingTask, _attach_shared_memory
+from frame_buffer import FrameRingBuffer
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    """A pool whose 'workers' are threads in this process, fed through plain queues"""
+    monkeypatch.setattr(pool_module, "INFERENCE_TIMEOUT", 0.2)
+
+    pool = InferencePool(num_workers=1)
+    pool.task_queue = queue.Queue()
+    pool.result_queue = queue.Queue()
+    pool.ready_event.set()
+    pool.listener = threading.Thread(target=pool._result_thread, daemon=True)
+    pool.listener.start()
+    yield pool
+    pool.stop()
+
+
+def fake_worker(pool, count=1):
+    """Answer tasks like _worker_main: invert the frame into the output slot"""
+    def run():
+        for _ in range(count):
+            task_id, camera_id, (in_name, in_shape, slot), out_name, shape, full = pool.task_queue.get()
+            in_shm, out_shm = _attach_shared_memory(in_name), _attach_shared_memory(out_name)
+            frame = np.ndarray(in_shape, np.uint8, buffer=in_shm.buf)
+            if slot is not None:
+                frame = frame[slot]
+            np.copyto(np.ndarray(shape, np.uint8, buffer=out_shm.buf), 255 - frame)
+            del frame
+            in_shm.close()
+            out_shm.close()
+            pool.result_queue.put((task_id, [{"camera": camera_id}], True, False, 2, True, None, None))
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_infer_round_trips_through_shared_memory(pool):
+    frame = np.full((4, 6, 3), 10, np.uint8)
+    fake_worker(pool)
+
+    annotated, detections, has_ng, has_obstacle, person_count = pool.infer(frame, camera_id=1)
+
+    assert (annotated == 245).all()
+    assert detections == [{"camera": 1}]
+    assert (has_ng, has_obstacle, person_count) == (True, False, 2)
+    assert pool.get_pending_count() == 0
+
+
+def test_result_is_a_copy_of_the_slot(pool):
+    fake_worker(pool, count=2)
+    first = pool.infer(np.zeros((4, 6, 3), np.uint8), camera_id=0)[0]
+    pool.infer(np.full((4, 6, 3), 255, np.uint8), camera_id=0)
+
+    assert (first == 255).all()
+
+
+def test_timeout_retires_the_slots(pool):
+    frame = np.zeros((4, 6, 3), np.uint8)
+
+    with pytest.raises(TimeoutError):
+        pool.infer(frame, camera_id=0)
+
+    task_id = pool.task_queue.get_nowait()[0]
+    assert 0 not in pool.slots
+    assert task_id in pool.retired_slots
+    assert pool.get_pending_count() == 0
+
+    # The camera's next frame gets fresh slots, not the ones a worker may still hold
+    retired_in = pool.retired_slots[task_id][0].name
+    assert pool._get_slots(0, frame.shape, need_input=True)[1].name != retired_in
+
+
+def test_late_result_releases_retired_slots(pool):
+    with pytest.raises(TimeoutError):
+        pool.infer(np.zeros((4, 6, 3), np.uint8), camera_id=0)
+    task_id = pool.task_queue.get_nowait()[0]
+
+    pool.result_queue.put((task_id, [], False, False, 0, True, None, None))
+
+    for _ in range(100):
+        if task_id not in pool.retired_slots:
+            break
+        threading.Event().wait(0.01)
+    assert task_id not in pool.retired_slots
+
+
+def test_worker_error_is_raised(pool):
+    def fail():
+        task_id = pool.task_queue.get()[0]
+        pool.result_queue.put((task_id, None, False, False, 0, False, None, "ValueError: bad frame"))
+    threading.Thread(target=fail, daemon=True).start()
+
+    with pytest.raises(RuntimeError, match="bad frame"):
+        pool.infer(np.zeros((4, 6, 3), np.uint8), camera_id=0)
+
+
+def test_stop_releases_all_shared_memory(pool):
+    with pytest.raises(TimeoutError):
+        pool.infer(np.zeros((4, 6, 3), np.uint8), camera_id=0)
+    pool._get_slots(1, (4, 6, 3), need_input=True)
+    names = [shm.name for slots in pool.retired_slots.values() for shm in slots]
+    names += [shm.name for _, *shms in pool.slots.values() for shm in shms]
+
+    pool.stop()
+
+    assert not pool.slots and not pool.retired_slots
+    for name in names:
+        with pytest.raises(FileNotFoundError):
+            _attach_shared_memory(name)
+
+
+def test_leased_ring_frame_is_not_copied(pool):
+    ring = FrameRingBuffer(num_slots=3)
+    try:
+        ring.begin_write((4, 6, 3))[:] = 10
+        ring.commit()
+        fake_worker(pool)
+
+        with ring.lease_latest() as lease:
+            annotated = pool.infer(lease.frame, camera_id=0, lease=lease)[0]
+
+        assert (annotated == 245).all()
+        # Only the output slot exists: the worker read the ring slot itself
+        assert pool.slots[0][1] is None
+    finally:
+        ring.close()
+
+
+def test_stale_lease_falls_back_to_a_copy(pool):
+    ring = FrameRingBuffer(num_slots=3)
+    try:
+        ring.begin_write((4, 6, 3))[:] = 10
+        ring.commit()
+        lease = ring.lease_latest()
+        frame = lease.frame.copy()
+        ring.begin_write((8, 6, 3))  # reallocates: the leased block is gone
+        fake_worker(pool)
+
+        annotated = pool.infer(frame, camera_id=0, lease=lease)[0]
+
+        assert (annotated == 245).all()
+        assert pool.slots[0][1] is not None
+        lease.release()
+    finally:
+        ring.close()
+
+
+def test_result_arriving_at_the_deadline_is_kept(pool, monkeypatch):
+    class LateTask(_PendingTask):
+        def __init__(self, *args):
+            super().__init__(*args)
+            done = self.done
+
+            class Deadline(type(done)):
+                def wait(self, timeout=None):
+                    if timeout is None:
+                        return super().wait()
+                    # The result thread takes the task right as the wait expires
+                    super().wait(2)
+                    return False
+            self.done = Deadline()
+
+    monkeypatch.setattr(pool_module, "_PendingTask", LateTask)
+    fake_worker(pool)
+
+    annotated, detections, *_ = pool.infer(np.zeros((4, 6, 3), np.uint8), camera_id=3)
+
+    assert (annotated == 255).all()
+    assert detections == [{"camera": 3}]
+    assert not pool.retired_slots
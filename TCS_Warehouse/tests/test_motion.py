@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("cv2")
+
+from motion import MotionDetector
+
+
+def frame(value=0):
+    return np.full((240, 320, 3), value, np.uint8)
+
+
+def test_first_frame_counts_as_motion():
+    assert MotionDetector().update(frame())
+
+
+def test_static_scene_has_no_motion():
+    detector = MotionDetector()
+    detector.update(frame())
+
+    assert not detector.update(frame())
+    assert detector.last_changed_ratio == 0
+
+
+def test_change_is_detected():
+    detector = MotionDetector()
+    detector.update(frame())
+
+    moved = frame()
+    moved[60:180, 80:240] = 255
+    assert detector.update(moved)
+
+
+def test_change_outside_roi_is_ignored():
+    detector = MotionDetector(roi=[(0, 0), (100, 0), (100, 100), (0, 100)])
+    detector.update(frame())
+
+    moved = frame()
+    moved[150:240, 200:320] = 255
+    assert not detector.update(moved)
+
+    moved[0:100, 0:100] = 255
+    assert detector.update(moved)
@@ -20,10 +20,36 @@ export interface Detection {
   classification_conf: number | null;
   bbox: number[];
   is_ng?: boolean
+  type?: "ppe" | "forklift" | "obstacle";
+  confidence?: number;
 }
 
 export interface DetectionData {
   camera_id: number;
   count: number;
   detections: Detection[];
-}
\ No newline at end of file
+}
+
+export interface CameraEventState {
+  status?: string;
+  detections?: number;
+  ng_count?: number;
+  obstacle_count?: number;
+  ng_detected?: number;
+  ng_saved?: number;
+  has_alert?: boolean;
+  last_alert_time?: number | null;
+  has_obstacle?: boolean;
+  obstacle_current_duration?: number;
+  obstacle_alert_active?: boolean;
+  total_obstacles?: number;
+}
+
+export interface CameraOverlay {
+  camera_id: number;
+  seq: number;
+  server_side_annotation: boolean;
+  frame_size: [number, number];
+  roi_zones: { name: string; kind?: string; points: [number, number][] }[];
+  detections: Detection[];
+}
@@ -4,4 +4,16 @@ export interface MonthlyDataItem {
   glasses: number;
   shirt: number;
   empty: number;
-}
\ No newline at end of file
+}
+
+export interface DashboardSnapshot {
+  success: boolean;
+  stats: {
+    todayDetections: number;
+    yesterdayDetections: number;
+    totalNG: number;
+  };
+  ppeStatus: { name: string; value: number; color: string }[];
+  ruleViolations: { rule: string; count: number }[];
+  monthlySummary: MonthlyDataItem[];
+}
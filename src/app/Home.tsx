@@ -3,18 +3,21 @@
 import { useEffect, useState, useCallback, useRef } from "react";
 // import Topbar from "@/components/layout/Topbar";
 import StatusPanel from "@/components/StatusPanel";
-import { Camera, CameraInfo, Detection, DetectionData } from "@/Types/Camera";
+import { Camera, CameraInfo, CameraOverlay, Detection, DetectionData } from "@/Types/Camera";
+import AnnotatedStream from "@/components/AnnotatedStream";
 // import Navbar from "@/components/layout/์Navbar";
 // import SettingsSidebar from "@/components/layout/SettingsSidebar";
 import { useCameraContext } from "@/contexts/CameraContext";
 import { CheckCircle2, XCircle } from "lucide-react";
 import { useConfig } from "@/hooks/useConfig";
+import { useCameraEvents } from "@/hooks/useCameraEvents";
 
 // const API_URL = process.env.NEXT_PUBLIC_API_URL || "http://ath-ma-wd2503:8083/api"
 
 export default function Home() {
   const { config } = useConfig();
   const API_URL = config?.Slitting.API_URL || "http://ath-ma-wd2503:8083/api";
+  const events = useCameraEvents(config?.Slitting.API_URL);
 
   const { selectedCameraId } = useCameraContext();
 
@@ -22,6 +25,7 @@ export default function Home() {
   const [error, setError] = useState<string | null>(null)
   const [cameraInfo, setCameraInfo] = useState<{ [key: number]: CameraInfo }>({})
   const [detections, setDetections] = useState<{ [key: number]: DetectionData }>({})
+  const [overlays, setOverlays] = useState<{ [key: number]: CameraOverlay }>({})
   const [hasNG, setHasNG] = useState<boolean>(false)
   const [safetyViolations, setSafetyViolations] = useState<string[]>([])
   const [violationTypes, setViolationTypes] = useState<{
@@ -91,6 +95,12 @@ export default function Home() {
               setCameraInfo((prev) => ({ ...prev, [cam.id]: info }));
             })
             .catch((err) => console.error(`Error fetching camera ${cam.id} info:`, err));
+          fetch(`${API_URL}/camera/${cam.id}/overlay`)
+            .then((res) => res.json())
+            .then((overlay: CameraOverlay) => {
+              setOverlays((prev) => ({ ...prev, [cam.id]: overlay }));
+            })
+            .catch((err) => console.error(`Error fetching camera ${cam.id} overlay:`, err));
         });
       })
       .catch((err) => {
@@ -99,8 +109,39 @@ export default function Home() {
       });
   }, []);
 
-  // Poll detection results every 500ms
+  // An overlay fetched before the camera's first frame has frame_size [0, 0]; retry until it is known
   useEffect(() => {
+    const pending = cameras.filter((cam) => {
+      const overlay = overlays[cam.id];
+      return overlay && !overlay.server_side_annotation && !(overlay.frame_size[0] > 0 && overlay.frame_size[1] > 0);
+    });
+    if (pending.length === 0) return;
+
+    const interval = setInterval(() => {
+      pending.forEach((cam) => {
+        fetch(`${API_URL}/camera/${cam.id}/overlay`)
+          .then((res) => res.json())
+          .then((overlay: CameraOverlay) => {
+            setOverlays((prev) => ({ ...prev, [cam.id]: overlay }));
+          })
+          .catch((err) => console.error(`Error fetching camera ${cam.id} overlay:`, err));
+      });
+    }, 2000);
+
+    return () => clearInterval(interval);
+  }, [API_URL, cameras, overlays]);
+
+  // Detections pushed over /api/ws/events
+  useEffect(() => {
+    if (events.connected) {
+      setDetections(events.detections)
+    }
+  }, [events.connected, events.detections]);
+
+  // Poll detection results every 500ms (fallback while the event socket is down)
+  useEffect(() => {
+    if (events.connected) return;
+
     const interval = setInterval(() => {
       cameras.forEach((cam) => {
         fetch(`${API_URL}/camera/${cam.id}/detections`)
@@ -117,7 +158,7 @@ export default function Home() {
     }, 500);
 
     return () => clearInterval(interval);
-  }, [cameras]);
+  }, [cameras, events.connected]);
 
   useEffect(() => {
     audioRef.current = new Audio('/emergency-alarmsiren-type.mp3')
@@ -290,12 +331,13 @@ export default function Home() {
                 } flex items-center justify-center`}
               >
                 <div className="relative w-full h-full flex items-center justify-center">
-                  {/* eslint-disable-next-line @next/next/no-img-element */}
-                  <img
+                  <AnnotatedStream
                     key={streamReloadKey[cameraId] || 0}
                     src={getStreamUrl(cameraId)}
                     alt={`Camera ${cameraId + 1}`}
                     className="max-w-full max-h-full object-contain bg-black border-2 sm:border-[4px] border-black"
+                    overlay={overlays[cameraId]}
+                    detections={detections[cameraId]?.detections}
                     onError={() => handleStreamError(cameraId)}
                     onLoad={() => handleStreamLoad(cameraId)}
                   />
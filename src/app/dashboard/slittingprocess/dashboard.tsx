@@ -1,6 +1,6 @@
 "use client";
 
-import { useState, useEffect } from "react";
+import { useState, useEffect, useRef } from "react";
 // import { useRouter } from "next/navigation";
 // import {
 //   PieChart,
@@ -15,7 +15,7 @@ import { useState, useEffect } from "react";
 //   ResponsiveContainer,
 //   PieLabelRenderProps,
 // } from "recharts";
-import { MonthlyDataItem } from "@/Types/Dashboard";
+import { DashboardSnapshot, MonthlyDataItem } from "@/Types/Dashboard";
 import dynamic from "next/dynamic";
 import { ApexOptions } from "apexcharts";
 import { useConfig } from "@/hooks/useConfig";
@@ -92,49 +92,42 @@ export default function Dashboard() {
   const { config } = useConfig();
   const API_URL = config?.Slitting.API_URL || "http://ath-ma-wd2503:8083/api";
 
+  // ETag of the last snapshot; the server answers 304 while it is unchanged
+  const snapshotEtag = useRef<string | null>(null);
+
   useEffect(() => {
     const fetchDashboardData = async () => {
       try {
         setLoading(true);
         
-        // Fetch main stats
-        const statsResponse = await fetch(`${API_URL}/dashboard/stats`);
-        const statsData = await statsResponse.json();
-        if (statsData.success) {
-          setStats({
-            todayDetections: statsData.todayDetections,
-            yesterdayDetections: statsData.yesterdayDetections,
-            totalNG: statsData.totalNG,
-          });
+        // Fetch stats, PPE status, rule violations and monthly summary in one request
+        const headers: Record<string, string> = {};
+        if (snapshotEtag.current) {
+          headers["If-None-Match"] = snapshotEtag.current;
         }
-
-        // Fetch PPE status
-        const ppeResponse = await fetch(`${API_URL}/dashboard/ppe-status`);
-        const ppeData = await ppeResponse.json();
-        if (ppeData.success) {
-          setPpeStatusData(ppeData.data);
+        const response = await fetch(`${API_URL}/dashboard/snapshot`, { headers, cache: "no-store" });
+        if (response.status === 304) {
+          return;
         }
 
-        // Fetch rule violations
-        const ruleResponse = await fetch(`${API_URL}/dashboard/rule-violations`);
-        const ruleData = await ruleResponse.json();
-        if (ruleData.success) {
-          setRuleViolations(ruleData.data);
+        const snapshot: DashboardSnapshot = await response.json();
+        if (!snapshot.success) {
+          return;
         }
+        snapshotEtag.current = response.headers.get("ETag");
 
-        // Fetch monthly summary
-        const monthlyResponse = await fetch(`${API_URL}/dashboard/monthly-summary`);
-        const monthlyDataResponse = await monthlyResponse.json();
-        if (monthlyDataResponse.success) {
-          const processedData = monthlyDataResponse.data.map((item: MonthlyDataItem) => {
-            const hasData = item.gloves > 0 || item.glasses > 0 || item.shirt > 0;
-            return {
-              ...item,
-              empty: hasData ? 0 : 150
-            };
-          });
-          setMonthlyData(processedData);
-        }
+        setStats(snapshot.stats);
+        setPpeStatusData(snapshot.ppeStatus);
+        setRuleViolations(snapshot.ruleViolations);
+
+        const processedData = snapshot.monthlySummary.map((item: MonthlyDataItem) => {
+          const hasData = item.gloves > 0 || item.glasses > 0 || item.shirt > 0;
+          return {
+            ...item,
+            empty: hasData ? 0 : 150
+          };
+        });
+        setMonthlyData(processedData);
 
       } catch (error) {
         console.error("Error fetching dashboard data:", error);
@@ -2,15 +2,18 @@
 
 import { useEffect, useState, useCallback, useRef } from "react";
 import StatusPanel from "@/components/StatusPanel";
-import { Camera, CameraInfo, Detection, DetectionData } from "@/Types/Camera";
+import { Camera, CameraInfo, CameraOverlay, Detection, DetectionData } from "@/Types/Camera";
+import AnnotatedStream from "@/components/AnnotatedStream";
 import { useCameraContext } from "@/contexts/CameraContext";
 import { CheckCircle2, XCircle } from "lucide-react";
 import { useConfig } from "@/hooks/useConfig";
+import { useCameraEvents } from "@/hooks/useCameraEvents";
 
 
 export default function Warehouse() {
   const { config } = useConfig();
   const API_URL = config?.Warehouse.API_URL || "http://localhost:8084";
+  const events = useCameraEvents(config?.Warehouse.API_URL);
 
   const { selectedCameraId } = useCameraContext();
 
@@ -18,6 +21,7 @@ export default function Warehouse() {
   const [error, setError] = useState<string | null>(null)
   const [cameraInfo, setCameraInfo] = useState<{ [key: number]: CameraInfo }>({})
   const [detections, setDetections] = useState<{ [key: number]: DetectionData }>({})
+  const [overlays, setOverlays] = useState<{ [key: number]: CameraOverlay }>({})
   const [hasNG, setHasNG] = useState<boolean>(false)
   const [safetyViolations, setSafetyViolations] = useState<string[]>([])
   const [violationTypes, setViolationTypes] = useState<{
@@ -88,6 +92,12 @@ export default function Warehouse() {
               setCameraInfo((prev) => ({ ...prev, [cam.id]: info }));
             })
             .catch((err) => console.error(`Error fetching camera ${cam.id} info:`, err));
+          fetch(`${API_URL}/camera/${cam.id}/overlay`)
+            .then((res) => res.json())
+            .then((overlay: CameraOverlay) => {
+              setOverlays((prev) => ({ ...prev, [cam.id]: overlay }));
+            })
+            .catch((err) => console.error(`Error fetching camera ${cam.id} overlay:`, err));
         });
       })
       .catch((err) => {
@@ -96,8 +106,39 @@ export default function Warehouse() {
       });
   }, []);
 
-  // Poll detection results every 500ms
+  // An overlay fetched before the camera's first frame has frame_size [0, 0]; retry until it is known
+  useEffect(() => {
+    const pending = cameras.filter((cam) => {
+      const overlay = overlays[cam.id];
+      return overlay && !overlay.server_side_annotation && !(overlay.frame_size[0] > 0 && overlay.frame_size[1] > 0);
+    });
+    if (pending.length === 0) return;
+
+    const interval = setInterval(() => {
+      pending.forEach((cam) => {
+        fetch(`${API_URL}/camera/${cam.id}/overlay`)
+          .then((res) => res.json())
+          .then((overlay: CameraOverlay) => {
+            setOverlays((prev) => ({ ...prev, [cam.id]: overlay }));
+          })
+          .catch((err) => console.error(`Error fetching camera ${cam.id} overlay:`, err));
+      });
+    }, 2000);
+
+    return () => clearInterval(interval);
+  }, [API_URL, cameras, overlays])
+
+  // Detections pushed over /ws/events
   useEffect(() => {
+    if (events.connected) {
+      setDetections(events.detections)
+    }
+  }, [events.connected, events.detections])
+
+  // Poll detection results every 500ms (fallback while the event socket is down)
+  useEffect(() => {
+    if (events.connected) return;
+
     console.log("🔄 Setting up detection polling with API_URL:", API_URL);
     
     const interval = setInterval(() => {
@@ -129,7 +170,7 @@ export default function Warehouse() {
       console.log("🛑 Clearing detection polling interval");
       clearInterval(interval);
     };
-  }, [cameras, API_URL])
+  }, [cameras, API_URL, events.connected])
 
   useEffect(() => {
     const audio = new Audio('/emergency-alarmsiren-type.mp3');
@@ -370,12 +411,13 @@ export default function Warehouse() {
                 } flex items-center justify-center`}
               >
                 <div className="relative w-full h-full flex items-center justify-center">
-                  {/* eslint-disable-next-line @next/next/no-img-element */}
-                  <img
+                  <AnnotatedStream
                     key={streamReloadKey[cameraId] || 0}
                     src={getStreamUrl(cameraId)}
                     alt={`Camera ${cameraId + 1}`}
                     className="max-w-full max-h-full object-contain bg-black border-2 sm:border-[4px] border-black"
+                    overlay={overlays[cameraId]}
+                    detections={detections[cameraId]?.detections}
                     onError={() => handleStreamError(cameraId)}
                     onLoad={() => handleStreamLoad(cameraId)}
                   />
@@ -0,0 +1,114 @@
+"use client";
+
+import { useEffect, useRef, useState } from "react";
+import { CameraOverlay, Detection } from "@/Types/Camera";
+
+interface AnnotatedStreamProps {
+  src: string;
+  alt: string;
+  className?: string;
+  overlay?: CameraOverlay;
+  detections?: Detection[];
+  onError?: () => void;
+  onLoad?: () => void;
+}
+
+const detectionColor = (d: Detection) => {
+  if (d.type === "obstacle") return "rgb(255,165,0)";
+  if (d.type === "forklift") return "rgb(0,0,255)";
+  const name = (d.classified_as || "").toLowerCase();
+  if (d.is_ng || name.trim() === "ng" || name.includes("non-safety")) return "rgb(255,0,0)";
+  if (name.includes("safety")) return "rgb(0,255,0)";
+  return "rgb(0,165,255)";
+};
+
+const detectionLabel = (d: Detection) => {
+  if (d.type === "obstacle") return `⚠️ ${d.class}: ${(d.confidence ?? 0).toFixed(2)}`;
+  if (d.type === "forklift") return `Forklift: ${(d.confidence ?? 0).toFixed(2)}`;
+  const name = d.classified_as || d.class || "";
+  return d.type === "ppe" || !name.includes("_") ? name : name.split("_").slice(1).join("_");
+};
+
+// Stream <img> with detections drawn client-side (SVG) when the server
+// streams raw frames (server_side_annotation = false).
+export default function AnnotatedStream({
+  src, alt, className, overlay, detections = [], onError, onLoad
+}: AnnotatedStreamProps) {
+  const imgRef = useRef<HTMLImageElement | null>(null);
+  const [box, setBox] = useState({ left: 0, top: 0, width: 0, height: 0 });
+  const drawOverlay = overlay !== undefined && !overlay.server_side_annotation;
+
+  useEffect(() => {
+    const img = imgRef.current;
+    if (!img || !drawOverlay) return;
+
+    // Track the image content box (inside its border) within the container
+    const update = () => setBox({
+      left: img.offsetLeft + img.clientLeft,
+      top: img.offsetTop + img.clientTop,
+      width: img.clientWidth,
+      height: img.clientHeight
+    });
+
+    update();
+    const observer = new ResizeObserver(update);
+    observer.observe(img);
+    return () => observer.disconnect();
+  }, [drawOverlay, src]);
+
+  const [frameW, frameH] = overlay?.frame_size || [0, 0];
+
+  return (
+    <>
+      {/* eslint-disable-next-line @next/next/no-img-element */}
+      <img
+        ref={imgRef}
+        src={src}
+        alt={alt}
+        className={className}
+        onError={onError}
+        onLoad={onLoad}
+      />
+
+      {drawOverlay && frameW > 0 && frameH > 0 && (
+        <svg
+          className="absolute pointer-events-none"
+          style={{ left: box.left, top: box.top, width: box.width, height: box.height }}
+          viewBox={`0 0 ${frameW} ${frameH}`}
+          preserveAspectRatio="none"
+        >
+          {overlay!.roi_zones.map((zone) => {
+            const color = zone.kind === "exclusion" ? "rgb(255,255,0)" : "rgb(255,0,0)";
+            return (
+              <g key={zone.name}>
+                <polygon
+                  points={zone.points.map((p) => p.join(",")).join(" ")}
+                  fill="none" stroke={color} strokeWidth={3}
+                />
+                <text x={zone.points[0][0]} y={zone.points[0][1] - 10} fill={color} fontSize={28} fontWeight="bold">
+                  {zone.name}
+                </text>
+              </g>
+            );
+          })}
+
+          {detections.map((d, i) => {
+            const [x1, y1, x2, y2] = d.bbox;
+            const color = detectionColor(d);
+            const label = detectionLabel(d);
+            return (
+              <g key={i}>
+                <rect
+                  x={x1} y={y1} width={x2 - x1} height={y2 - y1}
+                  fill="none" stroke={color} strokeWidth={d.is_ng ? 4 : 2}
+                />
+                <rect x={x1} y={y1 - 28} width={label.length * 12 + 10} height={28} fill={color} />
+                <text x={x1 + 5} y={y1 - 7} fill="white" fontSize={20} fontWeight="bold">{label}</text>
+              </g>
+            );
+          })}
+        </svg>
+      )}
+    </>
+  );
+}
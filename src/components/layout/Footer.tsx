@@ -1,6 +1,7 @@
 "use client";
 
 import { useConfig } from "@/hooks/useConfig";
+import { useCameraEvents } from "@/hooks/useCameraEvents";
 import { useEffect, useState } from "react";
 
 interface CameraStatus {
@@ -15,14 +16,33 @@ export default function Footer() {
   const API_URL = config?.Slitting.API_URL || "http://ath-ma-wd2503:8083/api";
   const [cameras, setCameras] = useState<CameraStatus[]>([]);
   const [isConnected, setIsConnected] = useState(false);
+  const events = useCameraEvents(config?.Slitting.API_URL);
 
+  // Camera status pushed over /api/ws/events
   useEffect(() => {
+    if (!events.connected) return;
+
+    setCameras(
+      Object.entries(events.cameras).map(([id, state]) => ({
+        id: Number(id),
+        url: "",
+        status: state.status || "inactive",
+        detections: state.detections
+      }))
+    );
+    setIsConnected(true);
+  }, [events.connected, events.cameras]);
+
+  // Poll every 2s while the event socket is down
+  useEffect(() => {
+    if (events.connected) return;
+
     fetchCameraStatus();
 
     const interval = setInterval(fetchCameraStatus, 2000);
 
     return () => clearInterval(interval);
-  }, []);
+  }, [events.connected]);
 
   const fetchCameraStatus = async () => {
     try {
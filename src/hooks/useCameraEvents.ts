@@ -0,0 +1,81 @@
+import { useEffect, useState } from "react"
+import { CameraEventState, DetectionData } from "@/Types/Camera"
+
+type EventMessage =
+  | { type: "snapshot"; cameras: { [key: number]: CameraEventState }; detections: { [key: number]: DetectionData["detections"] } }
+  | { type: "camera"; camera_id: number; changes: CameraEventState }
+  | { type: "detections"; camera_id: number; count: number; detections: DetectionData["detections"] }
+
+// Push channel (/ws/events) for camera status and detections.
+// `connected` is false while the socket is down, so callers can fall back to polling.
+export function useCameraEvents(apiUrl: string | undefined) {
+  const [connected, setConnected] = useState(false)
+  const [cameras, setCameras] = useState<{ [key: number]: CameraEventState }>({})
+  const [detections, setDetections] = useState<{ [key: number]: DetectionData }>({})
+
+  useEffect(() => {
+    if (!apiUrl || typeof WebSocket === "undefined") return
+
+    const url = `${apiUrl.replace(/^http/, "ws").replace(/\/$/, "")}/ws/events`
+    let socket: WebSocket | null = null
+    let retryTimer: ReturnType<typeof setTimeout> | null = null
+    let retryDelay = 1000
+    let closed = false
+
+    const connect = () => {
+      socket = new WebSocket(url)
+
+      socket.onopen = () => {
+        retryDelay = 1000
+        setConnected(true)
+      }
+
+      socket.onmessage = (event) => {
+        const message: EventMessage = JSON.parse(event.data)
+
+        if (message.type === "snapshot") {
+          setCameras(message.cameras)
+          const next: { [key: number]: DetectionData } = {}
+          Object.entries(message.detections).forEach(([id, list]) => {
+            next[Number(id)] = { camera_id: Number(id), count: list.length, detections: list }
+          })
+          setDetections(next)
+        } else if (message.type === "camera") {
+          setCameras((prev) => ({
+            ...prev,
+            [message.camera_id]: { ...prev[message.camera_id], ...message.changes }
+          }))
+        } else if (message.type === "detections") {
+          setDetections((prev) => ({
+            ...prev,
+            [message.camera_id]: {
+              camera_id: message.camera_id,
+              count: message.count,
+              detections: message.detections
+            }
+          }))
+        }
+      }
+
+      socket.onclose = () => {
+        setConnected(false)
+        if (closed) return
+        retryTimer = setTimeout(connect, retryDelay)
+        retryDelay = Math.min(retryDelay * 2, 30000)
+      }
+
+      socket.onerror = () => socket?.close()
+    }
+
+    connect()
+
+    return () => {
+      closed = true
+      if (retryTimer) clearTimeout(retryTimer)
+      socket?.close()
+      setConnected(false)
+    }
+  }, [apiUrl])
+
+  return { connected, cameras, detections }
+}